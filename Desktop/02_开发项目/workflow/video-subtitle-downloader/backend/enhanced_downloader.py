@@ -13,6 +13,18 @@ import requests
 from urllib.parse import urlparse
 import re
 
+from shared_package import register_package
+
+register_package()
+# 错误分类规则与universal_subtitle_downloader.retry_policy共用（error_patterns只依赖标准库）
+from universal_subtitle_downloader.error_patterns import classify_message, status_from_message
+
+try:
+    # 与universal_subtitle_downloader共用yt-dlp URL索引（持久化到cache目录，只需构建一次）
+    from universal_subtitle_downloader.url_index import url_index
+except ImportError:
+    url_index = None
+
 logger = logging.getLogger(__name__)
 
 class EnhancedVideoSubtitleDownloader:
@@ -38,6 +50,9 @@ class EnhancedVideoSubtitleDownloader:
         self.max_retries = 3
         self.retry_delay = 2
         
+        # 支持的网站列表（yt-dlp提取器列表只构建一次）
+        self._supported_sites = None
+        
         logger.info("EnhancedVideoSubtitleDownloader initialized")
     
     def _get_random_user_agent(self) -> str:
@@ -66,7 +81,7 @@ class EnhancedVideoSubtitleDownloader:
             
             # 绕过地理限制
             'geo_bypass': True,
-            'geo_bypass_country': ['US', 'UK', 'JP', 'SG'],
+            'geo_bypass_country': 'US',
             
             # 用户代理和头部
             'http_headers': {
@@ -131,24 +146,47 @@ class EnhancedVideoSubtitleDownloader:
                     
             except Exception as e:
                 last_error = e
-                error_msg = str(e).lower()
-                logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
+                category = self._classify_error(e)
+                logger.warning(f"Attempt {attempt + 1} failed ({category}): {str(e)}")
                 
-                # 检查是否为地理限制错误
-                if any(keyword in error_msg for keyword in ['geo', 'region', 'country', 'location', 'blocked']):
-                    logger.info("Detected geo-blocking, will try with proxy on next attempt")
+                # 永久错误（私有、已删除、不支持等）重试不会成功
+                if category == 'permanent':
+                    break
                 
-                # 检查是否为速率限制
-                if any(keyword in error_msg for keyword in ['rate', 'limit', '429', 'too many']):
-                    delay = self.retry_delay * (2 ** attempt)  # 指数退避
-                    logger.info(f"Rate limited, waiting {delay} seconds")
-                    time.sleep(delay)
+                # 地区限制只有换用代理才可能成功（后续尝试会使用代理）
+                if category == 'geo' and not self.proxies:
+                    logger.info("Detected geo-blocking and no proxy configured, giving up")
+                    break
                 
-                # 最后一次尝试前等待
                 if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay)
+                    # 指数退避加随机抖动，被限流时退避更久
+                    if category == 'rate_limit':
+                        delay = self.retry_delay * 4 * (2 ** attempt) * random.uniform(0.5, 1.0)
+                    else:
+                        delay = random.uniform(0, self.retry_delay * (2 ** attempt))
+                    logger.info(f"Retrying in {delay:.1f} seconds")
+                    time.sleep(delay)
         
-        raise Exception(f"获取视频信息失败，已尝试 {self.max_retries} 次。最后错误: {str(last_error)}")
+        raise Exception(f"获取视频信息失败，已尝试 {attempt + 1} 次。最后错误: {str(last_error)}")
+    
+    def _classify_error(self, error: Exception) -> str:
+        """错误分类：transient（网络、5xx）、rate_limit、geo（地区限制）、permanent（视频本身的问题），
+        与retry_policy.classify_error相同（不含熔断和平台故障判断，这两种情况结果都是transient）"""
+        if isinstance(error, yt_dlp.utils.DownloadError) and error.exc_info and error.exc_info[1] is not None:
+            error = error.exc_info[1]
+        if isinstance(error, yt_dlp.utils.GeoRestrictedError):
+            return 'geo'
+        if isinstance(error, yt_dlp.utils.UnsupportedError):
+            return 'permanent'
+        
+        category = classify_message(str(error), status_from_message(str(error)))
+        if category is not None:
+            return category
+        if isinstance(error, yt_dlp.utils.ExtractorError) and error.expected:
+            return 'permanent'
+        if isinstance(error, (ValueError, TypeError, KeyError, AttributeError)):
+            return 'permanent'
+        return 'transient'
     
     def add_proxy(self, proxy_url: str) -> bool:
         """添加代理服务器"""
@@ -417,17 +455,27 @@ class EnhancedVideoSubtitleDownloader:
         return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
     
     def get_supported_sites(self) -> List[str]:
-        """获取支持的网站列表"""
+        """获取支持的网站列表（优先读取共用的URL索引，否则首次调用时构建并缓存）"""
+        if url_index is not None:
+            try:
+                return url_index.supported_sites()[:50]  # 限制返回数量
+            except Exception as e:
+                logger.warning(f"URL index unavailable, listing extractors directly: {str(e)}")
+        
+        if self._supported_sites is not None:
+            return self._supported_sites[:50]  # 限制返回数量
+        
         try:
             import yt_dlp.extractor
-            extractors = yt_dlp.extractor.gen_extractors()
-            sites = []
+            sites = set()
             
-            for extractor in extractors:
-                if hasattr(extractor, 'IE_NAME') and extractor.IE_NAME:
-                    sites.append(extractor.IE_NAME)
+            # 只读取提取器类属性，无需实例化全部提取器
+            for extractor in yt_dlp.extractor.gen_extractor_classes():
+                if getattr(extractor, 'IE_NAME', None):
+                    sites.add(extractor.IE_NAME)
             
-            return sorted(list(set(sites)))[:50]  # 限制返回数量
+            self._supported_sites = sorted(sites)
+            return self._supported_sites[:50]  # 限制返回数量
         except Exception as e:
             logger.error(f"Failed to get supported sites: {str(e)}")
             return ['youtube', 'bilibili', 'twitter', 'facebook', 'instagram']
\ No newline at end of file
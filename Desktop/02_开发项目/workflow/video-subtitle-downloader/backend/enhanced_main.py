@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from datetime import datetime
 from fastapi import FastAPI, HTTPException, BackgroundTasks
@@ -235,6 +236,9 @@ async def startup_event():
     # 清理超过24小时的旧任务
     task_manager.cleanup_old_tasks(24)
     
+    # 在线程池中预先加载yt-dlp URL索引（支持的网站列表由其生成），避免首个请求等待
+    await asyncio.get_event_loop().run_in_executor(None, downloader.get_supported_sites)
+    
     logger.info("API started successfully")
 
 if __name__ == "__main__":
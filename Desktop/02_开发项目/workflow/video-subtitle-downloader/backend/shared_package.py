@@ -0,0 +1,19 @@
+import sys
+import importlib.util
+from pathlib import Path
+
+# 后端从backend目录运行，不安装universal_subtitle_downloader；且包的__init__会导入AI生成器等
+# 需要可选依赖的组件。这里把包登记到sys.modules但不执行__init__，之后照常导入不依赖这些组件的子模块
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+PACKAGE_NAME = "universal_subtitle_downloader"
+
+def register_package():
+    """登记包（不执行__init__），已导入时不做任何事"""
+    if PACKAGE_NAME in sys.modules:
+        return
+    
+    package_dir = PROJECT_DIR / PACKAGE_NAME
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE_NAME, package_dir / "__init__.py", submodule_search_locations=[str(package_dir)]
+    )
+    sys.modules[PACKAGE_NAME] = importlib.util.module_from_spec(spec)
@@ -0,0 +1,28 @@
+"""
+基准测试导入辅助
+包的__init__会导入AI生成器和backend（需要speech_recognition等可选依赖，并从上一级目录相对导入backend），
+直接运行脚本时无法导入。基准测试只用到其中不依赖这些模块的子模块，因此把universal_subtitle_downloader
+登记为包但不执行__init__，之后按原样导入子模块（子模块本身照常执行，不做替换）
+
+用法（在导入universal_subtitle_downloader的子模块之前）:
+    from _package import register_package
+    register_package()
+"""
+
+import sys
+import importlib.util
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+PACKAGE_NAME = "universal_subtitle_downloader"
+
+def register_package():
+    """登记包（不执行__init__），已导入时不做任何事"""
+    if PACKAGE_NAME in sys.modules:
+        return
+    
+    package_dir = PROJECT_DIR / PACKAGE_NAME
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE_NAME, package_dir / "__init__.py", submodule_search_locations=[str(package_dir)]
+    )
+    sys.modules[PACKAGE_NAME] = importlib.util.module_from_spec(spec)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+代理池基准测试
+在本地启动若干模拟代理（不同延迟、故障率，其中一个只对YouTube返回429），
+对比轮询选择与按健康得分选择代理时的请求成功率和平均延迟（不需要网络）
+
+用法: python benchmarks/bench_proxy_pool.py [--requests 600] [--concurrency 20]
+"""
+
+import time
+import random
+import asyncio
+import argparse
+import logging
+from collections import Counter
+
+import aiohttp
+from aiohttp import web
+
+# 直接运行时包的__init__无法导入（见_package）
+from _package import register_package
+register_package()
+
+from universal_subtitle_downloader.config import app_config
+from universal_subtitle_downloader.proxy_manager import ProxyManager
+
+# (名称, 延迟秒, 故障率, 是否拦截YouTube)
+PROXY_PROFILES = [
+    ('fast', 0.02, 0.0, False),
+    ('slow', 0.25, 0.0, False),
+    ('flaky', 0.03, 0.5, False),
+    ('dead', 0.0, 1.0, False),
+    ('yt-blocked', 0.02, 0.0, True),
+]
+
+TARGET_URLS = [
+    "http://www.youtube.com/api/timedtext?v={n}",
+    "http://www.bilibili.com/x/player/v2?cid={n}",
+]
+
+async def start_stand_in_proxy(port, latency, failure_rate, block_youtube, seed):
+    """模拟代理：不真正转发，按配置的延迟和故障率直接应答（HTTP代理请求使用绝对URL）"""
+    rng = random.Random(seed)
+    
+    async def handler(request):
+        if failure_rate and rng.random() < failure_rate:
+            if request.transport:
+                request.transport.close()  # 模拟连接中断
+            return web.Response(status=502)
+        await asyncio.sleep(latency * rng.uniform(0.8, 1.2))
+        if block_youtube and 'youtube.com' in (request.url.host or ''):
+            return web.Response(status=429)
+        return web.Response(text='ok')
+    
+    app = web.Application()
+    app.router.add_route('*', '/{tail:.*}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+    return runner
+
+class RoundRobin:
+    """原有做法：按顺序轮换代理，不考虑健康状况"""
+    
+    def __init__(self, proxies):
+        self.proxies = proxies
+        self.index = 0
+    
+    def select_proxy(self, url=None, http_only=False):
+        proxy = self.proxies[self.index % len(self.proxies)]
+        self.index += 1
+        return proxy
+
+async def fetch(session, selector, url, tracker=None):
+    proxy = selector.select_proxy(url, http_only=True)
+    started_at = time.perf_counter()
+    try:
+        if tracker is not None:
+            async with tracker.track(proxy, url):
+                async with session.get(url, proxy=proxy) as response:
+                    if response.status != 200:
+                        raise Exception(f"HTTP {response.status}")
+        else:
+            async with session.get(url, proxy=proxy) as response:
+                if response.status != 200:
+                    raise Exception(f"HTTP {response.status}")
+        return proxy, True, time.perf_counter() - started_at
+    except Exception:
+        return proxy, False, time.perf_counter() - started_at
+
+async def run(selector, tracker, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    timeout = aiohttp.ClientTimeout(total=5)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        async def one(n):
+            async with semaphore:
+                url = TARGET_URLS[n % len(TARGET_URLS)].format(n=n)
+                return await fetch(session, selector, url, tracker)
+        
+        return await asyncio.gather(*[one(n) for n in range(total)])
+
+def report(label, results, names):
+    successes = [latency for _, ok, latency in results if ok]
+    usage = Counter(names[proxy] for proxy, _, _ in results)
+    mean = sum(successes) / len(successes) if successes else 0.0
+    print(f"{label:<12} success {len(successes) / len(results):6.1%}  mean latency {mean * 1000:6.1f}ms  "
+          f"usage {dict(usage)}")
+
+async def main():
+    parser = argparse.ArgumentParser(description="代理池基准测试")
+    parser.add_argument('--requests', type=int, default=600, help='请求数')
+    parser.add_argument('--concurrency', type=int, default=20, help='并发数')
+    parser.add_argument('--base-port', type=int, default=18080, help='模拟代理起始端口')
+    args = parser.parse_args()
+    logging.getLogger('universal_subtitle_downloader').setLevel(logging.ERROR)
+    app_config.PROXY_QUARANTINE_SECONDS = 30
+    
+    runners, names = [], {}
+    for offset, (name, latency, failure_rate, block_youtube) in enumerate(PROXY_PROFILES):
+        port = args.base_port + offset
+        runners.append(await start_stand_in_proxy(port, latency, failure_rate, block_youtube, seed=offset))
+        names[f"http://127.0.0.1:{port}"] = name
+    
+    try:
+        proxies = list(names)
+        report('round-robin', await run(RoundRobin(proxies), None, args.requests, args.concurrency), names)
+        
+        pool = ProxyManager(proxies, check_url="http://check.local/")
+        await pool.check_all()
+        report('health', await run(pool, pool, args.requests, args.concurrency), names)
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+列式字幕片段表基准测试
+对比List[SubtitleSegment]与SegmentTable的内存占用（tracemalloc），以及校验、合并短片段、
+时间平移在两种表示下的耗时（列表一侧使用原先逐个对象处理的实现，副本保留在本文件中），并检查结果一致（不需要网络）
+
+用法: python benchmarks/bench_segment_table.py [--segments 100000] [--repeat 5]
+"""
+
+import gc
+import time
+import random
+import argparse
+import tracemalloc
+
+# 直接运行时包的__init__无法导入（见_package）
+from _package import register_package
+register_package()
+
+from universal_subtitle_downloader.config import app_config
+from universal_subtitle_downloader.extractors.base_extractor import SubtitleSegment
+from universal_subtitle_downloader.subtitle_parser import scan_subtitles
+from universal_subtitle_downloader.segment_table import table_from_segments, table_from_cues
+
+WORDS = "the quick brown fox jumps over lazy dog 字幕 测试 下载 视频".split()
+
+# ---- 原实现（逐个对象处理） ----
+
+def legacy_validate(segments):
+    issues = []
+    for i, segment in enumerate(segments):
+        if segment.start_time >= segment.end_time:
+            issues.append(f"Segment {i+1}: Start time >= End time")
+        if i > 0 and segment.start_time < segments[i-1].end_time:
+            issues.append(f"Segment {i+1}: Overlaps with previous segment")
+        if not segment.text.strip():
+            issues.append(f"Segment {i+1}: Empty text")
+        if segment.confidence < 0 or segment.confidence > 1:
+            issues.append(f"Segment {i+1}: Invalid confidence value")
+    return issues
+
+def legacy_merge(segments):
+    if len(segments) <= 1:
+        return segments
+    merged = []
+    current = segments[0]
+    for next_segment in segments[1:]:
+        if (current.duration() < app_config.MIN_SUBTITLE_DURATION * 2 and
+            next_segment.start_time - current.end_time < 1.0 and
+            len(current.text) + len(next_segment.text) < app_config.MAX_SUBTITLE_LENGTH):
+            current = SubtitleSegment(
+                start_time=current.start_time,
+                end_time=next_segment.end_time,
+                text=f"{current.text} {next_segment.text}",
+                confidence=(current.confidence + next_segment.confidence) / 2,
+                language=current.language
+            )
+        else:
+            merged.append(current)
+            current = next_segment
+    merged.append(current)
+    return merged
+
+def legacy_shift(segments, offset):
+    return [SubtitleSegment(s.start_time + offset, s.end_time + offset, s.text, s.confidence, s.language)
+            for s in segments]
+
+# ---- 测试数据 ----
+
+def generate_cues(count, rng):
+    """约5%的片段很短（可合并），少量重叠"""
+    cues, t = [], 0.0
+    for _ in range(count):
+        start = round(t + rng.uniform(-0.05, 0.5), 3)
+        end = round(start + (rng.uniform(0.1, 0.6) if rng.random() < 0.05 else rng.uniform(1.0, 4.0)), 3)
+        cues.append((start, end, ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 9)))))
+        t = end
+    return cues
+
+def clock(seconds):
+    millis = int(round(seconds * 1000))
+    return f"{millis // 3600000:02d}:{millis // 60000 % 60:02d}:{millis // 1000 % 60:02d}.{millis % 1000:03d}"
+
+def to_vtt(cues):
+    return "WEBVTT\n\n" + ''.join(f"{clock(start)} --> {clock(end)}\n{text}\n\n" for start, end, text in cues)
+
+def measure(func, repeat):
+    """取最快一次（与timeit一样测量时关闭GC）"""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            started_at = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - started_at)
+        finally:
+            gc.enable()
+    return best, result
+
+def traced_size(build):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return size, result
+
+def main():
+    parser = argparse.ArgumentParser(description="列式字幕片段表基准测试")
+    parser.add_argument('--segments', type=int, default=100000, help='片段数')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数（取最快一次）')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子')
+    args = parser.parse_args()
+    
+    cues = generate_cues(args.segments, random.Random(args.seed))
+    document = to_vtt(cues)
+    # 解析同一份VTT后常驻内存的大小（两者都包含文本字符串）
+    list_size, segments = traced_size(
+        lambda: [SubtitleSegment(start, end, text, 1.0, 'en') for start, end, text in scan_subtitles(document, 'vtt')]
+    )
+    table_size, table = traced_size(lambda: table_from_cues(scan_subtitles(document, 'vtt'), 'en'))
+    text_size, _ = traced_size(lambda: [text for _, _, text in scan_subtitles(document, 'vtt')])
+    print(f"{args.segments:,} segments, text strings {text_size / 1e6:.2f} MB")
+    for label, size in (('list', list_size), ('table', table_size)):
+        print(f"memory   {label:<6} {size / 1e6:7.2f} MB   excluding text {(size - text_size) / len(cues):5.0f} B/segment")
+    
+    conversion_time, converted = measure(lambda: table_from_segments(segments), args.repeat)
+    back_time, back = measure(table.to_segments, args.repeat)
+    print(f"convert  list->table {conversion_time * 1000:7.1f} ms   table->list {back_time * 1000:7.1f} ms   "
+          f"round trip equal: {back == segments and converted.to_segments() == segments}")
+    
+    operations = (
+        ('validate', lambda: legacy_validate(segments), table.find_issues, lambda a, b: a == b),
+        ('merge', lambda: legacy_merge(segments),
+         lambda: table.merge_short(app_config.MIN_SUBTITLE_DURATION * 2, app_config.MAX_SUBTITLE_LENGTH),
+         lambda a, b: a == b.to_segments()),
+        ('shift', lambda: legacy_shift(segments, 1.5), lambda: table.shifted(1.5),
+         lambda a, b: a == b.to_segments()),
+    )
+    print(f"{'op':<9} {'list(ms)':>9} {'table(ms)':>10} {'speedup':>8} {'match':>6}")
+    for name, legacy, columnar, same in operations:
+        legacy_time, legacy_result = measure(legacy, args.repeat)
+        table_time, table_result = measure(columnar, args.repeat)
+        print(f"{name:<9} {legacy_time * 1000:9.1f} {table_time * 1000:10.1f} "
+              f"{legacy_time / table_time:7.1f}x {str(same(legacy_result, table_result)):>6}")
+
+if __name__ == "__main__":
+    main()
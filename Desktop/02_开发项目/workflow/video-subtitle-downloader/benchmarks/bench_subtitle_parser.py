@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+字幕解析基准测试
+对比subtitle_parser的单遍扫描与原先按行切分、逐行调用re.match/re.sub的解析实现
+（原实现的副本保留在本文件中作为基线），输出每种格式的片段/秒和MB/秒，并检查两者结果一致（不需要网络）
+
+用法: python benchmarks/bench_subtitle_parser.py [--cues 20000] [--repeat 5]
+"""
+
+import gc
+import re
+import time
+import random
+import argparse
+import xml.etree.ElementTree as ET
+
+# 直接运行时包的__init__无法导入（见_package）
+from _package import register_package
+register_package()
+
+from universal_subtitle_downloader.subtitle_parser import scan_subtitles
+from universal_subtitle_downloader.extractors.base_extractor import SubtitleSegment
+
+WORDS = "the quick brown fox jumps over lazy dog 字幕 测试 下载 视频".split()
+
+# ---- 原实现（BaseSubtitleExtractor/SubtitleFormatConverter中的_parse_*） ----
+
+def legacy_parse_time(time_str):
+    time_str = time_str.strip()
+    if ':' in time_str:
+        parts = time_str.replace(',', '.').split(':')
+        if len(parts) == 3:
+            return int(parts[0]) * 3600 + int(parts[1]) * 60 + float(parts[2])
+        elif len(parts) == 2:
+            return int(parts[0]) * 60 + float(parts[1])
+    return float(time_str)
+
+def legacy_parse_vtt(content):
+    segments = []
+    lines = content.split('\n')
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if '-->' in line:
+            time_match = re.match(r'(\d+:[\d:.]+)\s+-->\s+(\d+:[\d:.]+)', line)
+            if time_match:
+                start_time = legacy_parse_time(time_match.group(1))
+                end_time = legacy_parse_time(time_match.group(2))
+                i += 1
+                text_lines = []
+                while i < len(lines) and lines[i].strip():
+                    text_line = lines[i].strip()
+                    text_line = re.sub(r'<[^>]+>', '', text_line)
+                    if text_line:
+                        text_lines.append(text_line)
+                    i += 1
+                if text_lines:
+                    segments.append(SubtitleSegment(start_time, end_time, '\n'.join(text_lines)))
+        i += 1
+    return segments
+
+def legacy_parse_srt(content):
+    segments = []
+    for block in re.split(r'\n\s*\n', content.strip()):
+        lines = block.strip().split('\n')
+        if len(lines) >= 3:
+            time_match = re.match(r'(\d+:[\d:,]+)\s+-->\s+(\d+:[\d:,]+)', lines[1])
+            if time_match:
+                start_time = legacy_parse_time(time_match.group(1).replace(',', '.'))
+                end_time = legacy_parse_time(time_match.group(2).replace(',', '.'))
+                segments.append(SubtitleSegment(start_time, end_time, '\n'.join(lines[2:])))
+    return segments
+
+def legacy_parse_ass_time(time_str):
+    parts = time_str.split(':')
+    sec_parts = parts[2].split('.')
+    centiseconds = int(sec_parts[1]) if len(sec_parts) > 1 else 0
+    return int(parts[0]) * 3600 + int(parts[1]) * 60 + int(sec_parts[0]) + centiseconds / 100
+
+def legacy_parse_ass(content):
+    segments = []
+    in_events = False
+    for line in content.split('\n'):
+        line = line.strip()
+        if line.startswith('[Events]'):
+            in_events = True
+            continue
+        elif line.startswith('[') and in_events:
+            break
+        if in_events and line.startswith('Dialogue:'):
+            parts = line.split(',', 9)
+            if len(parts) >= 10:
+                text = re.sub(r'\{[^}]*\}', '', parts[9]).replace('\\N', '\n')
+                if text.strip():
+                    segments.append(SubtitleSegment(
+                        legacy_parse_ass_time(parts[1]), legacy_parse_ass_time(parts[2]), text.strip()
+                    ))
+    return segments
+
+def legacy_parse_ttml(content):
+    segments = []
+    root = ET.fromstring(content)
+    for p in root.findall('.//{http://www.w3.org/ns/ttml}p'):
+        begin, end = p.get('begin', '0s'), p.get('end', '0s')
+        text = ''.join(p.itertext()).strip()
+        if text:
+            segments.append(SubtitleSegment(float(begin[:-1]), float(end[:-1]), text))
+    return segments
+
+LEGACY_PARSERS = {
+    'vtt': legacy_parse_vtt,
+    'srt': legacy_parse_srt,
+    'ass': legacy_parse_ass,
+    'ttml': legacy_parse_ttml,
+}
+
+# ---- 测试数据 ----
+
+def clock(seconds, separator='.'):
+    millis = int(round(seconds * 1000))
+    return f"{millis // 3600000:02d}:{millis // 60000 % 60:02d}:{millis // 1000 % 60:02d}{separator}{millis % 1000:03d}"
+
+def ass_clock(seconds):
+    centis = int(round(seconds * 100))
+    return f"{centis // 360000}:{centis // 6000 % 60:02d}:{centis // 100 % 60:02d}.{centis % 100:02d}"
+
+def generate_cues(count, rng):
+    cues, t = [], 0.0
+    for _ in range(count):
+        start = round(t + rng.uniform(0, 0.5), 2)
+        end = round(start + rng.uniform(0.8, 4.0), 2)
+        lines = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 9))) for _ in range(rng.randint(1, 2))]
+        cues.append((start, end, lines))
+        t = end
+    return cues
+
+def generate_documents(cues):
+    vtt = ["WEBVTT", "Kind: captions", ""]
+    srt, ttml = [], []
+    ass = ["[Script Info]", "ScriptType: v4.00+", "", "[Events]",
+           "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text"]
+    for index, (start, end, lines) in enumerate(cues, 1):
+        tagged = [f"<c>{line}</c>" if index % 3 == 0 else line for line in lines]
+        vtt += [f"{clock(start)} --> {clock(end)} align:start position:0%", *tagged, ""]
+        srt += [str(index), f"{clock(start, ',')} --> {clock(end, ',')}", *lines, ""]
+        text = ('{\\i1}' if index % 4 == 0 else '') + '\\N'.join(lines)
+        ass.append(f"Dialogue: 0,{ass_clock(start)},{ass_clock(end)},Default,,0,0,0,,{text}")
+        ttml.append(f'<p begin="{start:.3f}s" end="{end:.3f}s">{" ".join(lines)}</p>')
+    ttml_doc = ('<?xml version="1.0" encoding="UTF-8"?>\n<tt xmlns="http://www.w3.org/ns/ttml"><body><div>\n'
+                + '\n'.join(ttml) + '\n</div></body></tt>')
+    return {'vtt': '\n'.join(vtt), 'srt': '\n'.join(srt), 'ass': '\n'.join(ass), 'ttml': ttml_doc}
+
+def new_parse(content, format_type):
+    return [SubtitleSegment(start, end, text) for start, end, text in scan_subtitles(content, format_type)]
+
+def measure(func, repeat):
+    """取最快一次（与timeit一样测量时关闭GC）"""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            started_at = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - started_at)
+        finally:
+            gc.enable()
+    return best, result
+
+def same(a, b):
+    return len(a) == len(b) and all(
+        abs(x.start_time - y.start_time) < 1e-6 and abs(x.end_time - y.end_time) < 1e-6 and x.text == y.text
+        for x, y in zip(a, b)
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="字幕解析基准测试")
+    parser.add_argument('--cues', type=int, default=20000, help='每种格式的字幕块数')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数（取最快一次）')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子')
+    args = parser.parse_args()
+    
+    documents = generate_documents(generate_cues(args.cues, random.Random(args.seed)))
+    
+    print(f"{'format':<6} {'MB':>6} {'impl':<8} {'time(ms)':>9} {'segments/s':>12} {'MB/s':>8} {'speedup':>8} {'match':>6}")
+    for format_type, content in documents.items():
+        megabytes = len(content.encode('utf-8')) / 1e6
+        legacy_time, legacy_segments = measure(lambda: LEGACY_PARSERS[format_type](content), args.repeat)
+        new_time, new_segments = measure(lambda: new_parse(content, format_type), args.repeat)
+        match = same(legacy_segments, new_segments)
+        for label, elapsed, segments in (('legacy', legacy_time, legacy_segments), ('scanner', new_time, new_segments)):
+            speedup = f"{legacy_time / elapsed:7.2f}x" if label == 'scanner' else ''
+            print(f"{format_type:<6} {megabytes:6.2f} {label:<8} {elapsed * 1000:9.1f} "
+                  f"{len(segments) / elapsed:12,.0f} {megabytes / elapsed:8.1f} {speedup:>8} {str(match) if speedup else '':>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+流式字幕转换基准测试
+生成一份多小时的VTT字幕文件，对比整篇读取→解析→转换→写入与convert_stream边读边写时的
+耗时、峰值内存（tracemalloc）和产出第一个片段前读取的数据量，并检查两者输出一致（不需要网络）
+
+用法: python benchmarks/bench_subtitle_stream.py [--hours 6] [--format srt]
+"""
+
+import os
+import io
+import time
+import random
+import tempfile
+import argparse
+import tracemalloc
+
+# 直接运行时包的__init__无法导入（见_package）
+from _package import register_package
+register_package()
+
+from universal_subtitle_downloader.format_converter import SubtitleFormatConverter
+from universal_subtitle_downloader.subtitle_stream import iter_segments
+
+WORDS = "the quick brown fox jumps over lazy dog 字幕 测试 下载 视频".split()
+
+def clock(seconds):
+    millis = int(round(seconds * 1000))
+    return f"{millis // 3600000:02d}:{millis // 60000 % 60:02d}:{millis // 1000 % 60:02d}.{millis % 1000:03d}"
+
+def write_vtt(path, hours, rng):
+    """约每3秒一条字幕"""
+    count, t = 0, 0.0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("WEBVTT\nKind: captions\n\n")
+        while t < hours * 3600:
+            start = round(t + rng.uniform(0, 0.5), 2)
+            end = round(start + rng.uniform(0.8, 4.0), 2)
+            text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 12)))
+            f.write(f"{clock(start)} --> {clock(end)}\n{text}\n\n")
+            t = end
+            count += 1
+    return count
+
+class CountingReader(io.RawIOBase):
+    """记录已读取字节数的文件包装"""
+    
+    def __init__(self, f):
+        self.f = f
+        self.bytes_read = 0
+    
+    def readable(self):
+        return True
+    
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.bytes_read += len(data)
+        return data
+
+def whole_document(converter, source_path, output_path, target_format):
+    with open(source_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    segments = converter.parse_subtitle_file(content, 'vtt')
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(converter.convert_segments(segments, target_format))
+    return len(segments)
+
+def streaming(converter, source_path, output_path, target_format):
+    with open(source_path, 'rb') as f, open(output_path, 'w', encoding='utf-8') as out:
+        return converter.convert_stream(f, 'vtt', target_format, out)
+
+def measure(func, *args):
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    try:
+        result = func(*args)
+        elapsed = time.perf_counter() - started_at
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="流式字幕转换基准测试")
+    parser.add_argument('--hours', type=float, default=6, help='字幕时长（小时）')
+    parser.add_argument('--format', default='srt', help='目标格式')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子')
+    args = parser.parse_args()
+    
+    converter = SubtitleFormatConverter()
+    with tempfile.TemporaryDirectory() as workdir:
+        source_path = os.path.join(workdir, 'lecture.vtt')
+        cues = write_vtt(source_path, args.hours, random.Random(args.seed))
+        megabytes = os.path.getsize(source_path) / 1e6
+        print(f"source: {cues:,} cues, {megabytes:.1f} MB")
+        
+        outputs = {}
+        for label, func in (('whole', whole_document), ('streaming', streaming)):
+            output_path = os.path.join(workdir, f'{label}.{args.format}')
+            count, elapsed, peak = measure(func, converter, source_path, output_path, args.format)
+            with open(output_path, 'rb') as f:
+                outputs[label] = f.read()
+            print(f"{label:<10} {count:>8,} segments  {elapsed * 1000:8.1f} ms  peak memory {peak / 1e6:8.2f} MB")
+        print(f"identical output: {outputs['whole'] == outputs['streaming']}")
+        
+        with open(source_path, 'rb') as f:
+            reader = CountingReader(f)
+            next(iter(iter_segments(reader, 'vtt')))
+            print(f"first segment after reading {reader.bytes_read / 1e3:.1f} KB of {megabytes * 1e3:,.0f} KB")
+
+if __name__ == "__main__":
+    main()
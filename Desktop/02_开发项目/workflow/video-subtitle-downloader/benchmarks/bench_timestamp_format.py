@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+时间戳批量格式化基准测试
+对比逐个片段调用_seconds_to_*_time与timestamp_format批量格式化：只格式化时间戳，以及完整生成SRT/VTT/ASS
+（片段列表、SegmentTable、同一轨道依次生成三种格式），原生成函数的副本保留在本文件中作为基线，并检查输出逐字节一致（不需要网络）
+
+用法: python benchmarks/bench_timestamp_format.py [--cues 100000] [--repeat 5]
+"""
+
+import gc
+import time
+import random
+import argparse
+
+# 直接运行时包的__init__无法导入（见_package）
+from _package import register_package
+register_package()
+
+from universal_subtitle_downloader.extractors.base_extractor import SubtitleSegment, SubtitleTrack
+from universal_subtitle_downloader.format_converter import SubtitleFormatConverter
+from universal_subtitle_downloader.segment_table import table_from_segments
+from universal_subtitle_downloader.timestamp_format import (
+    TimestampColumns, format_srt_time, format_vtt_time, format_ass_time
+)
+
+WORDS = "the quick brown fox jumps over lazy dog 字幕 测试 下载 视频".split()
+
+FORMATS = ('srt', 'vtt', 'ass')
+
+# ---- 原实现（逐个片段格式化时间戳） ----
+
+def legacy_srt(segments, track):
+    srt_content = []
+    for i, segment in enumerate(segments, 1):
+        start_time = format_srt_time(segment.start_time)
+        end_time = format_srt_time(segment.end_time)
+        srt_content.append(f"{i}")
+        srt_content.append(f"{start_time} --> {end_time}")
+        srt_content.append(segment.text)
+        srt_content.append("")
+    return '\n'.join(srt_content)
+
+def legacy_vtt(segments, track):
+    vtt_content = ["WEBVTT"]
+    if track.language:
+        vtt_content.append(f"Language: {track.language}")
+    vtt_content.append("")
+    for segment in segments:
+        start_time = format_vtt_time(segment.start_time)
+        end_time = format_vtt_time(segment.end_time)
+        vtt_content.append(f"{start_time} --> {end_time}")
+        vtt_content.append(segment.text)
+        vtt_content.append("")
+    return '\n'.join(vtt_content)
+
+def legacy_ass(segments, track):
+    # 文件头与SubtitleFormatConverter相同，取自其生成结果
+    ass_content = [SubtitleFormatConverter()._generate_ass([], track)]
+    for segment in segments:
+        start_time = format_ass_time(segment.start_time)
+        end_time = format_ass_time(segment.end_time)
+        text = segment.text.replace('\n', '\\N')
+        ass_content.append(f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{text}")
+    return '\n'.join(ass_content)
+
+LEGACY_GENERATORS = {'srt': legacy_srt, 'vtt': legacy_vtt, 'ass': legacy_ass}
+SCALAR_FORMATTERS = {'srt': format_srt_time, 'vtt': format_vtt_time, 'ass': format_ass_time}
+
+def generate_segments(count, rng):
+    segments, t = [], 0.0
+    for _ in range(count):
+        start = t + rng.uniform(0, 0.5)
+        end = start + rng.uniform(0.8, 4.0)
+        segments.append(SubtitleSegment(start, end, ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 9)))))
+        t = end
+    return segments
+
+def measure(func, repeat):
+    """取最快一次（与timeit一样测量时关闭GC）"""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            started_at = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - started_at)
+        finally:
+            gc.enable()
+    return best, result
+
+def report(label, legacy, batched, repeat):
+    legacy_time, legacy_result = measure(legacy, repeat)
+    batched_time, batched_result = measure(batched, repeat)
+    print(f"{label:<24} {legacy_time * 1000:10.1f} {batched_time * 1000:11.1f} "
+          f"{legacy_time / batched_time:7.1f}x {str(legacy_result == batched_result):>6}")
+
+def main():
+    parser = argparse.ArgumentParser(description="时间戳批量格式化基准测试")
+    parser.add_argument('--cues', type=int, default=100000, help='片段数')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数（取最快一次）')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子')
+    args = parser.parse_args()
+    
+    segments = generate_segments(args.cues, random.Random(args.seed))
+    track = SubtitleTrack('en', 'English', False, 'srt', '', segments)
+    converter = SubtitleFormatConverter()
+    starts = [segment.start_time for segment in segments]
+    ends = [segment.end_time for segment in segments]
+    
+    print(f"{args.cues:,} cues")
+    print(f"{'case':<24} {'legacy(ms)':>10} {'batched(ms)':>11} {'speedup':>8} {'match':>6}")
+    for style in FORMATS:
+        formatter = SCALAR_FORMATTERS[style]
+        report(f"timestamps {style}",
+               lambda: [formatter(s) for s in starts] + [formatter(e) for e in ends],
+               lambda: TimestampColumns(starts).render(style) + TimestampColumns(ends).render(style),
+               args.repeat)
+    for style in FORMATS:
+        report(f"generate {style} (list)",
+               lambda: LEGACY_GENERATORS[style](segments, track),
+               lambda: converter.convert_subtitle_track(track, style),
+               args.repeat)
+    
+    # 同一轨道依次生成三种格式：片段表缓存整数时间，只转换一次（包含转为片段表的时间）
+    report("srt+vtt+ass (table)",
+           lambda: [LEGACY_GENERATORS[style](segments, track) for style in FORMATS],
+           lambda: [converter.convert_segments(table, style, language='en', language_name='English')
+                    for table in [table_from_segments(segments)] for style in FORMATS],
+           args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+yt-dlp URL索引基准测试
+以yt-dlp各提取器自带的测试URL为样本，对比逐个调用提取器suitable()与URL索引的单URL耗时，并检查结果一致
+
+用法: python benchmarks/bench_url_index.py [--rounds 3] [--index-file /tmp/ydl_url_index.json]
+"""
+
+import time
+import argparse
+import logging
+import tempfile
+from pathlib import Path
+
+from yt_dlp.extractor import gen_extractor_classes
+
+# 直接运行时包的__init__无法导入（见_package）
+from _package import register_package
+register_package()
+
+from universal_subtitle_downloader.url_index import ExtractorURLIndex, GENERIC_IE_KEY
+
+def collect_test_urls(classes):
+    """收集提取器_TESTS中的URL"""
+    urls = []
+    for ie_class in classes:
+        for test in getattr(ie_class, '_TESTS', None) or []:
+            if isinstance(test, dict) and test.get('url'):
+                urls.append(test['url'])
+    return urls
+
+def linear_match(classes, url):
+    """yt-dlp的做法：按顺序询问每个提取器"""
+    for ie_class in classes:
+        if ie_class.suitable(url):
+            return ie_class.ie_key()
+    return None
+
+def bench(func, urls, rounds):
+    """多轮取最快一轮（首轮包含正则编译）"""
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for url in urls:
+            func(url)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="yt-dlp URL索引基准测试")
+    parser.add_argument('--rounds', type=int, default=3, help='测试轮数')
+    parser.add_argument('--index-file', default=None, help='索引文件路径（默认使用临时目录）')
+    args = parser.parse_args()
+    logging.getLogger('yt_dlp').setLevel(logging.ERROR)
+    
+    index_file = Path(args.index_file or Path(tempfile.gettempdir()) / "bench_ydl_url_index.json")
+    
+    start = time.perf_counter()
+    classes = [ie_class for ie_class in gen_extractor_classes() if ie_class.ie_key() != GENERIC_IE_KEY]
+    load_classes = time.perf_counter() - start
+    urls = collect_test_urls(classes)
+    
+    index_file.unlink(missing_ok=True)
+    start = time.perf_counter()
+    ExtractorURLIndex(index_file=index_file, persist=True).ensure_loaded()
+    build = time.perf_counter() - start
+    
+    # 从持久化文件加载（与服务重启后的情况一致）
+    start = time.perf_counter()
+    index = ExtractorURLIndex(index_file=index_file, persist=True)
+    index.ensure_loaded()
+    load = time.perf_counter() - start
+    
+    mismatches = sum(
+        1 for url in urls
+        if linear_match(classes, url) != ((index.match(url) or {}).get('ie_key'))
+    )
+    
+    linear = bench(lambda url: linear_match(classes, url), urls, args.rounds)
+    # 每次查询前清空结果缓存，只测索引本身
+    indexed = bench(lambda url: (index._match_cache.clear(), index.match(url)), urls, args.rounds)
+    
+    stats = index.get_stats()
+    print(f"URLs:               {len(urls)}")
+    print(f"Extractor classes:  {len(classes)} (import {load_classes:.2f}s)")
+    print(f"Index build:        {build:.2f}s, load from file: {load * 1000:.1f}ms")
+    print(f"Unindexed patterns: {stats['unindexed_patterns']}")
+    print(f"Linear suitable():  {linear / len(urls) * 1e6:.1f} us/url")
+    print(f"URL index:          {indexed / len(urls) * 1e6:.1f} us/url")
+    print(f"Speedup:            {linear / indexed:.1f}x")
+    print(f"Regex checks/url:   {stats['regex_checks'] / max(stats['lookups'], 1):.1f}")
+    print(f"Mismatches:         {mismatches}")
+
+if __name__ == "__main__":
+    main()
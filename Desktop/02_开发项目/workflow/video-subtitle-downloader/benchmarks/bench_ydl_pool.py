@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+YoutubeDL实例池基准测试
+对比每次新建YoutubeDL与从实例池借出的开销
+
+用法: python benchmarks/bench_ydl_pool.py [--iterations 200] [--url URL]
+"""
+
+import argparse
+import time
+
+import yt_dlp
+
+# 直接运行时包的__init__无法导入（见_package）
+from _package import register_package
+register_package()
+
+from universal_subtitle_downloader.extractors.youtube_extractor import YouTubeSubtitleExtractor
+from universal_subtitle_downloader.ydl_pool import YoutubeDLPool
+
+def bench_fresh(opts, iterations, url=None):
+    """每次调用都新建实例（原有做法）"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with yt_dlp.YoutubeDL(dict(opts)) as ydl:
+            if url:
+                ydl.extract_info(url, download=False)
+    return time.perf_counter() - start
+
+def bench_pooled(opts, iterations, url=None):
+    """从实例池借出实例"""
+    pool = YoutubeDLPool(max_idle_per_key=1, max_keys=1)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with pool.acquire(opts) as ydl:
+            if url:
+                ydl.extract_info(url, download=False)
+    elapsed = time.perf_counter() - start
+    stats = pool.get_stats()
+    pool.clear()
+    return elapsed, stats
+
+def main():
+    parser = argparse.ArgumentParser(description="YoutubeDL实例池基准测试")
+    parser.add_argument('--iterations', type=int, default=200, help='调用次数')
+    parser.add_argument('--url', help='同时执行extract_info的URL（默认只测构建开销）')
+    args = parser.parse_args()
+    
+    # 使用与YouTube提取器相同的配置
+    opts = YouTubeSubtitleExtractor().ydl_opts
+    
+    fresh = bench_fresh(opts, args.iterations, args.url)
+    pooled, stats = bench_pooled(opts, args.iterations, args.url)
+    
+    print(f"Iterations:      {args.iterations}")
+    print(f"Fresh instances: {fresh:.3f}s ({fresh / args.iterations * 1000:.3f} ms/call)")
+    print(f"Pooled:          {pooled:.3f}s ({pooled / args.iterations * 1000:.3f} ms/call)")
+    print(f"Saved per call:  {(fresh - pooled) / args.iterations * 1000:.3f} ms")
+    print(f"Speedup:         {fresh / pooled:.1f}x")
+    print(f"Pool stats:      {stats}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+YouTube timedtext快速路径基准测试
+对比快速路径与yt-dlp完整提取获取字幕的单视频耗时和HTTP请求数（需要网络）
+
+用法: python benchmarks/bench_youtube_timedtext.py [--languages en] URL [URL ...]
+"""
+
+import time
+import asyncio
+import argparse
+
+import aiohttp
+import yt_dlp
+
+# 直接运行时包的__init__无法导入（见_package）
+from _package import register_package
+register_package()
+
+from universal_subtitle_downloader.config import app_config
+from universal_subtitle_downloader.http_session import create_http_session
+from universal_subtitle_downloader.extractors.youtube_extractor import YouTubeSubtitleExtractor
+
+class RequestCounter:
+    """统计aiohttp与yt-dlp发出的HTTP请求数"""
+    
+    def __init__(self):
+        self.aiohttp_requests = 0
+        self.ydl_requests = 0
+        self._original_urlopen = yt_dlp.YoutubeDL.urlopen
+    
+    def trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+        
+        async def on_request_start(session, context, params):
+            self.aiohttp_requests += 1
+        
+        trace_config.on_request_start.append(on_request_start)
+        return trace_config
+    
+    def install(self):
+        counter = self
+        original = self._original_urlopen
+        
+        def urlopen(ydl, req):
+            counter.ydl_requests += 1
+            return original(ydl, req)
+        
+        yt_dlp.YoutubeDL.urlopen = urlopen
+    
+    def uninstall(self):
+        yt_dlp.YoutubeDL.urlopen = self._original_urlopen
+    
+    def reset(self):
+        self.aiohttp_requests = 0
+        self.ydl_requests = 0
+
+async def measure(url, languages, fast_path, counter):
+    """测量一次字幕提取（不使用元数据缓存）"""
+    app_config.YOUTUBE_TIMEDTEXT_FAST_PATH = fast_path
+    counter.reset()
+    
+    session = create_http_session(trace_configs=[counter.trace_config()])
+    try:
+        extractor = YouTubeSubtitleExtractor(session=session)
+        start = time.perf_counter()
+        tracks = await extractor.extract_subtitles(url, languages)
+        elapsed = time.perf_counter() - start
+    finally:
+        await session.close()
+    
+    return elapsed, counter.aiohttp_requests + counter.ydl_requests, len(tracks)
+
+async def main():
+    parser = argparse.ArgumentParser(description="YouTube timedtext快速路径基准测试")
+    parser.add_argument('urls', nargs='+', help='YouTube视频URL')
+    parser.add_argument('--languages', nargs='+', default=['en'], help='字幕语言')
+    args = parser.parse_args()
+    
+    counter = RequestCounter()
+    counter.install()
+    
+    totals = {True: [0.0, 0], False: [0.0, 0]}
+    print(f"{'URL':<45} {'path':<10} {'time(s)':>8} {'requests':>9} {'tracks':>7}")
+    try:
+        for url in args.urls:
+            for fast_path in (True, False):
+                label = 'timedtext' if fast_path else 'yt-dlp'
+                try:
+                    elapsed, requests, tracks = await measure(url, args.languages, fast_path, counter)
+                except Exception as e:
+                    print(f"{url:<45} {label:<10} failed: {str(e)}")
+                    continue
+                totals[fast_path][0] += elapsed
+                totals[fast_path][1] += requests
+                print(f"{url:<45} {label:<10} {elapsed:>8.2f} {requests:>9} {tracks:>7}")
+    finally:
+        counter.uninstall()
+    
+    count = len(args.urls)
+    for fast_path, label in ((True, 'timedtext'), (False, 'yt-dlp')):
+        elapsed, requests = totals[fast_path]
+        print(f"{label:<10} avg {elapsed / count:.2f}s/video, {requests / count:.1f} requests/video")
+
+if __name__ == "__main__":
+    asyncio.run(main())
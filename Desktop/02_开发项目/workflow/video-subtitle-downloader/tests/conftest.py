@@ -0,0 +1,18 @@
+"""
+测试导入设置
+包的__init__会导入AI生成器和backend（需要可选依赖，并从上一级目录相对导入backend），
+测试只用到独立的子模块，因此把universal_subtitle_downloader登记为包但不执行__init__（与benchmarks/_package相同）
+"""
+
+import sys
+import importlib.util
+from pathlib import Path
+
+PACKAGE_NAME = "universal_subtitle_downloader"
+PACKAGE_DIR = Path(__file__).resolve().parent.parent / PACKAGE_NAME
+
+if PACKAGE_NAME not in sys.modules:
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE_NAME, PACKAGE_DIR / "__init__.py", submodule_search_locations=[str(PACKAGE_DIR)]
+    )
+    sys.modules[PACKAGE_NAME] = importlib.util.module_from_spec(spec)
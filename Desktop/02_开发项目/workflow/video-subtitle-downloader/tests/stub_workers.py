@@ -0,0 +1,27 @@
+"""
+提取进程池测试用的工作进程（不导入包，在spawn出的子进程中运行）
+"""
+
+import os
+import time
+
+def silent_worker(conn):
+    """启动后接收请求但永不应答（模拟卡死的提取）"""
+    conn.send(('ready', None))
+    while True:
+        time.sleep(1)
+
+def crashing_worker(conn):
+    """收到请求后立即退出（模拟进程崩溃）"""
+    conn.send(('ready', None))
+    conn.recv()
+    os._exit(1)
+
+def echo_worker(conn):
+    """返回请求的URL"""
+    conn.send(('ready', None))
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        conn.send(('ok', {'url': message[0]}))
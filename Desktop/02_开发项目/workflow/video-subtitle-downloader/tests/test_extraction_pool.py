@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from yt_dlp.utils import DownloadError, ExtractorError, GeoRestrictedError
+
+from universal_subtitle_downloader.extraction_pool import (
+    ProcessExtractionPool, ExtractionTimeoutError, ExtractionWorkerError, _describe_error, _rebuild_error
+)
+from universal_subtitle_downloader.retry_policy import classify_error, GEO, PERMANENT, TRANSIENT
+
+import stub_workers
+
+def run_pool(worker_target, url='https://example.com/v', **kwargs):
+    """用指定工作进程执行一次提取，返回(结果或异常, 统计信息)"""
+    async def main():
+        pool = ProcessExtractionPool(max_workers=1, worker_target=worker_target, **kwargs)
+        try:
+            try:
+                result = await pool.extract_info(url, {})
+            except Exception as e:
+                result = e
+            return result, pool.get_stats(), [worker.is_alive() for worker in pool._idle]
+        finally:
+            pool.close()
+    return asyncio.run(main())
+
+def test_timeout_replaces_worker_once():
+    error, stats, idle_alive = run_pool(stub_workers.silent_worker, timeout=0.5)
+    assert type(error) is ExtractionTimeoutError
+    assert stats['timeouts'] == 1 and stats['crashes'] == 0
+    assert stats['spawned'] == 2
+    assert idle_alive == [True]
+
+def test_crash_raises_worker_error():
+    error, stats, idle_alive = run_pool(stub_workers.crashing_worker, timeout=10)
+    assert type(error) is ExtractionWorkerError
+    assert stats['crashes'] == 1 and stats['timeouts'] == 0
+    assert idle_alive == [True]
+
+def test_successful_call_reuses_worker():
+    result, stats, idle_alive = run_pool(stub_workers.echo_worker, timeout=10)
+    assert result == {'url': 'https://example.com/v'}
+    assert stats['spawned'] == 1 and idle_alive == [True]
+
+def raised(error):
+    try:
+        raise error
+    except Exception as e:
+        return e
+
+@pytest.mark.parametrize('root, category', [
+    (GeoRestrictedError('The uploader has not made this video available in your country'), GEO),
+    (ExtractorError('Join this channel to get access', expected=True), PERMANENT),
+    (ExtractorError('Unable to download webpage'), TRANSIENT),
+])
+def test_worker_errors_keep_type(root, category):
+    error = raised(DownloadError(f"ERROR: {root}", (type(root), root, None)))
+    rebuilt = _rebuild_error(*_describe_error(error))
+    assert isinstance(rebuilt, DownloadError) and str(rebuilt) == str(error)
+    assert type(rebuilt.exc_info[1]) is type(root) and str(rebuilt.exc_info[1]) == str(root)
+    assert rebuilt.exc_info[1].expected == root.expected
+    assert classify_error(rebuilt) == classify_error(error) == category
+
+def test_unknown_worker_error_is_plain_exception():
+    rebuilt = _rebuild_error(*_describe_error(RuntimeError("boom")))
+    assert type(rebuilt) is Exception and str(rebuilt) == "boom"
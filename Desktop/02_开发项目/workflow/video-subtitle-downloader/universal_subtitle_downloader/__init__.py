@@ -30,6 +30,7 @@ from .extractors.base_extractor import (
     SubtitleTrack,
     VideoInfo
 )
+from .segment_table import SegmentTable
 
 from .extractors.youtube_extractor import YouTubeSubtitleExtractor
 from .extractors.bilibili_extractor import BilibiliSubtitleExtractor
@@ -60,6 +61,7 @@ __all__ = [
     # 数据结构
     'SubtitleSegment',
     'SubtitleTrack',
+    'SegmentTable',
     'VideoInfo',
     
     # 配置
@@ -15,7 +15,9 @@ from dataclasses import dataclass
 import aiohttp
 import numpy as np
 from .extractors.base_extractor import SubtitleSegment, SubtitleTrack
+from .segment_table import SegmentTable, as_table
 from .config import subtitle_config, app_config, env_config
+from .executors import run_in_executor
 
 # 动态导入AI模型库
 try:
@@ -139,9 +141,7 @@ class AISubtitleGenerator:
                 self.logger.info(f"Loading Whisper model: {model_name}")
                 
                 # 在线程池中加载模型
-                model = await asyncio.get_event_loop().run_in_executor(
-                    None, whisper.load_model, model_name
-                )
+                model = await run_in_executor('ai', whisper.load_model, model_name)
                 self.whisper_models[model_name] = model
             
             model = self.whisper_models[model_name]
@@ -156,9 +156,7 @@ class AISubtitleGenerator:
             
             # 在线程池中执行转录
             self.logger.info(f"Transcribing audio with Whisper ({model_name})...")
-            result = await asyncio.get_event_loop().run_in_executor(
-                None, model.transcribe, audio_file, options
-            )
+            result = await run_in_executor('ai', model.transcribe, audio_file, options)
             
             # 转换为字幕段落
             segments = []
@@ -207,8 +205,8 @@ class AISubtitleGenerator:
             for i, (start_time, end_time, audio_data) in enumerate(segments):
                 try:
                     # 使用Google Speech Recognition
-                    text = await asyncio.get_event_loop().run_in_executor(
-                        None,
+                    text = await run_in_executor(
+                        'ai',
                         self.sr_recognizer.recognize_google,
                         audio_data,
                         None,  # key
@@ -255,7 +253,7 @@ class AISubtitleGenerator:
             import librosa
             
             # 加载音频
-            y, sr_rate = librosa.load(audio_file, sr=16000)
+            y, sr_rate = await run_in_executor('ai', librosa.load, audio_file, sr=16000)
             duration = len(y) / sr_rate
             
             chunks = []
@@ -384,33 +382,14 @@ class AISubtitleGenerator:
         return result
     
     def _merge_short_segments(self, segments: List[SubtitleSegment]) -> List[SubtitleSegment]:
-        """合并短字幕段落"""
+        """合并短字幕段落：当前段落很短、与下一个段落间隔小于1秒且合并后不超长时合并（见SegmentTable.merge_short）"""
         if len(segments) <= 1:
             return segments
         
-        merged = []
-        current = segments[0]
-        
-        for next_segment in segments[1:]:
-            # 如果当前段落很短且与下一个段落时间接近，则合并
-            if (current.duration() < app_config.MIN_SUBTITLE_DURATION * 2 and
-                next_segment.start_time - current.end_time < 1.0 and  # 间隔小于1秒
-                len(current.text) + len(next_segment.text) < app_config.MAX_SUBTITLE_LENGTH):
-                
-                # 合并段落
-                current = SubtitleSegment(
-                    start_time=current.start_time,
-                    end_time=next_segment.end_time,
-                    text=f"{current.text} {next_segment.text}",
-                    confidence=(current.confidence + next_segment.confidence) / 2,
-                    language=current.language
-                )
-            else:
-                merged.append(current)
-                current = next_segment
-        
-        merged.append(current)
-        return merged
+        merged = as_table(segments).merge_short(
+            app_config.MIN_SUBTITLE_DURATION * 2, app_config.MAX_SUBTITLE_LENGTH, max_gap=1.0
+        )
+        return merged if isinstance(segments, SegmentTable) else merged.to_segments()
     
     def _detect_language_from_segments(self, segments: List[SubtitleSegment]) -> str:
         """从字幕段落检测语言"""
@@ -453,6 +432,9 @@ class AISubtitleGenerator:
         try:
             translated_segments = []
             
+            if isinstance(segments, SegmentTable):
+                return await self._translate_table(segments, target_language)
+            
             # 批量翻译以提高效率
             batch_size = 10
             for i in range(0, len(segments), batch_size):
@@ -460,8 +442,8 @@ class AISubtitleGenerator:
                 texts = [seg.text for seg in batch]
                 
                 # 执行翻译
-                translations = await asyncio.get_event_loop().run_in_executor(
-                    None, self._translate_batch, texts, target_language
+                translations = await run_in_executor(
+                    'translation', self._translate_batch, texts, target_language
                 )
                 
                 # 创建翻译后的段落
@@ -484,6 +466,25 @@ class AISubtitleGenerator:
             self.logger.error(f"Translation failed: {str(e)}")
             return segments  # 返回原文
     
+    async def _translate_table(self, table: SegmentTable, target_language: str) -> SegmentTable:
+        """翻译列式片段表：只替换文本列，时间列与原表共享"""
+        translated_texts, kept = [], []
+        batch_size = 10
+        for i in range(0, len(table), batch_size):
+            texts = table.texts[i:i + batch_size]
+            translations = await run_in_executor(
+                'translation', self._translate_batch, texts, target_language
+            )
+            translations = translations[:len(texts)]
+            translated_texts.extend(translations)
+            kept.extend(range(i, i + len(translations)))
+        
+        if len(kept) < len(table):
+            table = table.take(kept)
+        self.logger.info(f"Translated {len(translated_texts)} segments to {target_language}")
+        # 翻译会降低一些置信度
+        return table.with_texts(translated_texts, language=target_language, confidence_scale=0.9)
+    
     def _translate_batch(self, texts: List[str], target_language: str) -> List[str]:
         """批量翻译文本"""
         try:
@@ -0,0 +1,205 @@
+"""
+按平台熔断
+统计每个平台最近一段请求的失败率，超过阈值后熔断：熔断期间的请求直接失败（或等待恢复），
+到期后放行少量探测请求（半开），探测成功则恢复，失败则加倍熔断时间。
+只有平台级故障（429/5xx、网络错误、超时、反爬拦截）计入失败，视频不存在等单个视频的错误不计入
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+import aiohttp
+
+from .config import app_config
+from .platform_router import platform_router
+from .rate_limiter import status_from_error, is_congestion_status
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# yt-dlp等异常信息中表示平台不可用（而非单个视频问题）的片段
+PLATFORM_FAILURE_PATTERNS = (
+    'timed out',
+    'unable to download webpage',
+    'connection reset',
+    'connection refused',
+    'temporary failure in name resolution',
+    'remote end closed connection',
+    'sign in to confirm',
+)
+
+# 半开状态探测名额已满时，等待模式下重新检查状态的间隔(秒)
+HALF_OPEN_POLL_INTERVAL = 1.0
+
+def is_platform_failure(error: BaseException) -> bool:
+    """异常是否说明平台不可用或在拦截我们"""
+    status = status_from_error(error)
+    if status is not None:
+        return is_congestion_status(status)
+    if isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError, ConnectionError, TimeoutError)):
+        return True
+    message = str(error).lower()
+    return any(pattern in message for pattern in PLATFORM_FAILURE_PATTERNS)
+
+class CircuitOpenError(Exception):
+    """平台熔断中，请求未执行"""
+    
+    def __init__(self, key: str, retry_in: float):
+        self.key = key
+        self.retry_in = retry_in
+        super().__init__(f"{key}暂时不可用（已熔断，{retry_in:.0f}秒后重试）")
+
+class CircuitBreaker:
+    """单个平台的熔断器"""
+    
+    def __init__(self, key: str):
+        self.key = key
+        self.state = CLOSED
+        self._window = deque(maxlen=app_config.CIRCUIT_BREAKER_WINDOW)
+        self._open_duration = app_config.CIRCUIT_BREAKER_OPEN_SECONDS
+        self._open_until = 0.0
+        self._probes = 0
+        
+        # 统计信息
+        self.stats = {
+            'successes': 0,
+            'failures': 0,
+            'opened': 0,
+            'rejected': 0,
+            'deferred': 0,
+        }
+    
+    @property
+    def failure_rate(self) -> float:
+        return self._window.count(False) / len(self._window) if self._window else 0.0
+    
+    async def admit(self) -> bool:
+        """请求执行前调用：熔断时失败或等待，返回本次请求是否为半开探测"""
+        deferred_for = 0.0
+        while True:
+            now = time.monotonic()
+            if self.state == CLOSED:
+                return False
+            
+            if self.state == OPEN and now >= self._open_until:
+                self.state = HALF_OPEN
+                self._probes = 0
+                logger.info(f"Circuit for {self.key} half-open, probing")
+            
+            if self.state == HALF_OPEN:
+                if self._probes < app_config.CIRCUIT_BREAKER_HALF_OPEN_PROBES:
+                    self._probes += 1
+                    return True
+                wait = HALF_OPEN_POLL_INTERVAL
+            else:
+                wait = self._open_until - now
+            
+            # 等待模式下推迟到可以探测时再执行，超过最长等待时间则失败
+            if app_config.CIRCUIT_BREAKER_MODE != 'defer' or deferred_for + wait > app_config.CIRCUIT_BREAKER_MAX_DEFER:
+                self.stats['rejected'] += 1
+                raise CircuitOpenError(self.key, max(wait, 0.0))
+            if not deferred_for:
+                self.stats['deferred'] += 1
+            deferred_for += wait
+            await asyncio.sleep(wait)
+    
+    def record(self, success: bool, probe: bool = False):
+        """记录请求结果并更新状态"""
+        self.stats['successes' if success else 'failures'] += 1
+        
+        if self.state == CLOSED:
+            self._window.append(success)
+            if (len(self._window) >= app_config.CIRCUIT_BREAKER_MIN_CALLS
+                    and self.failure_rate >= app_config.CIRCUIT_BREAKER_FAILURE_RATE):
+                self._open()
+        elif self.state == HALF_OPEN and probe:
+            self._probes = max(0, self._probes - 1)
+            if success:
+                self.state = CLOSED
+                self._window.clear()
+                self._open_duration = app_config.CIRCUIT_BREAKER_OPEN_SECONDS
+                logger.info(f"Circuit for {self.key} closed")
+            else:
+                self._open_duration = min(self._open_duration * 2, app_config.CIRCUIT_BREAKER_MAX_OPEN_SECONDS)
+                self._open()
+        # 熔断前已发出、熔断后才返回的请求不影响状态
+    
+    def release_probe(self):
+        """探测请求被取消时归还名额"""
+        if self.state == HALF_OPEN:
+            self._probes = max(0, self._probes - 1)
+    
+    def _open(self):
+        self.state = OPEN
+        self._open_until = time.monotonic() + self._open_duration
+        self.stats['opened'] += 1
+        logger.warning(
+            f"Circuit for {self.key} opened for {self._open_duration:.0f}s "
+            f"(failure rate {self.failure_rate:.0%} over {len(self._window)} requests)"
+        )
+    
+    def get_stats(self) -> Dict:
+        """获取熔断器状态和统计信息"""
+        stats = self.stats.copy()
+        stats.update({
+            'state': self.state,
+            'failure_rate': round(self.failure_rate, 3),
+            'window': len(self._window),
+            'open_remaining': max(0.0, self._open_until - time.monotonic()) if self.state == OPEN else 0.0,
+        })
+        return stats
+
+class CircuitBreakerRegistry:
+    """各平台熔断器（未登记的站点按主机名区分）"""
+    
+    def __init__(self, enabled: bool = None):
+        self.enabled = app_config.CIRCUIT_BREAKER_ENABLED if enabled is None else enabled
+        self._breakers: Dict[str, CircuitBreaker] = {}
+    
+    def get_breaker(self, url: str) -> Optional[CircuitBreaker]:
+        """获取URL所属平台的熔断器"""
+        if not self.enabled:
+            return None
+        key = platform_router.route_key(url)
+        if key is None:
+            return None
+        
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(key)
+        return breaker
+    
+    @asynccontextmanager
+    async def guard(self, url: str):
+        """在熔断器保护下执行一次平台请求"""
+        breaker = self.get_breaker(url)
+        if breaker is None:
+            yield
+            return
+        
+        probe = await breaker.admit()
+        try:
+            yield
+        except asyncio.CancelledError:
+            if probe:
+                breaker.release_probe()
+            raise
+        except Exception as e:
+            breaker.record(not is_platform_failure(e), probe)
+            raise
+        else:
+            breaker.record(True, probe)
+    
+    def get_stats(self) -> Dict[str, Dict]:
+        """获取各平台熔断器状态"""
+        return {key: breaker.get_stats() for key, breaker in self._breakers.items()}
+
+# 全局熔断器
+circuit_breakers = CircuitBreakerRegistry()
@@ -117,6 +117,12 @@ def create_parser() -> argparse.ArgumentParser:
         help='文件名模板（默认: {title}_{language}.{format}）'
     )
     
+    # 多P选项
+    parser.add_argument(
+        '--pages',
+        help='B站多P视频的分P选择，如 all、3、1-3,5（文件名自动追加_p{page}，模板也可使用{page}、{page_title}）'
+    )
+    
     # 质量选项
     parser.add_argument(
         '--quality',
@@ -133,6 +139,13 @@ def create_parser() -> argparse.ArgumentParser:
         help='最大并发下载数（默认: 3）'
     )
     
+    # 缓存选项
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='跳过元数据缓存，强制重新提取视频信息'
+    )
+    
     # 信息选项
     parser.add_argument(
         '--info-only',
@@ -195,7 +208,9 @@ async def download_single(downloader: UniversalSubtitleDownloader, args) -> bool
             filename_template=args.filename_template,
             quality_filter=args.quality,
             enable_translation=args.translate,
-            translation_target=args.translate_to
+            translation_target=args.translate_to,
+            bypass_cache=args.no_cache,
+            pages=args.pages
         )
         
         # 执行下载
@@ -260,7 +275,9 @@ async def download_batch(downloader: UniversalSubtitleDownloader, args) -> bool:
                 filename_template=args.filename_template,
                 quality_filter=args.quality,
                 enable_translation=args.translate,
-                translation_target=args.translate_to
+                translation_target=args.translate_to,
+                bypass_cache=args.no_cache,
+                pages=args.pages
             )
             requests.append(request)
         
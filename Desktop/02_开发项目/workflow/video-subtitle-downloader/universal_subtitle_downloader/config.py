@@ -124,7 +124,7 @@ class SubtitleConfig:
         },
         'bilibili': {
             'name': '哔哩哔哩',
-            'domains': ['bilibili.com', 'b23.tv'],
+            'domains': ['bilibili.com', 'b23.tv', 'bilibili.tv'],
             'subtitle_formats': ['srt', 'ass'],
             'auto_captions': True,
             'manual_captions': True,
@@ -186,6 +186,30 @@ class SubtitleConfig:
             'manual_captions': False,
             'live_captions': True,
         },
+        'streamable': {
+            'name': 'Streamable',
+            'domains': ['streamable.com'],
+            'subtitle_formats': ['vtt'],
+            'auto_captions': False,
+            'manual_captions': False,
+            'live_captions': False,
+        },
+        'reddit': {
+            'name': 'Reddit',
+            'domains': ['reddit.com', 'redd.it'],
+            'subtitle_formats': ['vtt'],
+            'auto_captions': False,
+            'manual_captions': False,
+            'live_captions': False,
+        },
+        'imgur': {
+            'name': 'Imgur',
+            'domains': ['imgur.com'],
+            'subtitle_formats': ['vtt'],
+            'auto_captions': False,
+            'manual_captions': False,
+            'live_captions': False,
+        },
         'generic': {
             'name': '通用平台',
             'domains': ['*'],
@@ -216,15 +240,114 @@ class AppConfig:
     REQUEST_TIMEOUT = 30
     MAX_RETRIES = 3
     RETRY_DELAY = 2
+    GEO_BYPASS_COUNTRY = "US"  # yt-dlp伪造X-Forwarded-For使用的国家代码（只能是一个两位代码）
+    
+    # 重试策略：按错误类型决定是否重试（永久错误不重试，地区限制只在有代理时重试），退避时间带随机抖动
+    RETRY_MAX_DELAY = 30               # 单次退避上限(秒)
+    RETRY_RATE_LIMIT_DELAY = 5         # 被限流(429)时的退避基数(秒)，有Retry-After时以其为准
+    RETRY_GEO_ATTEMPTS = 1             # 地区限制时换代理重试的次数
+    RETRY_BUDGET_RATIO = 0.2           # 批量任务的重试预算（占请求数的比例）
+    RETRY_BUDGET_MIN = 5               # 批量任务的最小重试预算
     CHUNK_SIZE = 8192
     
+    # HTTP连接池配置（下载器内共享一个会话）
+    HTTP_POOL_LIMIT = 100           # 总连接数
+    HTTP_POOL_LIMIT_PER_HOST = 10   # 每个主机的连接数
+    HTTP_KEEPALIVE_TIMEOUT = 30     # 空闲连接保持时间(秒)
+    HTTP_DNS_CACHE_TTL = 300        # DNS缓存时间(秒)
+    
+    # 按主机自适应限流（令牌桶 + AIMD并发控制），初始值按平台设置，运行中根据429/5xx和延迟调整
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMITS = {
+        'youtube': {'rate': 5.0, 'max_rate': 20.0, 'concurrency': 4, 'max_concurrency': 16},
+        'bilibili': {'rate': 4.0, 'max_rate': 16.0, 'concurrency': 4, 'max_concurrency': 12},
+        'default': {'rate': 8.0, 'max_rate': 32.0, 'concurrency': 4, 'max_concurrency': 16},
+    }
+    RATE_LIMIT_MIN_RATE = 0.2             # 速率下限(请求/秒)
+    RATE_LIMIT_RATE_STEP = 1.0            # 加性增步长（约每轮请求增加的请求/秒）
+    RATE_LIMIT_DECREASE_FACTOR = 0.5      # 过载时速率和并发的乘性减系数
+    RATE_LIMIT_DECREASE_COOLDOWN = 2.0    # 两次减速的最小间隔(秒)
+    RATE_LIMIT_LATENCY_FACTOR = 3.0       # 延迟超过基线的倍数视为拥塞
+    RATE_LIMIT_MIN_SLOW_LATENCY = 2.0     # 视为拥塞的最低延迟(秒)
+    RATE_LIMIT_MAX_WAIT = 60.0            # 请求排队等待限流名额的最长时间(秒)，超时按请求超时失败
+    
+    # 按平台熔断：最近请求的平台级失败率超过阈值后暂停该平台的请求，到期后放行探测请求
+    CIRCUIT_BREAKER_ENABLED = True
+    CIRCUIT_BREAKER_WINDOW = 20              # 统计失败率的最近请求数
+    CIRCUIT_BREAKER_MIN_CALLS = 5            # 至少多少次请求后才判断
+    CIRCUIT_BREAKER_FAILURE_RATE = 0.5       # 熔断的失败率阈值
+    CIRCUIT_BREAKER_OPEN_SECONDS = 30        # 熔断时间(秒)，探测失败后加倍
+    CIRCUIT_BREAKER_MAX_OPEN_SECONDS = 600   # 最长熔断时间(秒)
+    CIRCUIT_BREAKER_HALF_OPEN_PROBES = 1     # 半开状态同时放行的探测请求数
+    CIRCUIT_BREAKER_MODE = "fail"            # "fail"：熔断期间直接失败；"defer"：等待恢复后再执行
+    CIRCUIT_BREAKER_MAX_DEFER = 120          # defer模式下最长等待时间(秒)，超过则失败
+    
     # 并发配置
     MAX_CONCURRENT_DOWNLOADS = 5
     MAX_CONCURRENT_AI_TASKS = 2
+    BILIBILI_PAGE_CONCURRENCY = 4  # 多P视频同时提取的分P数
+    SUBTITLE_TRACK_CONCURRENCY = 4  # 单个视频同时下载的字幕轨道数
+    SEARCH_PROBE_CONCURRENCY = 6   # 搜索结果同时探测字幕的视频数
+    SEARCH_CANDIDATE_FACTOR = 3    # 搜索候选数 = max_results × 该系数（探测到足够结果即停止）
+    
+    # 线程池配置（各类阻塞任务使用独立线程池，互不抢占）
+    EXECUTOR_WORKERS = {
+        'extraction': 8,    # yt-dlp元数据提取
+        'ai': 2,            # Whisper转录、语音识别、音频下载
+        'translation': 4,   # 翻译
+        'file_io': 4,       # 字幕文件读写
+        'process': 2,       # 提取工作进程的启动与回收
+        'default': 4,
+    }
+    
+    # YoutubeDL实例池（按配置和代理复用实例）
+    YDL_POOL_MAX_IDLE = 4   # 每种配置保留的空闲实例数
+    YDL_POOL_MAX_KEYS = 16  # 最多缓存的配置种类
+    
+    # YouTube只需字幕时直接解析观看页的字幕轨道列表并请求timedtext，失败时回退到yt-dlp
+    YOUTUBE_TIMEDTEXT_FAST_PATH = True
+    
+    # 通用提取器字幕格式对冲：首选格式在延迟内无响应时并发请求下一个格式，取最先成功的结果
+    SUBTITLE_HEDGE_ENABLED = True
+    SUBTITLE_HEDGE_DELAY = 2.0   # 启动下一个候选格式前的等待时间(秒)
+    SUBTITLE_HEDGE_MAX_FORMATS = 3  # 每种语言最多尝试的格式数
+    SUBTITLE_FORMAT_SCORE_DECAY = 0.8  # 格式得分每次提取的衰减系数（越小越快适应平台的格式变化）
+    
+    # 直播字幕跟随：轮询间隔在区间内自适应，长时间无新字幕视为直播结束
+    LIVE_CAPTION_MIN_INTERVAL = 2.0    # 最短轮询间隔(秒)
+    LIVE_CAPTION_MAX_INTERVAL = 15.0   # 最长轮询间隔(秒)
+    LIVE_CAPTION_IDLE_TIMEOUT = 300    # 无新字幕多久后停止(秒)
+    LIVE_CAPTION_DEDUPE_WINDOW = 8     # 滚动字幕去重时比对的最近行数
+    
+    # yt-dlp URL索引：离线判断URL是否受支持，按yt-dlp版本持久化到缓存目录
+    URL_INDEX_PERSIST = True
+    URL_INDEX_FILE = CACHE_DIR / "ydl_url_index.json"
+    
+    # 提取后端："thread"（线程池）或 "process"（独立进程，支持强制超时）
+    EXTRACTION_BACKEND = "thread"
+    EXTRACTION_PROCESS_WORKERS = 4
+    EXTRACTION_TIMEOUT = 90  # 单次提取超时(秒)，仅process后端可强制中断
+    EXTRACTION_WORKER_MAX_TASKS = 200  # 工作进程处理多少次提取后重建
+    
+    # 元数据缓存配置（新鲜度，单位秒）
+    METADATA_CACHE_ENABLED = True
+    METADATA_CACHE_TTL = {
+        'youtube': 6 * 3600,
+        'bilibili': 24 * 3600,
+        'default': 12 * 3600,
+    }
+    CAPTION_URL_EXPIRY_MARGIN = 300  # 字幕签名URL提前视为过期的时间(秒)
     
     # 代理配置
     PROXY_TIMEOUT = 10
     PROXY_CHECK_URL = "https://httpbin.org/ip"
+    PROXY_CHECK_INTERVAL = 60           # 后台检测代理的间隔(秒)
+    PROXY_SCORE_ALPHA = 0.2             # 成功率和延迟滑动平均的权重
+    PROXY_MIN_SAMPLES = 3               # 平台样本少于该数时参考代理整体统计
+    PROXY_DEFAULT_LATENCY = 1.0         # 没有延迟数据时假设的延迟(秒)
+    PROXY_QUARANTINE_FAILURES = 3       # 连续失败多少次后隔离
+    PROXY_QUARANTINE_SECONDS = 60       # 隔离时间(秒)，重复隔离时加倍
+    PROXY_MAX_QUARANTINE_SECONDS = 1800 # 最长隔离时间(秒)
     
     # AI配置
     DEFAULT_WHISPER_MODEL = "base"
@@ -234,6 +357,8 @@ class AppConfig:
     SUBTITLE_QUALITY_THRESHOLD = 0.8  # 字幕质量阈值
     MAX_SUBTITLE_LENGTH = 100  # 每行最大字符数
     MIN_SUBTITLE_DURATION = 0.5  # 最小字幕显示时间(秒)
+    COLUMNAR_SEGMENTS = False  # 解析出的字幕使用列式SegmentTable保存（长字幕内存占用更低，见segment_table）
+    TIMESTAMP_BATCH_SIZE = 4096  # 生成SRT/VTT/ASS时每批格式化的时间戳数（见timestamp_format）
     
     # 翻译配置
     ENABLE_TRANSLATION = True
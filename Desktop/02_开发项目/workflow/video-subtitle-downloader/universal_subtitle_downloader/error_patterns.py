@@ -0,0 +1,73 @@
+"""
+错误分类规则
+按HTTP状态码和异常信息判断错误类型。只依赖标准库、不导入包内其他模块，
+retry_policy和backend/enhanced_downloader.py共用这一份规则（后端不执行包的__init__直接导入本模块）
+"""
+
+import re
+from typing import Optional
+
+# 错误类型
+TRANSIENT = 'transient'      # 网络抖动、超时、5xx：退避后重试
+RATE_LIMIT = 'rate_limit'    # 被限流：较长退避后重试
+PERMANENT = 'permanent'      # 视频本身的问题：不重试
+GEO = 'geo'                  # 地区限制：只有换代理才可能成功
+ERROR_CATEGORIES = (TRANSIENT, RATE_LIMIT, PERMANENT, GEO)
+
+# 从yt-dlp（"HTTP Error 429"）和提取器自身（"HTTP 429: ..."）的异常信息中识别HTTP状态码，
+# 不匹配视频ID等处偶然出现的数字
+HTTP_ERROR_RE = re.compile(r'HTTP(?: Error)? (\d{3})\b')
+
+# 可重试的4xx状态码（其余4xx视为永久错误）
+RETRYABLE_STATUSES = (408, 425, 429)
+
+# 异常信息片段（小写），按限流、地区限制、永久错误的顺序匹配
+RATE_LIMIT_PATTERNS = (
+    'too many requests',
+    'rate limit',
+    'try again later',
+    'not a bot',
+)
+
+GEO_PATTERNS = (
+    'not available in your country',
+    'not available in your region',
+    'not available from your location',
+    'blocked it in your country',
+    'geo restrict',
+    'geo-restrict',
+    '所在地区',
+)
+
+PERMANENT_PATTERNS = (
+    'private video',
+    'video unavailable',
+    'this video is unavailable',
+    'has been removed',
+    'has been terminated',
+    'does not exist',
+    'unsupported url',
+    'members-only',
+    'confirm your age',
+    'copyright',
+    '视频不存在',
+    '稿件不可见',
+)
+
+def status_from_message(message: str) -> Optional[int]:
+    """从异常信息中取出HTTP状态码"""
+    match = HTTP_ERROR_RE.search(message)
+    return int(match.group(1)) if match else None
+
+def classify_message(message: str, status: Optional[int] = None) -> Optional[str]:
+    """按状态码和异常信息判断错误类型，无法判断时返回None（由调用方按异常类型继续判断）"""
+    message = message.lower()
+    if status == 429 or any(pattern in message for pattern in RATE_LIMIT_PATTERNS):
+        return RATE_LIMIT
+    if any(pattern in message for pattern in GEO_PATTERNS):
+        return GEO
+    if any(pattern in message for pattern in PERMANENT_PATTERNS):
+        return PERMANENT
+    if status is not None:
+        return TRANSIENT if status in RETRYABLE_STATUSES or status >= 500 else PERMANENT
+    return None
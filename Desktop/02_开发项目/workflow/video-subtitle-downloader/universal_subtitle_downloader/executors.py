@@ -0,0 +1,134 @@
+"""
+命名线程池
+将yt-dlp提取、AI转录、翻译和文件读写分配到独立且有界的线程池，避免长任务互相抢占
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from .config import app_config
+
+logger = logging.getLogger(__name__)
+
+class NamedExecutor:
+    """带排队/运行统计的有界线程池"""
+    
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max(1, int(max_workers))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=f"usd-{name}"
+        )
+        self._lock = threading.Lock()
+        
+        # 统计信息
+        self._queued = 0
+        self._active = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_run = 0.0
+    
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """在线程池中执行同步函数并等待结果"""
+        submitted_at = time.monotonic()
+        state = {'started': False}
+        with self._lock:
+            self._queued += 1
+            self._submitted += 1
+        
+        def _call():
+            started_at = time.monotonic()
+            wait = started_at - submitted_at
+            with self._lock:
+                if not state['started']:
+                    state['started'] = True
+                    self._queued -= 1
+                self._active += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+            
+            failed = False
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+                    self._failed += int(failed)
+                    self._total_run += time.monotonic() - started_at
+        
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, _call)
+        except asyncio.CancelledError:
+            # 尚未开始执行的任务取消后不会再运行，需修正排队计数
+            with self._lock:
+                if not state['started']:
+                    state['started'] = True
+                    self._queued -= 1
+            raise
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取线程池统计信息"""
+        with self._lock:
+            started = self._completed + self._active
+            return {
+                'max_workers': self.max_workers,
+                'queue_depth': self._queued,
+                'active_workers': self._active,
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'failed': self._failed,
+                'avg_wait_time': self._total_wait / started if started else 0.0,
+                'max_wait_time': self._max_wait,
+                'avg_run_time': self._total_run / self._completed if self._completed else 0.0,
+            }
+    
+    def shutdown(self, wait: bool = True):
+        """关闭线程池"""
+        self._executor.shutdown(wait=wait)
+
+_executors: Dict[str, NamedExecutor] = {}
+_executors_lock = threading.Lock()
+
+def get_executor(name: str) -> NamedExecutor:
+    """获取命名线程池（首次使用时按AppConfig.EXECUTOR_WORKERS创建）"""
+    executor = _executors.get(name)
+    if executor is not None:
+        return executor
+    
+    with _executors_lock:
+        if name not in _executors:
+            workers = app_config.EXECUTOR_WORKERS.get(name, app_config.EXECUTOR_WORKERS.get('default', 4))
+            _executors[name] = NamedExecutor(name, workers)
+            logger.debug(f"Created executor '{name}' with {workers} workers")
+        return _executors[name]
+
+async def run_in_executor(name: str, func: Callable, *args, **kwargs) -> Any:
+    """在指定的命名线程池中执行同步函数"""
+    return await get_executor(name).run(func, *args, **kwargs)
+
+def get_executor_stats() -> Dict[str, Dict[str, Any]]:
+    """获取所有已创建线程池的统计信息"""
+    with _executors_lock:
+        executors = list(_executors.values())
+    return {executor.name: executor.get_stats() for executor in executors}
+
+def shutdown_executors(wait: bool = True):
+    """关闭所有命名线程池"""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
@@ -0,0 +1,245 @@
+"""
+多进程yt-dlp提取池
+在独立的工作进程中运行yt-dlp提取，绕开GIL并支持真正的超时：超时的进程会被强制结束并重新创建
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from yt_dlp.utils import DownloadError, ExtractorError, GeoRestrictedError, UnsupportedError
+
+from .config import app_config
+from .executors import run_in_executor
+from .metadata_cache import trim_info
+
+logger = logging.getLogger(__name__)
+
+# 工作进程启动（导入yt-dlp）的最长等待时间(秒)
+WORKER_START_TIMEOUT = 60
+
+class ExtractionTimeoutError(TimeoutError):
+    """提取超时（属于TimeoutError，熔断器、代理评分和重试策略按超时处理）"""
+    pass
+
+class ExtractionWorkerError(ConnectionError):
+    """工作进程异常退出（属于ConnectionError，按平台级故障处理）"""
+    pass
+
+# 工作进程中的异常在主进程中按这些类型重建，使进程后端与线程后端抛出相同类型的异常（错误处理按类型判断）
+REBUILT_ERROR_TYPES = {cls.__name__: cls for cls in (
+    GeoRestrictedError, UnsupportedError, ExtractorError, ValueError, TypeError, KeyError, AttributeError,
+)}
+
+def _describe_error(error: Exception) -> Tuple[str, str, List[str], bool, bool]:
+    """把异常转为可跨进程传递的(信息, 原始异常信息, 原始异常类名及父类名, expected, 是否由DownloadError包装)"""
+    wrapped = isinstance(error, DownloadError) and bool(error.exc_info) and error.exc_info[1] is not None
+    root = error.exc_info[1] if wrapped else error
+    return (str(error), str(root), [cls.__name__ for cls in type(root).__mro__],
+            bool(getattr(root, 'expected', False)), wrapped)
+
+def _rebuild_error(message: str, root_message: str, class_names: List[str], expected: bool,
+                   wrapped: bool) -> Exception:
+    """在主进程中重建与线程后端相同类型的异常（未知类型使用Exception）"""
+    cls = next((REBUILT_ERROR_TYPES[name] for name in class_names if name in REBUILT_ERROR_TYPES), None)
+    if cls is None:
+        return Exception(message)
+    
+    if issubclass(cls, ExtractorError):
+        # 各子类构造参数不同，统一按ExtractorError初始化；信息已是完整文本，expected=True避免再追加问题报告提示
+        root = cls.__new__(cls)
+        ExtractorError.__init__(root, root_message, expected=True)
+        # ExtractorError设置属性时会重新拼接信息，绕过它只恢复expected
+        object.__setattr__(root, 'expected', expected)
+    else:
+        root = cls(root_message)
+    return DownloadError(message, (cls, root, None)) if wrapped else root
+
+def _worker_main(conn):
+    """工作进程主循环：接收(URL, yt-dlp配置)，返回精简后的信息字典"""
+    from .ydl_pool import ydl_pool
+    
+    # 通知主进程已完成导入，超时计时从此之后开始
+    conn.send(('ready', None))
+    
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        
+        url, ydl_opts = message
+        try:
+            info = ydl_pool.extract_info(ydl_opts, url)
+            conn.send(('ok', trim_info(info)))
+        except Exception as e:
+            conn.send(('error', _describe_error(e)))
+
+class _ExtractionWorker:
+    """单个提取工作进程"""
+    
+    def __init__(self, mp_context, target: Callable = _worker_main):
+        self.conn, child_conn = mp_context.Pipe()
+        self.process = mp_context.Process(
+            target=target,
+            args=(child_conn,),
+            name="usd-extraction-worker",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.tasks_done = 0
+    
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+    
+    def stop(self, timeout: float = 2.0):
+        """通知进程退出，未按时退出则强制结束"""
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+    
+    def kill(self):
+        """强制结束进程"""
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+class ProcessExtractionPool:
+    """yt-dlp提取进程池（带单次调用超时、卡死进程回收与重建）
+    
+    进程的启动、结束和等待退出都会阻塞，放在process线程池中执行，不占用事件循环
+    """
+    
+    def __init__(self, max_workers: int = None, timeout: float = None, max_tasks_per_worker: int = None,
+                 worker_target: Optional[Callable] = None):
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.max_workers = max_workers or app_config.EXTRACTION_PROCESS_WORKERS
+        self.timeout = timeout or app_config.EXTRACTION_TIMEOUT
+        self.max_tasks_per_worker = max_tasks_per_worker or app_config.EXTRACTION_WORKER_MAX_TASKS
+        
+        # spawn方式启动，避免fork时复制事件循环和线程状态
+        self._mp_context = multiprocessing.get_context('spawn')
+        self._worker_target = worker_target or _worker_main
+        self._semaphore = asyncio.Semaphore(self.max_workers)
+        self._idle: List[_ExtractionWorker] = []
+        self._background: Set[asyncio.Task] = set()
+        self._closed = False
+        
+        # 统计信息
+        self.stats = {
+            'calls': 0,
+            'errors': 0,
+            'timeouts': 0,
+            'crashes': 0,
+            'spawned': 0,
+            'recycled': 0,
+        }
+    
+    async def _spawn_worker(self) -> _ExtractionWorker:
+        """创建新的工作进程"""
+        self.stats['spawned'] += 1
+        return await run_in_executor('process', _ExtractionWorker, self._mp_context, self._worker_target)
+    
+    async def _checkout(self) -> _ExtractionWorker:
+        """取出一个空闲进程（没有可用进程时新建）"""
+        while self._idle:
+            worker = self._idle.pop()
+            if worker.is_alive():
+                return worker
+            worker.conn.close()
+        return await self._spawn_worker()
+    
+    async def _checkin(self, worker: _ExtractionWorker):
+        """归还进程，达到任务上限时回收以释放内存"""
+        worker.tasks_done += 1
+        if self._closed or worker.tasks_done >= self.max_tasks_per_worker:
+            self.stats['recycled'] += int(not self._closed)
+            await run_in_executor('process', worker.stop)
+        else:
+            self._idle.append(worker)
+    
+    async def _replace(self, worker: _ExtractionWorker):
+        """强制结束异常进程并补充一个新进程"""
+        await run_in_executor('process', worker.kill)
+        if not self._closed:
+            self._idle.append(await self._spawn_worker())
+    
+    def _replace_in_background(self, worker: _ExtractionWorker):
+        """调用被取消时在后台替换进程，不延迟取消"""
+        task = asyncio.ensure_future(self._replace(worker))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+    
+    async def _wait_ready(self, worker: _ExtractionWorker):
+        """等待新进程完成启动"""
+        started = await run_in_executor('extraction', worker.conn.poll, WORKER_START_TIMEOUT)
+        if not started:
+            raise OSError(f"工作进程启动超时({WORKER_START_TIMEOUT}秒)")
+        worker.conn.recv()
+        worker.ready = True
+    
+    async def extract_info(self, url: str, ydl_opts: Dict, timeout: Optional[float] = None) -> Dict:
+        """在工作进程中提取视频信息（返回精简后的信息字典）"""
+        if self._closed:
+            raise RuntimeError("提取进程池已关闭")
+        
+        timeout = timeout or self.timeout
+        async with self._semaphore:
+            self.stats['calls'] += 1
+            worker = await self._checkout()
+            
+            try:
+                if not worker.ready:
+                    await self._wait_ready(worker)
+                
+                worker.conn.send((url, ydl_opts))
+                # 在线程中等待结果，进程被结束时poll会立即返回
+                ready = await run_in_executor('extraction', worker.conn.poll, timeout)
+                if ready:
+                    status, payload = worker.conn.recv()
+            except (EOFError, OSError) as e:
+                self.stats['crashes'] += 1
+                self.logger.warning(f"Extraction worker died, respawning: {str(e)}")
+                await self._replace(worker)
+                raise ExtractionWorkerError(f"提取进程异常退出: {str(e)}") from e
+            except asyncio.CancelledError:
+                # 无法确定进程状态，直接结束
+                self._replace_in_background(worker)
+                raise
+            
+            # 超时在try之外抛出：ExtractionTimeoutError属于OSError，不能被上面的进程退出处理捕获
+            if not ready:
+                self.stats['timeouts'] += 1
+                self.logger.warning(f"Extraction worker timed out after {timeout}s, respawning: {url}")
+                await self._replace(worker)
+                raise ExtractionTimeoutError(f"提取超时({timeout}秒): {url}")
+            
+            await self._checkin(worker)
+        
+        if status != 'ok':
+            self.stats['errors'] += 1
+            raise _rebuild_error(*payload)
+        return payload
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取进程池统计信息"""
+        stats = self.stats.copy()
+        stats['max_workers'] = self.max_workers
+        stats['idle_workers'] = len(self._idle)
+        return stats
+    
+    def close(self):
+        """关闭所有工作进程"""
+        self._closed = True
+        while self._idle:
+            self._idle.pop().stop()
@@ -3,24 +3,36 @@
 为所有平台提供统一的字幕提取接口
 """
 
-import re
-import json
+import sys
 import logging
 import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Tuple, Any, Union
-from dataclasses import dataclass, asdict
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Any, Union
+from dataclasses import dataclass, asdict, field, replace
 from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
 from urllib.parse import urlparse, parse_qs
+from pathlib import Path
 import aiohttp
 import yt_dlp
 from ..config import subtitle_config, app_config, USER_AGENTS
+from ..metadata_cache import trim_info, caption_urls_expired
+from ..executors import run_in_executor
+from ..ydl_pool import ydl_pool
+from ..rate_limiter import rate_limiter
+from ..circuit_breaker import circuit_breakers
+from ..retry_policy import retry_engine
+from ..subtitle_parser import TAG_RE, WHITESPACE_RE, can_parse, scan_subtitles
+from ..http_session import create_http_session
 import random
 import time
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# 大批量结果常驻内存，数据类在Python 3.10+上使用__slots__
+DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**DATACLASS_SLOTS)
 class SubtitleSegment:
     """字幕片段数据结构"""
     start_time: float  # 开始时间（秒）
@@ -37,7 +49,7 @@ class SubtitleSegment:
         """转换为字典"""
         return asdict(self)
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class SubtitleTrack:
     """字幕轨道数据结构"""
     language: str              # 语言代码
@@ -45,9 +57,11 @@ class SubtitleTrack:
     is_auto_generated: bool    # 是否自动生成
     format: str               # 原始格式
     url: str                  # 下载URL
-    segments: List[SubtitleSegment] = None  # 字幕片段
+    segments: List[SubtitleSegment] = None  # 字幕片段（也可以是列式的SegmentTable，见segment_table）
     quality: str = "unknown"   # 质量等级
     source: str = "unknown"    # 来源
+    page: Optional[int] = None  # 分P序号（仅多P视频）
+    page_title: str = ""       # 分P标题
     
     def to_dict(self) -> Dict:
         """转换为字典"""
@@ -56,7 +70,7 @@ class SubtitleTrack:
             data['segments'] = [seg.to_dict() for seg in self.segments]
         return data
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class VideoInfo:
     """视频信息数据结构"""
     id: str
@@ -71,23 +85,40 @@ class VideoInfo:
     platform: str
     available_subtitles: List[str]
     automatic_captions: List[str]
-    formats_info: Dict
+    formats_info: Optional[Dict] = None  # 格式信息，仅在请求时填充（见include_formats）
     
     def to_dict(self) -> Dict:
         """转换为字典"""
         return asdict(self)
 
+@dataclass
+class ExtractionContext:
+    """提取上下文：一次yt-dlp提取得到的原始信息及派生的视频信息
+    
+    同一请求内的字幕提取、音频下载、字幕列表都复用该对象，避免重复提取
+    """
+    url: str                   # 原始URL
+    info: Dict                 # yt-dlp信息字典
+    video_info: VideoInfo      # 派生的视频信息
+    extra: Dict = field(default_factory=dict)  # 平台特定数据（如B站API详情）
+    from_cache: bool = False   # 是否来自元数据缓存
+    trimmed: bool = False      # info是否为精简版本（缓存或进程池提取）
+
 class BaseSubtitleExtractor(ABC):
     """基础字幕提取器抽象类"""
     
-    def __init__(self, proxy_manager=None, session: aiohttp.ClientSession = None):
+    def __init__(self, proxy_manager=None, session: aiohttp.ClientSession = None, metadata_cache=None,
+                 extraction_pool=None):
         self.proxy_manager = proxy_manager
         self.session = session
+        self.metadata_cache = metadata_cache
+        self.extraction_pool = extraction_pool
+        self.platform_name = "未知平台"
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
         
         # yt-dlp配置
         self.ydl_opts = self._get_base_ydl_opts()
-        
+    
     def _get_base_ydl_opts(self) -> Dict:
         """获取基础yt-dlp配置"""
         opts = {
@@ -116,54 +147,261 @@ class BaseSubtitleExtractor(ABC):
             
             # 绕过地理限制
             'geo_bypass': True,
-            'geo_bypass_country': ['US', 'UK', 'JP', 'SG', 'DE', 'FR'],
+            'geo_bypass_country': app_config.GEO_BYPASS_COUNTRY,
             
             # YouTube特定优化
             'youtube_include_dash_manifest': False,
             'ignoreerrors': False,
         }
         
-        # 添加代理配置
-        if self.proxy_manager and self.proxy_manager.get_current_proxy():
-            proxy = self.proxy_manager.get_current_proxy()
-            opts['proxy'] = proxy
-            self.logger.info(f"Using proxy: {proxy}")
-        
+        # 代理在每次请求时按健康状况选择（见_proxied）
         return opts
     
+    def _get_proxy(self, url: Optional[str] = None, http_only: bool = False) -> Optional[str]:
+        """选择本次请求使用的代理（兼容只提供get_current_proxy()的代理管理器）"""
+        if not self.proxy_manager:
+            return None
+        select_proxy = getattr(self.proxy_manager, 'select_proxy', None)
+        if select_proxy is not None:
+            return select_proxy(url, http_only=http_only)
+        return self.proxy_manager.get_current_proxy()
+    
+    @asynccontextmanager
+    async def _proxied(self, url: str, http_only: bool = False):
+        """选择代理，并在代理管理器支持时记录本次请求的结果和延迟"""
+        proxy = self._get_proxy(url, http_only)
+        track = getattr(self.proxy_manager, 'track', None)
+        if proxy is None or track is None:
+            yield proxy
+            return
+        
+        async with track(proxy, url):
+            yield proxy
+    
     @abstractmethod
     def can_handle(self, url: str) -> bool:
         """检查是否能处理该URL"""
         pass
     
+    def get_cache_key(self, url: str) -> Optional[Tuple[str, str]]:
+        """从URL直接得到(平台, 视频ID)缓存键，无法确定时返回None（不使用缓存）"""
+        return None
+    
+    async def extract_context(self, url: str, use_cache: bool = True,
+                              captions_only: bool = False) -> ExtractionContext:
+        """提取视频元数据，生成可复用的提取上下文（优先读取元数据缓存）
+        
+        captions_only为True时允许平台走只获取字幕列表的快速路径（结果标记为partial）
+        """
+        try:
+            cache_key = self.get_cache_key(url) if self.metadata_cache else None
+            
+            if cache_key and use_cache:
+                cached = await self.metadata_cache.get(*cache_key)
+                # 快速路径的部分信息不能满足需要完整信息的调用
+                if cached and cached.get('extra', {}).get('partial') and not captions_only:
+                    cached = None
+                if cached:
+                    self.logger.info(f"Metadata cache hit: {cache_key[0]}/{cache_key[1]}")
+                    return self._create_context(url, cached['info'], cached.get('extra', {}), from_cache=True)
+            
+            self.logger.info(f"Extracting {self.platform_name} video info from: {url}")
+            # 缓存命中不受熔断影响，只有实际访问平台时才经过熔断器（每次重试都经过）
+            async def fetch():
+                async with circuit_breakers.guard(url):
+                    return await self._fetch_metadata(url, captions_only)
+            
+            info, extra = await self.retry_with_backoff(fetch, stage='metadata')
+            context = self._create_context(url, info, extra)
+            
+            if cache_key:
+                await self.metadata_cache.set(*cache_key, trim_info(info), extra)
+            
+            self.logger.info(f"Extracted {context.video_info.platform} info for: {context.video_info.title}")
+            return context
+        
+        except Exception as e:
+            self.logger.error(f"Failed to extract video info: {str(e)}")
+            raise Exception(f"{self.platform_name}视频信息提取失败: {str(e)}")
+    
+    async def refresh_context(self, context: ExtractionContext) -> ExtractionContext:
+        """跳过缓存重新提取元数据（同时刷新缓存）"""
+        return await self.extract_context(context.url, use_cache=False)
+    
+    async def _ensure_fresh_captions(self, context: ExtractionContext) -> ExtractionContext:
+        """缓存上下文中的字幕URL已过期时才重新提取（惰性校验）"""
+        if context.from_cache and caption_urls_expired(context.info):
+            self.logger.info("Cached caption URLs expired, refreshing metadata")
+            return await self.refresh_context(context)
+        return context
+    
+    def _has_listed_captions(self, info: Dict, languages: List[str]) -> bool:
+        """信息字典中是否列出了请求语言（含基础语言代码）的字幕"""
+        listed = set(info.get('subtitles') or {}) | set(info.get('automatic_captions') or {})
+        listed_bases = {lang.split('-')[0] for lang in listed}
+        return any(lang in listed or lang.split('-')[0] in listed_bases for lang in languages)
+    
+    def _create_context(self, url: str, info: Dict, extra: Dict, from_cache: bool = False) -> ExtractionContext:
+        """根据信息字典创建提取上下文"""
+        return ExtractionContext(
+            url=url,
+            info=info,
+            video_info=self._build_video_info(url, info, extra),
+            extra=extra,
+            from_cache=from_cache,
+            trimmed=from_cache or self.extraction_pool is not None
+        )
+    
+    async def _fetch_metadata(self, url: str, captions_only: bool = False) -> Tuple[Dict, Dict]:
+        """从网络获取元数据，返回(yt-dlp信息, 平台特定数据)"""
+        return await self._extract_info(url), {}
+    
     @abstractmethod
-    async def extract_video_info(self, url: str) -> VideoInfo:
-        """提取视频信息"""
+    def _build_video_info(self, url: str, info: Dict, extra: Dict) -> VideoInfo:
+        """从信息字典构建视频信息"""
         pass
     
+    async def extract_video_info(self, url: str, context: Optional[ExtractionContext] = None,
+                                 include_formats: bool = False) -> VideoInfo:
+        """提取视频信息（include_formats为True时附带格式信息）"""
+        if context is None:
+            context = await self.extract_context(url)
+        if include_formats:
+            # 上下文中的视频信息可能被多个请求共享，返回副本
+            return replace(context.video_info, formats_info=self._extract_formats_info(context.info))
+        return context.video_info
+    
+    def _extract_formats_info(self, info: Dict) -> Dict:
+        """提取格式信息"""
+        formats_info = {
+            'available_formats': [],
+            'best_video': None,
+            'best_audio': None,
+        }
+        
+        formats = info.get('formats') or []
+        
+        for f in formats:
+            format_info = {
+                'format_id': f.get('format_id'),
+                'ext': f.get('ext'),
+                'resolution': f.get('resolution'),
+                'fps': f.get('fps'),
+                'vcodec': f.get('vcodec'),
+                'acodec': f.get('acodec'),
+                'filesize': f.get('filesize'),
+                'quality': f.get('quality'),
+                'url': f.get('url', '').split('?')[0] if f.get('url') else ''  # 移除查询参数
+            }
+            formats_info['available_formats'].append(format_info)
+        
+        # 找出最佳视频和音频格式
+        video_formats = [f for f in formats if f.get('vcodec') != 'none']
+        audio_formats = [f for f in formats if f.get('acodec') != 'none' and f.get('vcodec') == 'none']
+        
+        if video_formats:
+            best_video = max(video_formats, key=lambda x: (x.get('height') or 0, x.get('fps') or 0))
+            formats_info['best_video'] = best_video.get('format_id')
+        
+        if audio_formats:
+            best_audio = max(audio_formats, key=lambda x: x.get('abr') or 0)
+            formats_info['best_audio'] = best_audio.get('format_id')
+        
+        return formats_info
+    
     @abstractmethod
-    async def extract_subtitles(self, url: str, languages: List[str] = None) -> List[SubtitleTrack]:
-        """提取字幕"""
+    async def extract_subtitles(self, url: str, languages: List[str] = None,
+                                context: Optional[ExtractionContext] = None) -> List[SubtitleTrack]:
+        """提取字幕（传入context时不再重新提取元数据）"""
         pass
     
+    async def _extract_info(self, url: str, extra_opts: Optional[Dict] = None, route_url: Optional[str] = None) -> Dict:
+        """运行yt-dlp提取原始视频信息（不下载），与HTTP会话共用按主机限流
+        
+        url不是网址时（如ytsearch搜索）用route_url选择限流器和代理
+        """
+        route_url = route_url or url
+        async with rate_limiter.limit(route_url), self._proxied(route_url) as proxy:
+            opts = {**self.ydl_opts, **extra_opts} if extra_opts else self.ydl_opts
+            if proxy is not None:
+                opts = {**opts, 'proxy': proxy}
+            if self.extraction_pool is not None:
+                return await self.extraction_pool.extract_info(url, opts)
+            
+            return await run_in_executor('extraction', ydl_pool.extract_info, opts, url)
+    
+    async def download_audio(self, context: ExtractionContext, output_path: str) -> Optional[str]:
+        """基于已提取的上下文下载音频（用于AI转录），无需再次提取元数据"""
+        opts = self.ydl_opts.copy()
+        opts.update({
+            'skip_download': False,
+            'format': 'bestaudio/best',
+            'outtmpl': str(Path(output_path).with_suffix('.%(ext)s')),
+            'postprocessors': [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': 'wav',
+            }],
+        })
+        proxy = self._get_proxy(context.url)
+        if proxy:
+            opts['proxy'] = proxy
+        
+        def _download():
+            with yt_dlp.YoutubeDL(opts) as ydl:
+                if context.info.get('formats') and not context.trimmed:
+                    # 复用已提取的信息，只重新选择音频格式
+                    ydl.process_ie_result(dict(context.info), download=True)
+                else:
+                    ydl.download([context.url])
+        
+        # 音频下载耗时较长，与AI转录共用线程池，避免占用元数据提取线程
+        await run_in_executor('ai', _download)
+        
+        audio_path = Path(output_path).with_suffix('.wav')
+        return str(audio_path) if audio_path.exists() else None
+    
+    async def _gather_limited(self, jobs: List[Callable[[], Awaitable]], limit: Optional[int] = None) -> List:
+        """并发执行任务（同一时间最多limit个），按传入顺序返回结果
+        
+        jobs为返回协程的无参可调用对象，获得并发名额后才创建协程
+        """
+        semaphore = asyncio.Semaphore(limit or app_config.SUBTITLE_TRACK_CONCURRENCY)
+        
+        async def run(job):
+            async with semaphore:
+                return await job()
+        
+        return await asyncio.gather(*[run(job) for job in jobs])
+    
+    @asynccontextmanager
+    async def _http_session(self):
+        """获取HTTP会话：优先使用注入的共享会话，未注入时临时创建"""
+        if self.session is not None and not self.session.closed:
+            yield self.session
+        else:
+            async with create_http_session() as session:
+                yield session
+    
     async def download_subtitle_content(self, subtitle_url: str, format_type: str = "vtt") -> str:
-        """下载字幕内容"""
+        """下载字幕内容（可重试的错误自动重试）"""
+        return await self.retry_with_backoff(
+            self._fetch_subtitle_content, subtitle_url, format_type, stage='subtitle_download'
+        )
+    
+    async def _fetch_subtitle_content(self, subtitle_url: str, format_type: str) -> str:
         try:
             headers = {
                 'User-Agent': random.choice(USER_AGENTS),
                 'Referer': subtitle_url,
             }
             
-            # 使用代理
-            proxy = None
-            if self.proxy_manager:
-                proxy = self.proxy_manager.get_current_proxy()
-            
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+            # 使用代理（aiohttp只支持HTTP代理）
+            async with self._proxied(subtitle_url, http_only=True) as proxy, self._http_session() as session:
                 async with session.get(
                     subtitle_url, 
                     headers=headers,
-                    proxy=proxy
+                    proxy=proxy,
+                    timeout=aiohttp.ClientTimeout(total=30)
                 ) as response:
                     if response.status == 200:
                         content = await response.text()
@@ -171,268 +409,58 @@ class BaseSubtitleExtractor(ABC):
                         return content
                     else:
                         raise Exception(f"HTTP {response.status}: Failed to download subtitle")
-                        
+        
         except Exception as e:
             self.logger.error(f"Error downloading subtitle: {str(e)}")
             raise
     
-    def parse_subtitle_content(self, content: str, format_type: str) -> List[SubtitleSegment]:
-        """解析字幕内容"""
-        try:
-            if format_type.lower() == 'vtt':
-                return self._parse_vtt(content)
-            elif format_type.lower() == 'srt':
-                return self._parse_srt(content)
-            elif format_type.lower() in ['srv3', 'srv2', 'srv1']:
-                return self._parse_youtube_srv(content)
-            elif format_type.lower() == 'ttml':
-                return self._parse_ttml(content)
-            elif format_type.lower() in ['ass', 'ssa']:
-                return self._parse_ass(content)
-            else:
-                self.logger.warning(f"Unsupported subtitle format: {format_type}")
-                return []
-        except Exception as e:
-            self.logger.error(f"Error parsing subtitle content: {str(e)}")
-            return []
-    
-    def _parse_vtt(self, content: str) -> List[SubtitleSegment]:
-        """解析VTT格式字幕"""
-        segments = []
-        lines = content.split('\n')
-        
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            
-            # 查找时间戳行
-            if '-->' in line:
-                time_match = re.match(r'(\d+:[\d:.]+)\s+-->\s+(\d+:[\d:.]+)', line)
-                if time_match:
-                    start_time = self._parse_time(time_match.group(1))
-                    end_time = self._parse_time(time_match.group(2))
-                    
-                    # 获取字幕文本
-                    i += 1
-                    text_lines = []
-                    while i < len(lines) and lines[i].strip():
-                        text_line = lines[i].strip()
-                        # 移除VTT标签
-                        text_line = re.sub(r'<[^>]+>', '', text_line)
-                        if text_line:
-                            text_lines.append(text_line)
-                        i += 1
-                    
-                    if text_lines:
-                        text = '\n'.join(text_lines)
-                        segments.append(SubtitleSegment(
-                            start_time=start_time,
-                            end_time=end_time,
-                            text=text
-                        ))
-            i += 1
-        
-        return segments
-    
-    def _parse_srt(self, content: str) -> List[SubtitleSegment]:
-        """解析SRT格式字幕"""
-        segments = []
-        blocks = re.split(r'\n\s*\n', content.strip())
+    async def iter_subtitle_segments(self, subtitle_url: str, format_type: str) -> AsyncIterator[SubtitleSegment]:
+        """边下载边解析字幕，每解析出一个完整片段就产出（内存占用与字幕长度无关）
         
-        for block in blocks:
-            lines = block.strip().split('\n')
-            if len(lines) >= 3:
-                # 跳过序号行
-                time_line = lines[1]
-                text_lines = lines[2:]
-                
-                time_match = re.match(r'(\d+:[\d:,]+)\s+-->\s+(\d+:[\d:,]+)', time_line)
-                if time_match:
-                    start_time = self._parse_time(time_match.group(1).replace(',', '.'))
-                    end_time = self._parse_time(time_match.group(2).replace(',', '.'))
-                    text = '\n'.join(text_lines)
-                    
-                    segments.append(SubtitleSegment(
-                        start_time=start_time,
-                        end_time=end_time,
-                        text=text
-                    ))
+        已产出的片段无法撤回，因此不做整体重试；需要重试时使用download_subtitle_content
+        """
+        from ..subtitle_stream import iter_segments
         
-        return segments
+        headers = {
+            'User-Agent': random.choice(USER_AGENTS),
+            'Referer': subtitle_url,
+        }
+        count = 0
+        async with self._proxied(subtitle_url, http_only=True) as proxy, self._http_session() as session:
+            async with session.get(
+                subtitle_url,
+                headers=headers,
+                proxy=proxy,
+                timeout=aiohttp.ClientTimeout(total=None, sock_read=30)
+            ) as response:
+                if response.status != 200:
+                    raise Exception(f"HTTP {response.status}: Failed to download subtitle")
+                async for segment in iter_segments(response, format_type):
+                    count += 1
+                    yield segment
+        self.logger.info(f"Streamed {count} subtitle segments")
     
-    def _parse_youtube_srv(self, content: str) -> List[SubtitleSegment]:
-        """解析YouTube SRV格式字幕"""
-        try:
-            import xml.etree.ElementTree as ET
-            
-            segments = []
-            root = ET.fromstring(content)
-            
-            for text_elem in root.findall('.//text'):
-                start = float(text_elem.get('start', 0))
-                duration = float(text_elem.get('dur', 0))
-                end_time = start + duration
-                text = text_elem.text or ''
-                
-                # 清理文本
-                text = re.sub(r'<[^>]+>', '', text)
-                text = text.replace('&amp;', '&').replace('&lt;', '<').replace('&gt;', '>')
-                
-                if text.strip():
-                    segments.append(SubtitleSegment(
-                        start_time=start,
-                        end_time=end_time,
-                        text=text.strip()
-                    ))
-            
-            return segments
-        except Exception as e:
-            self.logger.error(f"Error parsing SRV format: {str(e)}")
+    def parse_subtitle_content(self, content: str, format_type: str) -> List[SubtitleSegment]:
+        """解析字幕内容（见subtitle_parser）"""
+        if not can_parse(format_type):
+            self.logger.warning(f"Unsupported subtitle format: {format_type}")
             return []
-    
-    def _parse_ttml(self, content: str) -> List[SubtitleSegment]:
-        """解析TTML格式字幕"""
         try:
-            import xml.etree.ElementTree as ET
-            
-            segments = []
-            root = ET.fromstring(content)
-            
-            # 查找所有p标签（段落）
-            for p in root.findall('.//{http://www.w3.org/ns/ttml}p'):
-                begin = p.get('begin', '0s')
-                end = p.get('end', '0s')
-                
-                start_time = self._parse_ttml_time(begin)
-                end_time = self._parse_ttml_time(end)
-                
-                # 获取文本内容
-                text = ''.join(p.itertext()).strip()
-                
-                if text:
-                    segments.append(SubtitleSegment(
-                        start_time=start_time,
-                        end_time=end_time,
-                        text=text
-                    ))
-            
-            return segments
+            if app_config.COLUMNAR_SEGMENTS:
+                from ..segment_table import table_from_cues
+                return table_from_cues(scan_subtitles(content, format_type))
+            return [SubtitleSegment(start, end, text) for start, end, text in scan_subtitles(content, format_type)]
         except Exception as e:
-            self.logger.error(f"Error parsing TTML format: {str(e)}")
+            self.logger.error(f"Error parsing subtitle content: {str(e)}")
             return []
     
-    def _parse_ass(self, content: str) -> List[SubtitleSegment]:
-        """解析ASS/SSA格式字幕"""
-        segments = []
-        lines = content.split('\n')
-        
-        # 查找事件部分
-        in_events = False
-        for line in lines:
-            line = line.strip()
-            
-            if line.startswith('[Events]'):
-                in_events = True
-                continue
-            elif line.startswith('[') and in_events:
-                break
-            
-            if in_events and line.startswith('Dialogue:'):
-                parts = line.split(',', 9)
-                if len(parts) >= 10:
-                    start_time = self._parse_ass_time(parts[1])
-                    end_time = self._parse_ass_time(parts[2])
-                    text = parts[9]
-                    
-                    # 清理ASS标签
-                    text = re.sub(r'\{[^}]*\}', '', text)
-                    text = text.replace('\\N', '\n')
-                    
-                    if text.strip():
-                        segments.append(SubtitleSegment(
-                            start_time=start_time,
-                            end_time=end_time,
-                            text=text.strip()
-                        ))
-        
-        return segments
-    
-    def _parse_time(self, time_str: str) -> float:
-        """解析时间字符串为秒数"""
-        try:
-            # 处理不同的时间格式
-            time_str = time_str.strip()
-            
-            # HH:MM:SS.mmm 或 HH:MM:SS,mmm
-            if ':' in time_str:
-                parts = time_str.replace(',', '.').split(':')
-                if len(parts) == 3:
-                    hours = int(parts[0])
-                    minutes = int(parts[1])
-                    seconds = float(parts[2])
-                    return hours * 3600 + minutes * 60 + seconds
-                elif len(parts) == 2:
-                    minutes = int(parts[0])
-                    seconds = float(parts[1])
-                    return minutes * 60 + seconds
-            
-            # 纯秒数
-            return float(time_str)
-        except:
-            return 0.0
-    
-    def _parse_ttml_time(self, time_str: str) -> float:
-        """解析TTML时间格式"""
-        try:
-            if time_str.endswith('s'):
-                return float(time_str[:-1])
-            elif time_str.endswith('ms'):
-                return float(time_str[:-2]) / 1000
-            elif 'h' in time_str or 'm' in time_str or 's' in time_str:
-                # 复杂时间格式 如 1h2m3.5s
-                hours = 0
-                minutes = 0
-                seconds = 0
-                
-                h_match = re.search(r'(\d+(?:\.\d+)?)h', time_str)
-                if h_match:
-                    hours = float(h_match.group(1))
-                
-                m_match = re.search(r'(\d+(?:\.\d+)?)m', time_str)
-                if m_match:
-                    minutes = float(m_match.group(1))
-                
-                s_match = re.search(r'(\d+(?:\.\d+)?)s', time_str)
-                if s_match:
-                    seconds = float(s_match.group(1))
-                
-                return hours * 3600 + minutes * 60 + seconds
-            else:
-                return self._parse_time(time_str)
-        except:
-            return 0.0
-    
-    def _parse_ass_time(self, time_str: str) -> float:
-        """解析ASS时间格式 H:MM:SS.cc"""
-        try:
-            parts = time_str.split(':')
-            if len(parts) == 3:
-                hours = int(parts[0])
-                minutes = int(parts[1])
-                sec_parts = parts[2].split('.')
-                seconds = int(sec_parts[0])
-                centiseconds = int(sec_parts[1]) if len(sec_parts) > 1 else 0
-                return hours * 3600 + minutes * 60 + seconds + centiseconds / 100
-        except:
-            return 0.0
-    
     def clean_subtitle_text(self, text: str) -> str:
         """清理字幕文本"""
         # 移除多余空白
-        text = re.sub(r'\s+', ' ', text)
+        text = WHITESPACE_RE.sub(' ', text)
         
         # 移除HTML标签
-        text = re.sub(r'<[^>]+>', '', text)
+        text = TAG_RE.sub('', text)
         
         # 解码HTML实体
         html_entities = {
@@ -448,24 +476,12 @@ class BaseSubtitleExtractor(ABC):
         
         return text.strip()
     
-    async def retry_with_backoff(self, func, *args, max_retries=None, **kwargs):
-        """带退避的重试机制"""
-        if max_retries is None:
-            max_retries = app_config.MAX_RETRIES
-        
-        last_error = None
-        
-        for attempt in range(max_retries):
-            try:
-                return await func(*args, **kwargs)
-            except Exception as e:
-                last_error = e
-                self.logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
-                
-                if attempt < max_retries - 1:
-                    # 指数退避
-                    delay = app_config.RETRY_DELAY * (2 ** attempt)
-                    self.logger.info(f"Retrying in {delay} seconds...")
-                    await asyncio.sleep(delay)
-        
-        raise last_error
\ No newline at end of file
+    async def retry_with_backoff(self, func, *args, max_retries=None, stage=None, **kwargs):
+        """按错误类型重试（见retry_policy）：永久错误立即失败，地区限制只在配置了代理时重试"""
+        return await retry_engine.run(
+            func, *args,
+            stage=stage or getattr(func, '__name__', 'default'),
+            max_retries=max_retries,
+            can_switch_proxy=bool(self.proxy_manager),
+            **kwargs
+        )
\ No newline at end of file
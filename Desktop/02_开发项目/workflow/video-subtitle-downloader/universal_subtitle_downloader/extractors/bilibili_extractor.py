@@ -9,19 +9,23 @@ import logging
 import asyncio
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse, parse_qs
+from datetime import datetime
 import aiohttp
-import yt_dlp
-from .base_extractor import BaseSubtitleExtractor, SubtitleTrack, SubtitleSegment, VideoInfo
+from .base_extractor import BaseSubtitleExtractor, SubtitleTrack, SubtitleSegment, VideoInfo, ExtractionContext
 from ..config import subtitle_config, app_config, USER_AGENTS
+from ..url_canonicalizer import canonicalize_url
+from ..platform_router import platform_router
 import random
+from functools import partial
 
 logger = logging.getLogger(__name__)
 
 class BilibiliSubtitleExtractor(BaseSubtitleExtractor):
     """哔哩哔哩专用字幕提取器"""
     
-    def __init__(self, proxy_manager=None, session: aiohttp.ClientSession = None):
-        super().__init__(proxy_manager, session)
+    def __init__(self, proxy_manager=None, session: aiohttp.ClientSession = None, metadata_cache=None,
+                 extraction_pool=None):
+        super().__init__(proxy_manager, session, metadata_cache, extraction_pool)
         self.platform_name = "哔哩哔哩"
         
         # 哔哩哔哩特定配置
@@ -38,132 +42,298 @@ class BilibiliSubtitleExtractor(BaseSubtitleExtractor):
     
     def can_handle(self, url: str) -> bool:
         """检查是否为B站URL"""
-        parsed = urlparse(url.lower())
-        return any(domain in parsed.netloc for domain in [
-            'bilibili.com', 'b23.tv', 'bilibili.tv'
-        ])
+        return platform_router.match(url) == 'bilibili'
     
-    async def extract_video_info(self, url: str) -> VideoInfo:
-        """提取B站视频信息"""
-        try:
-            self.logger.info(f"Extracting Bilibili video info from: {url}")
-            
-            # 使用yt-dlp获取基本信息
-            with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                info = await asyncio.get_event_loop().run_in_executor(
-                    None, ydl.extract_info, url, False
-                )
-            
-            # 提取BVID或AV号
+    def get_cache_key(self, url: str) -> Optional[Tuple[str, str]]:
+        """B站缓存键：BV号/AV号（多P视频附带分P序号）"""
+        canonical = canonicalize_url(url)
+        if canonical and canonical.platform == 'bilibili':
+            return ('bilibili', canonical.video_id)
+        return None
+    
+    async def _fetch_metadata(self, url: str, captions_only: bool = False) -> Tuple[Dict, Dict]:
+        """获取B站元数据：只需字幕时走纯API路径，否则yt-dlp基本信息 + 详情API"""
+        bvid, aid = self._extract_video_ids(url, {})
+        
+        # 纯API路径：一次详情请求即可得到元数据、分P的CID和字幕列表，失败时才使用yt-dlp
+        if captions_only and (bvid or aid):
+            detailed_info = await self._get_detailed_video_info(bvid, aid)
+            if detailed_info:
+                self.logger.info(f"Resolved Bilibili metadata via API: {bvid or aid}")
+                return self._build_api_info(url, detailed_info), {
+                    'bvid': detailed_info.get('bvid') or bvid,
+                    'aid': detailed_info.get('aid') or aid,
+                    'detailed_info': self._trim_detailed_info(detailed_info),
+                    'subtitle_list': self._get_embedded_subtitles(detailed_info),
+                    'partial': True,
+                }
+            self.logger.info(f"Bilibili API path failed, falling back to yt-dlp: {url}")
+        
+        if bvid or aid:
+            # URL中已有视频ID时，yt-dlp提取与详情API并发执行
+            info, detailed_info = await asyncio.gather(
+                self._extract_info(url),
+                self._get_detailed_video_info(bvid, aid)
+            )
+            bvid, aid = self._extract_video_ids(url, info)
+        else:
+            # 使用yt-dlp获取基本信息后再提取BVID或AV号
+            info = await self._extract_info(url)
             bvid, aid = self._extract_video_ids(url, info)
-            
-            # 获取详细的视频信息（包括字幕信息）
             detailed_info = await self._get_detailed_video_info(bvid, aid)
+        
+        return info, {
+            'bvid': bvid,
+            'aid': aid,
+            'detailed_info': self._trim_detailed_info(detailed_info),
+        }
+    
+    def _build_api_info(self, url: str, detailed_info: Dict) -> Dict:
+        """由详情API数据构建与yt-dlp结构一致的信息字典（不含formats）"""
+        bvid = detailed_info.get('bvid')
+        pubdate = detailed_info.get('pubdate')
+        
+        return {
+            'id': bvid or str(detailed_info.get('aid', '')),
+            'title': detailed_info.get('title', 'Unknown'),
+            'duration': detailed_info.get('duration', 0),
+            'uploader': detailed_info.get('owner', {}).get('name', 'Unknown'),
+            'upload_date': datetime.fromtimestamp(pubdate).strftime('%Y%m%d') if pubdate else '',
+            'view_count': detailed_info.get('stat', {}).get('view', 0),
+            'description': detailed_info.get('desc', ''),
+            'thumbnail': detailed_info.get('pic', ''),
+            'webpage_url': f"https://www.bilibili.com/video/{bvid}" if bvid else url,
+            'extractor': 'BiliBili',
+            'extractor_key': 'BiliBili',
+            'subtitles': {},
+            'automatic_captions': {},
+            'formats': [],
+        }
+    
+    def _get_embedded_subtitles(self, detailed_info: Dict) -> List[Dict]:
+        """详情API中附带的字幕列表（未登录时部分条目没有下载地址）"""
+        subtitle_list = (detailed_info.get('subtitle') or {}).get('list') or []
+        return [
+            {key: item.get(key) for key in ('lan', 'lan_doc', 'subtitle_url', 'type')}
+            for item in subtitle_list
+        ]
+    
+    def _build_video_info(self, url: str, info: Dict, extra: Dict) -> VideoInfo:
+        """合并yt-dlp信息与详情API信息构建视频信息"""
+        detailed_info = extra.get('detailed_info') or {}
+        bvid = extra.get('bvid')
+        aid = extra.get('aid')
+        
+        return VideoInfo(
+            id=bvid or str(aid),
+            title=info.get('title', 'Unknown'),
+            duration=info.get('duration', 0),
+            uploader=info.get('uploader', 'Unknown'),
+            upload_date=info.get('upload_date', ''),
+            view_count=detailed_info.get('view', info.get('view_count', 0)),
+            description=(detailed_info.get('desc', info.get('description', '')) or '')[:500],
+            thumbnail=detailed_info.get('pic', info.get('thumbnail', '')),
+            webpage_url=info.get('webpage_url', url),
+            platform='bilibili',
+            available_subtitles=self._extract_available_subtitles(detailed_info),
+            automatic_captions=[]  # B站主要是手动字幕
+        )
+    
+    def _trim_detailed_info(self, detailed_info: Dict) -> Dict:
+        """精简详情API数据，只保留需要的字段"""
+        keep_keys = ('aid', 'bvid', 'cid', 'title', 'desc', 'pic', 'duration', 'pubdate', 'owner', 'stat')
+        trimmed = {key: detailed_info[key] for key in keep_keys if key in detailed_info}
+        trimmed['pages'] = [
+            {key: page.get(key) for key in ('cid', 'page', 'part', 'duration')}
+            for page in detailed_info.get('pages', [])
+        ]
+        return trimmed
+    
+    async def extract_subtitles(self, url: str, languages: List[str] = None,
+                                context: Optional[ExtractionContext] = None) -> List[SubtitleTrack]:
+        """提取B站字幕"""
+        try:
+            if languages is None:
+                languages = ['zh-CN', 'zh', 'en']
             
-            # 合并信息
-            video_info = VideoInfo(
-                id=bvid or str(aid),
-                title=info.get('title', 'Unknown'),
-                duration=info.get('duration', 0),
-                uploader=info.get('uploader', 'Unknown'),
-                upload_date=info.get('upload_date', ''),
-                view_count=detailed_info.get('view', info.get('view_count', 0)),
-                description=(detailed_info.get('desc', info.get('description', '')) or '')[:500],
-                thumbnail=detailed_info.get('pic', info.get('thumbnail', '')),
-                webpage_url=info.get('webpage_url', url),
-                platform='bilibili',
-                available_subtitles=self._extract_available_subtitles(detailed_info),
-                automatic_captions=[],  # B站主要是手动字幕
-                formats_info=self._extract_formats_info(info)
-            )
+            self.logger.info(f"Extracting Bilibili subtitles for languages: {languages}")
             
-            self.logger.info(f"Extracted Bilibili info for: {video_info.title}")
-            return video_info
+            # 获取视频信息（优先复用已有的提取上下文）
+            if context is None:
+                context = await self.extract_context(url, captions_only=True)
+            
+            detailed_info = context.extra.get('detailed_info') or {}
+            bvid = context.extra.get('bvid')
+            aid = context.extra.get('aid') or detailed_info.get('aid')
+            page = self._get_url_page(url)
+            
+            # 详情API附带的字幕列表只对应第一个分P，可直接使用（缓存中的字幕地址可能已失效，不复用）
+            subtitle_list = []
+            if page == 1 and not context.from_cache:
+                subtitle_list = context.extra.get('subtitle_list') or []
+            matched = self._filter_subtitle_list(subtitle_list, languages)
+            
+            # 请求的语言都有下载地址时跳过播放器接口
+            if not matched or not all(item.get('subtitle_url') for item in matched):
+                cid = self._get_page_cid(detailed_info, page)
+                if not cid:
+                    # 没有CID时详情与播放器请求无法并发，只能先查CID
+                    cid = await self._get_cid(bvid, aid, page)
+                    if not cid:
+                        raise Exception("无法获取视频CID")
+                subtitle_list = await self._get_subtitle_list(aid, cid, bvid)
+            
+            # 并发下载所有匹配语言的字幕内容
+            subtitle_tracks = await self._download_subtitle_tracks(subtitle_list, languages)
+            
+            self.logger.info(f"Found {len(subtitle_tracks)} Bilibili subtitle tracks")
+            return subtitle_tracks
             
         except Exception as e:
-            self.logger.error(f"Failed to extract Bilibili video info: {str(e)}")
-            raise Exception(f"哔哩哔哩视频信息提取失败: {str(e)}")
+            self.logger.error(f"Failed to extract Bilibili subtitles: {str(e)}")
+            raise Exception(f"哔哩哔哩字幕提取失败: {str(e)}")
     
-    async def extract_subtitles(self, url: str, languages: List[str] = None) -> List[SubtitleTrack]:
-        """提取B站字幕"""
+    async def extract_page_subtitles(self, url: str, languages: List[str] = None, pages: str = "all",
+                                     context: Optional[ExtractionContext] = None) -> List[SubtitleTrack]:
+        """提取多P视频中所选分P的字幕（每个分P一组轨道，按分P顺序返回）"""
         try:
             if languages is None:
                 languages = ['zh-CN', 'zh', 'en']
             
-            self.logger.info(f"Extracting Bilibili subtitles for languages: {languages}")
+            if context is None:
+                context = await self.extract_context(url, captions_only=True)
             
-            # 获取视频信息
-            with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                info = await asyncio.get_event_loop().run_in_executor(
-                    None, ydl.extract_info, url, False
-                )
+            detailed_info = context.extra.get('detailed_info') or {}
+            bvid = context.extra.get('bvid')
+            aid = context.extra.get('aid') or detailed_info.get('aid')
             
-            bvid, aid = self._extract_video_ids(url, info)
-            cid = info.get('id') or await self._get_cid(bvid, aid)
+            all_pages = detailed_info.get('pages') or []
+            if not all_pages:
+                detailed_info = await self._get_detailed_video_info(bvid, aid)
+                all_pages = detailed_info.get('pages') or []
+                if not all_pages:
+                    raise Exception("无法获取分P列表")
             
-            if not cid:
-                raise Exception("无法获取视频CID")
+            selected_pages = self._select_pages(all_pages, pages)
+            self.logger.info(f"Extracting Bilibili subtitles for {len(selected_pages)}/{len(all_pages)} pages")
             
-            # 获取字幕列表
-            subtitle_list = await self._get_subtitle_list(aid, cid)
+            # 各分P的字幕列表与字幕内容并发获取，同时处理的分P数有上限
+            semaphore = asyncio.Semaphore(app_config.BILIBILI_PAGE_CONCURRENCY)
             
-            subtitle_tracks = []
+            async def extract_page(page_info: Dict) -> List[SubtitleTrack]:
+                async with semaphore:
+                    return await self._extract_page_tracks(aid, bvid, page_info, languages)
             
-            # 处理每个字幕
-            for subtitle_info in subtitle_list:
-                lang = subtitle_info.get('lan', 'zh-CN')
-                lang_doc = subtitle_info.get('lan_doc', '中文')
-                subtitle_url = subtitle_info.get('subtitle_url', '')
-                
-                # 检查是否匹配请求的语言
-                if languages and not any(self._language_matches(lang, req_lang) for req_lang in languages):
-                    continue
-                
-                if not subtitle_url:
-                    continue
-                
-                # 确保URL是完整的
-                if subtitle_url.startswith('//'):
-                    subtitle_url = 'https:' + subtitle_url
-                elif subtitle_url.startswith('/'):
-                    subtitle_url = 'https://i0.hdslb.com' + subtitle_url
-                
-                try:
-                    # 下载字幕内容
-                    content = await self.download_subtitle_content(subtitle_url, 'json')
-                    if not content:
-                        continue
-                    
-                    # 解析B站字幕JSON格式
-                    segments = self._parse_bilibili_subtitle(content)
-                    if not segments:
-                        continue
-                    
-                    # 创建字幕轨道
-                    track = SubtitleTrack(
-                        language=lang,
-                        language_name=lang_doc,
-                        is_auto_generated=subtitle_info.get('type', 0) == 1,  # 1表示AI生成
-                        format='srt',  # B站字幕转换为SRT格式
-                        url=subtitle_url,
-                        segments=segments,
-                        quality="high",
-                        source="bilibili"
-                    )
-                    
-                    subtitle_tracks.append(track)
-                    self.logger.info(f"Extracted Bilibili subtitle: {lang} ({lang_doc})")
-                    
-                except Exception as e:
-                    self.logger.warning(f"Failed to extract subtitle {lang}: {str(e)}")
-                    continue
+            page_tracks = await asyncio.gather(*[extract_page(page_info) for page_info in selected_pages])
+            subtitle_tracks = [track for tracks in page_tracks for track in tracks]
             
-            self.logger.info(f"Found {len(subtitle_tracks)} Bilibili subtitle tracks")
+            self.logger.info(f"Found {len(subtitle_tracks)} Bilibili subtitle tracks across {len(selected_pages)} pages")
             return subtitle_tracks
             
         except Exception as e:
-            self.logger.error(f"Failed to extract Bilibili subtitles: {str(e)}")
-            raise Exception(f"哔哩哔哩字幕提取失败: {str(e)}")
+            self.logger.error(f"Failed to extract Bilibili page subtitles: {str(e)}")
+            raise Exception(f"哔哩哔哩分P字幕提取失败: {str(e)}")
+    
+    async def _extract_page_tracks(self, aid: Optional[int], bvid: Optional[str], page_info: Dict,
+                                   languages: List[str]) -> List[SubtitleTrack]:
+        """提取单个分P的字幕轨道，失败时返回空列表"""
+        page = page_info.get('page')
+        try:
+            subtitle_list = await self._get_subtitle_list(aid, str(page_info.get('cid')), bvid)
+            tracks = await self._download_subtitle_tracks(subtitle_list, languages)
+        except Exception as e:
+            self.logger.warning(f"Failed to extract subtitles for page {page}: {str(e)}")
+            return []
+        
+        for track in tracks:
+            track.page = page
+            track.page_title = page_info.get('part') or ''
+        return tracks
+    
+    def _select_pages(self, all_pages: List[Dict], pages) -> List[Dict]:
+        """按分P选择解析结果筛选分P："all"、"3"、"1-3,5"或页码列表"""
+        if pages is None or pages == 'all':
+            return list(all_pages)
+        
+        numbers = set()
+        if isinstance(pages, str):
+            try:
+                for part in pages.replace(' ', '').split(','):
+                    if not part:
+                        continue
+                    start, _, end = part.partition('-')
+                    first = int(start)
+                    last = int(end) if end else first
+                    numbers.update(range(first, last + 1))
+            except ValueError:
+                raise Exception(f"无效的分P选择: {pages}")
+        else:
+            numbers.update(int(number) for number in pages)
+        
+        selected = [page_info for page_info in all_pages if page_info.get('page') in numbers]
+        if not selected:
+            raise Exception(f"所选分P不存在: {pages}（共{len(all_pages)}P）")
+        return selected
+    
+    def _filter_subtitle_list(self, subtitle_list: List[Dict], languages: List[str]) -> List[Dict]:
+        """筛选匹配请求语言的字幕条目"""
+        if not languages:
+            return list(subtitle_list)
+        return [
+            subtitle_info for subtitle_info in subtitle_list
+            if any(self._language_matches(subtitle_info.get('lan') or 'zh-CN', req_lang) for req_lang in languages)
+        ]
+    
+    async def _download_subtitle_tracks(self, subtitle_list: List[Dict], languages: List[str]) -> List[SubtitleTrack]:
+        """并发下载字幕列表中匹配语言的字幕，保持列表顺序"""
+        selected = [
+            subtitle_info for subtitle_info in self._filter_subtitle_list(subtitle_list, languages)
+            if subtitle_info.get('subtitle_url')
+        ]
+        
+        tracks = await self._gather_limited([partial(self._download_subtitle_track, info) for info in selected])
+        return [track for track in tracks if track]
+    
+    async def _download_subtitle_track(self, subtitle_info: Dict) -> Optional[SubtitleTrack]:
+        """下载并解析单个B站字幕"""
+        lang = subtitle_info.get('lan', 'zh-CN')
+        lang_doc = subtitle_info.get('lan_doc', '中文')
+        subtitle_url = subtitle_info.get('subtitle_url', '')
+        
+        # 确保URL是完整的
+        if subtitle_url.startswith('//'):
+            subtitle_url = 'https:' + subtitle_url
+        elif subtitle_url.startswith('/'):
+            subtitle_url = 'https://i0.hdslb.com' + subtitle_url
+        
+        try:
+            # 下载字幕内容
+            content = await self.download_subtitle_content(subtitle_url, 'json')
+            if not content:
+                return None
+            
+            # 解析B站字幕JSON格式
+            segments = self._parse_bilibili_subtitle(content)
+            if not segments:
+                return None
+            
+            self.logger.info(f"Extracted Bilibili subtitle: {lang} ({lang_doc})")
+            
+            # 创建字幕轨道
+            return SubtitleTrack(
+                language=lang,
+                language_name=lang_doc,
+                is_auto_generated=subtitle_info.get('type', 0) == 1,  # 1表示AI生成
+                format='srt',  # B站字幕转换为SRT格式
+                url=subtitle_url,
+                segments=segments,
+                quality="high",
+                source="bilibili"
+            )
+            
+        except Exception as e:
+            self.logger.warning(f"Failed to extract subtitle {lang}: {str(e)}")
+            return None
     
     def _extract_video_ids(self, url: str, info: Dict) -> Tuple[Optional[str], Optional[int]]:
         """提取BVID和AV号"""
@@ -212,7 +382,7 @@ class BilibiliSubtitleExtractor(BaseSubtitleExtractor):
                 'Referer': 'https://www.bilibili.com/',
             }
             
-            async with aiohttp.ClientSession() as session:
+            async with self._http_session() as session:
                 async with session.get(url, params=params, headers=headers) as response:
                     if response.status == 200:
                         data = await response.json()
@@ -225,36 +395,46 @@ class BilibiliSubtitleExtractor(BaseSubtitleExtractor):
             self.logger.warning(f"Failed to get detailed video info: {str(e)}")
             return {}
     
-    async def _get_cid(self, bvid: Optional[str], aid: Optional[int]) -> Optional[str]:
+    async def _get_cid(self, bvid: Optional[str], aid: Optional[int], page: int = 1) -> Optional[str]:
         """获取视频CID"""
         try:
             detailed_info = await self._get_detailed_video_info(bvid, aid)
-            pages = detailed_info.get('pages', [])
-            if pages:
-                return str(pages[0].get('cid'))
-            return None
+            return self._get_page_cid(detailed_info, page)
         except Exception as e:
             self.logger.warning(f"Failed to get CID: {str(e)}")
             return None
     
-    async def _get_subtitle_list(self, aid: Optional[int], cid: str) -> List[Dict]:
+    def _get_page_cid(self, detailed_info: Dict, page: int = 1) -> Optional[str]:
+        """从详情信息中获取指定分P的CID"""
+        for page_info in detailed_info.get('pages', []):
+            if page_info.get('page') == page and page_info.get('cid'):
+                return str(page_info.get('cid'))
+        return None
+    
+    def _get_url_page(self, url: str) -> int:
+        """URL中的分P序号（?p=N），默认为1"""
+        page = parse_qs(urlparse(url).query).get('p', ['1'])[0]
+        return int(page) if page.isdigit() and int(page) > 0 else 1
+    
+    async def _get_subtitle_list(self, aid: Optional[int], cid: str, bvid: Optional[str] = None) -> List[Dict]:
         """获取字幕列表"""
         try:
-            if not aid or not cid:
+            if not (aid or bvid) or not cid:
                 return []
             
             url = f"{self.api_base}/x/player/v2"
-            params = {
-                'aid': aid,
-                'cid': cid,
-            }
+            params = {'cid': cid}
+            if aid:
+                params['aid'] = aid
+            else:
+                params['bvid'] = bvid
             
             headers = {
                 'User-Agent': random.choice(USER_AGENTS),
                 'Referer': 'https://www.bilibili.com/',
             }
             
-            async with aiohttp.ClientSession() as session:
+            async with self._http_session() as session:
                 async with session.get(url, params=params, headers=headers) as response:
                     if response.status == 200:
                         data = await response.json()
@@ -300,44 +480,6 @@ class BilibiliSubtitleExtractor(BaseSubtitleExtractor):
         # 暂时返回常见的语言
         return ['zh-CN', 'zh']
     
-    def _extract_formats_info(self, info: Dict) -> Dict:
-        """提取格式信息"""
-        formats_info = {
-            'available_formats': [],
-            'best_video': None,
-            'best_audio': None,
-        }
-        
-        formats = info.get('formats', [])
-        
-        for f in formats:
-            format_info = {
-                'format_id': f.get('format_id'),
-                'ext': f.get('ext'),
-                'resolution': f.get('resolution'),
-                'fps': f.get('fps'),
-                'vcodec': f.get('vcodec'),
-                'acodec': f.get('acodec'),
-                'filesize': f.get('filesize'),
-                'quality': f.get('quality'),
-                'url': f.get('url', '').split('?')[0] if f.get('url') else ''
-            }
-            formats_info['available_formats'].append(format_info)
-        
-        # 找出最佳视频和音频格式
-        video_formats = [f for f in formats if f.get('vcodec') != 'none']
-        audio_formats = [f for f in formats if f.get('acodec') != 'none' and f.get('vcodec') == 'none']
-        
-        if video_formats:
-            best_video = max(video_formats, key=lambda x: (x.get('height', 0), x.get('fps', 0)))
-            formats_info['best_video'] = best_video.get('format_id')
-        
-        if audio_formats:
-            best_audio = max(audio_formats, key=lambda x: x.get('abr', 0))
-            formats_info['best_audio'] = best_audio.get('format_id')
-        
-        return formats_info
-    
     def _language_matches(self, subtitle_lang: str, request_lang: str) -> bool:
         """检查字幕语言是否匹配请求语言"""
         # 简单的语言匹配逻辑
@@ -386,7 +528,7 @@ class BilibiliSubtitleExtractor(BaseSubtitleExtractor):
                 'Referer': 'https://www.bilibili.com/',
             }
             
-            async with aiohttp.ClientSession() as session:
+            async with self._http_session() as session:
                 async with session.get(search_url, params=params, headers=headers) as response:
                     if response.status == 200:
                         data = await response.json()
@@ -8,20 +8,28 @@ import json
 import logging
 import asyncio
 from typing import Dict, List, Optional, Any, Tuple
+from collections import defaultdict
 from urllib.parse import urlparse, parse_qs
 import aiohttp
-import yt_dlp
-from .base_extractor import BaseSubtitleExtractor, SubtitleTrack, SubtitleSegment, VideoInfo
+from .base_extractor import BaseSubtitleExtractor, SubtitleTrack, SubtitleSegment, VideoInfo, ExtractionContext
 from ..config import subtitle_config, app_config, USER_AGENTS
+from ..executors import run_in_executor
+from ..ydl_pool import ydl_pool
+from ..platform_router import platform_router
 import random
+from functools import partial
 
 logger = logging.getLogger(__name__)
 
+# 字幕格式的默认优先级（得分相同时使用）
+FORMAT_PRIORITY = ['vtt', 'srt', 'ttml', 'srv3', 'srv2', 'srv1', 'ass', 'ssa']
+
 class GenericSubtitleExtractor(BaseSubtitleExtractor):
     """通用字幕提取器，支持yt-dlp支持的所有平台"""
     
-    def __init__(self, proxy_manager=None, session: aiohttp.ClientSession = None):
-        super().__init__(proxy_manager, session)
+    def __init__(self, proxy_manager=None, session: aiohttp.ClientSession = None, metadata_cache=None,
+                 extraction_pool=None):
+        super().__init__(proxy_manager, session, metadata_cache, extraction_pool)
         self.platform_name = "通用平台"
         
         # 通用配置，启用所有字幕相关选项
@@ -32,6 +40,10 @@ class GenericSubtitleExtractor(BaseSubtitleExtractor):
             'subtitlesformat': 'best',
             'ignoreerrors': True,  # 忽略错误继续处理
         })
+        
+        # 各平台字幕格式的衰减得分（每次提取后所有得分乘以衰减系数，最先成功解析的格式加1），
+        # 用于自适应调整格式优先级；旧的胜出记录逐渐失效，平台更换格式后几次提取内即可调整顺序
+        self.format_scores: Dict[str, Dict[str, float]] = defaultdict(dict)
     
     def can_handle(self, url: str) -> bool:
         """通用提取器可以处理任何URL，但优先级最低"""
@@ -42,43 +54,25 @@ class GenericSubtitleExtractor(BaseSubtitleExtractor):
         except:
             return False
     
-    async def extract_video_info(self, url: str) -> VideoInfo:
-        """提取视频信息"""
-        try:
-            self.logger.info(f"Extracting video info from: {url}")
-            
-            with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                info = await asyncio.get_event_loop().run_in_executor(
-                    None, ydl.extract_info, url, False
-                )
-            
-            # 检测平台
-            platform = self._detect_platform(url, info)
-            
-            video_info = VideoInfo(
-                id=str(info.get('id', '')),
-                title=info.get('title', 'Unknown'),
-                duration=info.get('duration', 0),
-                uploader=info.get('uploader', 'Unknown'),
-                upload_date=info.get('upload_date', ''),
-                view_count=info.get('view_count', 0),
-                description=(info.get('description', '') or '')[:500],
-                thumbnail=info.get('thumbnail', ''),
-                webpage_url=info.get('webpage_url', url),
-                platform=platform,
-                available_subtitles=list(info.get('subtitles', {}).keys()),
-                automatic_captions=list(info.get('automatic_captions', {}).keys()),
-                formats_info=self._extract_formats_info(info)
-            )
-            
-            self.logger.info(f"Extracted info for {platform}: {video_info.title}")
-            return video_info
-            
-        except Exception as e:
-            self.logger.error(f"Failed to extract video info: {str(e)}")
-            raise Exception(f"视频信息提取失败: {str(e)}")
+    def _build_video_info(self, url: str, info: Dict, extra: Dict) -> VideoInfo:
+        """构建视频信息"""
+        return VideoInfo(
+            id=str(info.get('id', '')),
+            title=info.get('title', 'Unknown'),
+            duration=info.get('duration', 0),
+            uploader=info.get('uploader', 'Unknown'),
+            upload_date=info.get('upload_date', ''),
+            view_count=info.get('view_count', 0),
+            description=(info.get('description', '') or '')[:500],
+            thumbnail=info.get('thumbnail', ''),
+            webpage_url=info.get('webpage_url', url),
+            platform=self._detect_platform(url, info),
+            available_subtitles=list(info.get('subtitles', {}).keys()),
+            automatic_captions=list(info.get('automatic_captions', {}).keys())
+        )
     
-    async def extract_subtitles(self, url: str, languages: List[str] = None) -> List[SubtitleTrack]:
+    async def extract_subtitles(self, url: str, languages: List[str] = None,
+                                context: Optional[ExtractionContext] = None) -> List[SubtitleTrack]:
         """提取字幕"""
         try:
             if languages is None:
@@ -86,79 +80,78 @@ class GenericSubtitleExtractor(BaseSubtitleExtractor):
             
             self.logger.info(f"Extracting subtitles for languages: {languages}")
             
-            # 获取字幕信息
-            with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                info = await asyncio.get_event_loop().run_in_executor(
-                    None, ydl.extract_info, url, False
-                )
-            
-            platform = self._detect_platform(url, info)
-            subtitle_tracks = []
+            # 获取字幕信息（优先复用已有的提取上下文）
+            if context is None:
+                context = await self.extract_context(url)
+            context = await self._ensure_fresh_captions(context)
             
-            # 1. 处理手动字幕（优先级更高）
-            manual_subtitles = info.get('subtitles', {})
-            for lang in languages:
-                # 尝试精确匹配
-                if lang in manual_subtitles:
-                    tracks = await self._extract_subtitle_tracks(
-                        manual_subtitles[lang], lang, False, platform
-                    )
-                    subtitle_tracks.extend(tracks)
-                # 尝试语言变体匹配
-                else:
-                    for available_lang in manual_subtitles.keys():
-                        if self._language_matches(available_lang, lang):
-                            tracks = await self._extract_subtitle_tracks(
-                                manual_subtitles[available_lang], available_lang, False, platform
-                            )
-                            subtitle_tracks.extend(tracks)
-                            break
-            
-            # 2. 处理自动生成字幕
-            auto_captions = info.get('automatic_captions', {})
-            for lang in languages:
-                # 只有在没有找到手动字幕时才使用自动字幕
-                has_manual = any(track.language == lang and not track.is_auto_generated 
-                               for track in subtitle_tracks)
-                if has_manual:
-                    continue
-                
-                # 尝试精确匹配
-                if lang in auto_captions:
-                    tracks = await self._extract_subtitle_tracks(
-                        auto_captions[lang], lang, True, platform
-                    )
-                    subtitle_tracks.extend(tracks)
-                # 尝试语言变体匹配
-                else:
-                    for available_lang in auto_captions.keys():
-                        if self._language_matches(available_lang, lang):
-                            tracks = await self._extract_subtitle_tracks(
-                                auto_captions[available_lang], available_lang, True, platform
-                            )
-                            subtitle_tracks.extend(tracks)
-                            break
+            platform = context.video_info.platform
+            subtitle_tracks = await self._collect_subtitle_tracks(context.info, languages, platform)
             
-            # 3. 如果没有找到任何字幕，尝试英语作为回退
-            if not subtitle_tracks and 'en' not in languages:
-                if 'en' in manual_subtitles:
-                    tracks = await self._extract_subtitle_tracks(
-                        manual_subtitles['en'], 'en', False, platform
-                    )
-                    subtitle_tracks.extend(tracks)
-                elif 'en' in auto_captions:
-                    tracks = await self._extract_subtitle_tracks(
-                        auto_captions['en'], 'en', True, platform
-                    )
-                    subtitle_tracks.extend(tracks)
+            # 缓存中的字幕URL可能已失效，重新提取一次后再试
+            if not subtitle_tracks and context.from_cache and self._has_listed_captions(context.info, languages):
+                context = await self.refresh_context(context)
+                subtitle_tracks = await self._collect_subtitle_tracks(context.info, languages, platform)
             
             self.logger.info(f"Found {len(subtitle_tracks)} subtitle tracks from {platform}")
             return subtitle_tracks
-            
+        
         except Exception as e:
             self.logger.error(f"Failed to extract subtitles: {str(e)}")
             raise Exception(f"字幕提取失败: {str(e)}")
     
+    async def _collect_subtitle_tracks(self, info: Dict, languages: List[str], platform: str) -> List[SubtitleTrack]:
+        """按手动字幕优先、自动字幕其次的规则收集字幕轨道
+        
+        同一阶段内各语言并发下载；自动字幕是否需要取决于手动字幕的结果，因此分两个阶段
+        """
+        # 1. 处理手动字幕（优先级更高）
+        manual_subtitles = info.get('subtitles', {})
+        jobs = []
+        for lang in languages:
+            available_lang = self._match_available_language(manual_subtitles, lang)
+            if available_lang:
+                jobs.append(partial(
+                    self._extract_subtitle_tracks, manual_subtitles[available_lang], available_lang, False, platform
+                ))
+        
+        results = await self._gather_limited(jobs)
+        subtitle_tracks = [track for tracks in results for track in tracks]
+        
+        # 2. 处理自动生成字幕
+        auto_captions = info.get('automatic_captions', {})
+        jobs = []
+        for lang in languages:
+            # 只有在没有找到手动字幕时才使用自动字幕
+            has_manual = any(track.language == lang and not track.is_auto_generated 
+                           for track in subtitle_tracks)
+            if has_manual:
+                continue
+            
+            available_lang = self._match_available_language(auto_captions, lang)
+            if available_lang:
+                jobs.append(partial(
+                    self._extract_subtitle_tracks, auto_captions[available_lang], available_lang, True, platform
+                ))
+        
+        results = await self._gather_limited(jobs)
+        subtitle_tracks.extend(track for tracks in results for track in tracks)
+        
+        # 3. 如果没有找到任何字幕，尝试英语作为回退
+        if not subtitle_tracks and 'en' not in languages:
+            if 'en' in manual_subtitles:
+                tracks = await self._extract_subtitle_tracks(
+                    manual_subtitles['en'], 'en', False, platform
+                )
+                subtitle_tracks.extend(tracks)
+            elif 'en' in auto_captions:
+                tracks = await self._extract_subtitle_tracks(
+                    auto_captions['en'], 'en', True, platform
+                )
+                subtitle_tracks.extend(tracks)
+        
+        return subtitle_tracks
+    
     async def _extract_subtitle_tracks(
         self, 
         subtitle_formats: List[Dict], 
@@ -166,87 +159,144 @@ class GenericSubtitleExtractor(BaseSubtitleExtractor):
         is_auto_generated: bool,
         platform: str
     ) -> List[SubtitleTrack]:
-        """从字幕格式列表中提取字幕轨道"""
-        tracks = []
+        """从字幕格式列表中提取字幕轨道（每种语言只取最先成功的格式）"""
+        candidates = [
+            format_info for format_info in self._sort_formats(subtitle_formats, platform)
+            if format_info.get('url')
+        ][:app_config.SUBTITLE_HEDGE_MAX_FORMATS]
+        if not candidates:
+            return []
+        
+        result = await self._fetch_first_format(candidates)
+        self._update_format_scores(platform, result[0].get('ext', 'vtt') if result else None)
+        if result is None:
+            return []
+        
+        format_info, segments = result
+        url = format_info.get('url')
+        ext = format_info.get('ext', 'vtt')
         
-        # 按格式优先级排序
-        format_priority = ['vtt', 'srt', 'ttml', 'srv3', 'srv2', 'srv1', 'ass', 'ssa']
-        sorted_formats = sorted(
-            subtitle_formats,
-            key=lambda x: format_priority.index(x.get('ext', 'unknown')) 
-            if x.get('ext', 'unknown') in format_priority else 999
+        # 创建字幕轨道
+        track = SubtitleTrack(
+            language=language,
+            language_name=subtitle_config.SUPPORTED_LANGUAGES.get(language, language),
+            is_auto_generated=is_auto_generated,
+            format=ext,
+            url=url,
+            segments=segments,
+            quality="medium" if is_auto_generated else "high",
+            source=f"{platform}_{'auto' if is_auto_generated else 'manual'}"
         )
         
-        for format_info in sorted_formats[:3]:  # 最多尝试3个格式
-            try:
-                url = format_info.get('url')
-                ext = format_info.get('ext', 'vtt')
-                
-                if not url:
-                    continue
+        self.logger.info(f"Extracted {platform} subtitle: {language} ({ext})")
+        return [track]
+    
+    def _match_available_language(self, available: Dict, lang: str) -> Optional[str]:
+        """在可用字幕中查找请求语言：先精确匹配，再匹配语言变体"""
+        if lang in available:
+            return lang
+        for available_lang in available.keys():
+            if self._language_matches(available_lang, lang):
+                return available_lang
+        return None
+    
+    def _update_format_scores(self, platform: str, winner: Optional[str]):
+        """衰减该平台所有格式的得分，胜出格式加1（全部失败时只衰减）"""
+        scores = self.format_scores[platform]
+        decay = app_config.SUBTITLE_FORMAT_SCORE_DECAY
+        for ext in scores:
+            scores[ext] *= decay
+        if winner is not None:
+            scores[winner] = scores.get(winner, 0.0) + 1
+    
+    def _sort_formats(self, subtitle_formats: List[Dict], platform: str) -> List[Dict]:
+        """按该平台格式得分、其次按默认优先级排序字幕格式"""
+        scores = self.format_scores.get(platform, {})
+        
+        def sort_key(format_info: Dict) -> Tuple[float, int]:
+            ext = format_info.get('ext', 'unknown')
+            priority = FORMAT_PRIORITY.index(ext) if ext in FORMAT_PRIORITY else 999
+            return -scores.get(ext, 0.0), priority
+        
+        return sorted(subtitle_formats, key=sort_key)
+    
+    async def _fetch_first_format(self, candidates: List[Dict]) -> Optional[Tuple[Dict, List[SubtitleSegment]]]:
+        """对冲请求候选格式：首选格式超过对冲延迟仍未完成时启动下一个（失败时立即启动），返回最先成功解析的结果
+        
+        关闭对冲时退化为依次尝试（前一个失败后才请求下一个）
+        """
+        hedge_delay = app_config.SUBTITLE_HEDGE_DELAY if app_config.SUBTITLE_HEDGE_ENABLED else None
+        pending = set()
+        next_index = 0
+        
+        try:
+            while pending or next_index < len(candidates):
+                if not pending:
+                    pending.add(asyncio.ensure_future(self._fetch_format(candidates[next_index])))
+                    next_index += 1
                 
-                # 下载字幕内容
-                content = await self.download_subtitle_content(url, ext)
-                if not content:
-                    continue
+                timeout = hedge_delay if next_index < len(candidates) else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
                 
-                # 解析字幕
-                segments = self.parse_subtitle_content(content, ext)
-                if not segments:
+                if not done:
+                    # 当前请求较慢，再并发请求下一个候选格式
+                    self.logger.debug(f"Hedging subtitle fetch with format {candidates[next_index].get('ext')}")
+                    pending.add(asyncio.ensure_future(self._fetch_format(candidates[next_index])))
+                    next_index += 1
                     continue
                 
-                # 创建字幕轨道
-                track = SubtitleTrack(
-                    language=language,
-                    language_name=subtitle_config.SUPPORTED_LANGUAGES.get(language, language),
-                    is_auto_generated=is_auto_generated,
-                    format=ext,
-                    url=url,
-                    segments=segments,
-                    quality="medium" if is_auto_generated else "high",
-                    source=f"{platform}_{'auto' if is_auto_generated else 'manual'}"
-                )
-                
-                tracks.append(track)
-                self.logger.info(f"Extracted {platform} subtitle: {language} ({ext})")
-                
-                # 对于每种语言，只取第一个成功的格式
-                break
+                for task in done:
+                    result = task.result()
+                    if result is not None:
+                        return result
                 
-            except Exception as e:
-                self.logger.warning(f"Failed to extract subtitle format {format_info.get('ext')}: {str(e)}")
-                continue
+                if next_index < len(candidates):
+                    # 已完成的请求都失败了，不必等待对冲延迟，立即请求下一个候选格式
+                    pending.add(asyncio.ensure_future(self._fetch_format(candidates[next_index])))
+                    next_index += 1
+            
+            return None
         
-        return tracks
+        finally:
+            # 取消仍在进行的其他格式请求
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
     
-    def _detect_platform(self, url: str, info: Dict) -> str:
-        """检测视频平台"""
-        # 从URL检测
-        parsed = urlparse(url.lower())
-        domain = parsed.netloc.replace('www.', '').replace('m.', '')
+    async def _fetch_format(self, format_info: Dict) -> Optional[Tuple[Dict, List[SubtitleSegment]]]:
+        """下载并解析单个格式的字幕，失败时返回None"""
+        ext = format_info.get('ext', 'vtt')
+        try:
+            # 下载字幕内容
+            content = await self.download_subtitle_content(format_info['url'], ext)
+            if not content:
+                return None
+            
+            # 解析字幕
+            segments = self.parse_subtitle_content(content, ext)
+            if not segments:
+                return None
+            
+            return format_info, segments
         
-        platform_mapping = {
-            'youtube.com': 'youtube',
-            'youtu.be': 'youtube',
-            'bilibili.com': 'bilibili',
-            'b23.tv': 'bilibili',
-            'twitter.com': 'twitter',
-            'x.com': 'twitter',
-            'facebook.com': 'facebook',
-            'fb.watch': 'facebook',
-            'instagram.com': 'instagram',
-            'tiktok.com': 'tiktok',
-            'vimeo.com': 'vimeo',
-            'dailymotion.com': 'dailymotion',
-            'twitch.tv': 'twitch',
-            'streamable.com': 'streamable',
-            'reddit.com': 'reddit',
-            'imgur.com': 'imgur',
+        except Exception as e:
+            self.logger.warning(f"Failed to extract subtitle format {ext}: {str(e)}")
+            return None
+    
+    def get_format_stats(self) -> Dict[str, Dict[str, float]]:
+        """获取各平台字幕格式的得分"""
+        return {
+            platform: {ext: round(score, 3) for ext, score in scores.items()}
+            for platform, scores in self.format_scores.items()
         }
-        
-        for platform_domain, platform_name in platform_mapping.items():
-            if platform_domain in domain:
-                return platform_name
+    
+    def _detect_platform(self, url: str, info: Dict) -> str:
+        """检测视频平台"""
+        # 从URL检测（域名后缀索引，由PLATFORM_CONFIGS生成）
+        platform = platform_router.match(url)
+        if platform:
+            return platform
         
         # 从extractor info检测
         extractor = info.get('extractor', '').lower()
@@ -270,44 +320,6 @@ class GenericSubtitleExtractor(BaseSubtitleExtractor):
         # 默认返回generic
         return 'generic'
     
-    def _extract_formats_info(self, info: Dict) -> Dict:
-        """提取格式信息"""
-        formats_info = {
-            'available_formats': [],
-            'best_video': None,
-            'best_audio': None,
-        }
-        
-        formats = info.get('formats', [])
-        
-        for f in formats:
-            format_info = {
-                'format_id': f.get('format_id'),
-                'ext': f.get('ext'),
-                'resolution': f.get('resolution'),
-                'fps': f.get('fps'),
-                'vcodec': f.get('vcodec'),
-                'acodec': f.get('acodec'),
-                'filesize': f.get('filesize'),
-                'quality': f.get('quality'),
-                'url': f.get('url', '').split('?')[0] if f.get('url') else ''
-            }
-            formats_info['available_formats'].append(format_info)
-        
-        # 找出最佳视频和音频格式
-        video_formats = [f for f in formats if f.get('vcodec') != 'none']
-        audio_formats = [f for f in formats if f.get('acodec') != 'none' and f.get('vcodec') == 'none']
-        
-        if video_formats:
-            best_video = max(video_formats, key=lambda x: (x.get('height', 0), x.get('fps', 0)))
-            formats_info['best_video'] = best_video.get('format_id')
-        
-        if audio_formats:
-            best_audio = max(audio_formats, key=lambda x: x.get('abr', 0))
-            formats_info['best_audio'] = best_audio.get('format_id')
-        
-        return formats_info
-    
     def _language_matches(self, subtitle_lang: str, request_lang: str) -> bool:
         """检查字幕语言是否匹配请求语言"""
         if subtitle_lang == request_lang:
@@ -338,30 +350,27 @@ class GenericSubtitleExtractor(BaseSubtitleExtractor):
     async def get_extractor_info(self, url: str) -> Dict[str, Any]:
         """获取yt-dlp提取器信息"""
         try:
-            with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
-                # 获取提取器信息而不下载
-                ie_result = await asyncio.get_event_loop().run_in_executor(
-                    None, ydl.extract_info, url, False
-                )
-                
-                return {
-                    'extractor': ie_result.get('extractor', ''),
-                    'extractor_key': ie_result.get('extractor_key', ''),
-                    'webpage_url': ie_result.get('webpage_url', ''),
-                    'original_url': ie_result.get('original_url', ''),
-                    'title': ie_result.get('title', ''),
-                    'description': ie_result.get('description', ''),
-                    'duration': ie_result.get('duration', 0),
-                    'view_count': ie_result.get('view_count', 0),
-                    'like_count': ie_result.get('like_count', 0),
-                    'dislike_count': ie_result.get('dislike_count', 0),
-                    'uploader': ie_result.get('uploader', ''),
-                    'upload_date': ie_result.get('upload_date', ''),
-                    'thumbnail': ie_result.get('thumbnail', ''),
-                    'tags': ie_result.get('tags', []),
-                    'categories': ie_result.get('categories', []),
-                }
-                
+            # 获取提取器信息而不下载
+            ie_result = await run_in_executor('extraction', ydl_pool.extract_info, {'quiet': True}, url)
+            
+            return {
+                'extractor': ie_result.get('extractor', ''),
+                'extractor_key': ie_result.get('extractor_key', ''),
+                'webpage_url': ie_result.get('webpage_url', ''),
+                'original_url': ie_result.get('original_url', ''),
+                'title': ie_result.get('title', ''),
+                'description': ie_result.get('description', ''),
+                'duration': ie_result.get('duration', 0),
+                'view_count': ie_result.get('view_count', 0),
+                'like_count': ie_result.get('like_count', 0),
+                'dislike_count': ie_result.get('dislike_count', 0),
+                'uploader': ie_result.get('uploader', ''),
+                'upload_date': ie_result.get('upload_date', ''),
+                'thumbnail': ie_result.get('thumbnail', ''),
+                'tags': ie_result.get('tags', []),
+                'categories': ie_result.get('categories', []),
+            }
+        
         except Exception as e:
             self.logger.error(f"Failed to get extractor info: {str(e)}")
             return {}
@@ -370,22 +379,21 @@ class GenericSubtitleExtractor(BaseSubtitleExtractor):
         """测试是否可以从URL提取信息"""
         try:
             # 快速测试
-            with yt_dlp.YoutubeDL({'quiet': True, 'simulate': True}) as ydl:
-                info = await asyncio.get_event_loop().run_in_executor(
-                    None, ydl.extract_info, url, False
-                )
-                
-                return {
-                    'extractable': True,
-                    'platform': self._detect_platform(url, info),
-                    'title': info.get('title', ''),
-                    'has_subtitles': bool(info.get('subtitles') or info.get('automatic_captions')),
-                    'subtitle_languages': list(info.get('subtitles', {}).keys()) + 
-                                        list(info.get('automatic_captions', {}).keys()),
-                    'duration': info.get('duration', 0),
-                    'extractor': info.get('extractor', ''),
-                }
-                
+            info = await run_in_executor(
+                'extraction', ydl_pool.extract_info, {'quiet': True, 'simulate': True}, url
+            )
+            
+            return {
+                'extractable': True,
+                'platform': self._detect_platform(url, info),
+                'title': info.get('title', ''),
+                'has_subtitles': bool(info.get('subtitles') or info.get('automatic_captions')),
+                'subtitle_languages': list(info.get('subtitles', {}).keys()) + 
+                                    list(info.get('automatic_captions', {}).keys()),
+                'duration': info.get('duration', 0),
+                'extractor': info.get('extractor', ''),
+            }
+        
         except Exception as e:
             return {
                 'extractable': False,
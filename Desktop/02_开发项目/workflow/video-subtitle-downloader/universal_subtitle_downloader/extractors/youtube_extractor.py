@@ -7,21 +7,32 @@ import re
 import json
 import logging
 import asyncio
-from typing import Dict, List, Optional, Tuple
-from urllib.parse import urlparse, parse_qs
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 import aiohttp
-import yt_dlp
-from .base_extractor import BaseSubtitleExtractor, SubtitleTrack, SubtitleSegment, VideoInfo
+from .base_extractor import BaseSubtitleExtractor, SubtitleTrack, SubtitleSegment, VideoInfo, ExtractionContext
 from ..config import subtitle_config, app_config, USER_AGENTS
+from ..url_canonicalizer import canonicalize_url
+from ..platform_router import platform_router
+from ..live_captions import LiveCaptionFollower, LiveCaptionWriter
+from ..circuit_breaker import circuit_breakers
 import random
+from functools import partial
 
 logger = logging.getLogger(__name__)
 
+YOUTUBE_WATCH_URL = "https://www.youtube.com/watch"
+PLAYER_RESPONSE_RE = re.compile(r'ytInitialPlayerResponse\s*=\s*')
+
+# 快速路径请求的timedtext格式（按优先级）
+TIMEDTEXT_FORMATS = ['vtt', 'srv3', 'json3']
+
 class YouTubeSubtitleExtractor(BaseSubtitleExtractor):
     """YouTube专用字幕提取器"""
     
-    def __init__(self, proxy_manager=None, session: aiohttp.ClientSession = None):
-        super().__init__(proxy_manager, session)
+    def __init__(self, proxy_manager=None, session: aiohttp.ClientSession = None, metadata_cache=None,
+                 extraction_pool=None):
+        super().__init__(proxy_manager, session, metadata_cache, extraction_pool)
         self.platform_name = "YouTube"
         
         # YouTube特定配置
@@ -35,45 +46,153 @@ class YouTubeSubtitleExtractor(BaseSubtitleExtractor):
     
     def can_handle(self, url: str) -> bool:
         """检查是否为YouTube URL"""
-        parsed = urlparse(url.lower())
-        return any(domain in parsed.netloc for domain in [
-            'youtube.com', 'youtu.be', 'm.youtube.com', 'music.youtube.com'
-        ])
+        return platform_router.match(url) == 'youtube'
     
-    async def extract_video_info(self, url: str) -> VideoInfo:
-        """提取YouTube视频信息"""
-        try:
-            self.logger.info(f"Extracting video info from: {url}")
+    def get_cache_key(self, url: str) -> Optional[Tuple[str, str]]:
+        """YouTube缓存键：规范化后的视频ID"""
+        video_id = self._extract_video_id(url)
+        return ('youtube', video_id) if video_id else None
+    
+    def _build_video_info(self, url: str, info: Dict, extra: Dict) -> VideoInfo:
+        """构建YouTube视频信息"""
+        return VideoInfo(
+            id=info.get('id', ''),
+            title=info.get('title', 'Unknown'),
+            duration=info.get('duration', 0),
+            uploader=info.get('uploader', 'Unknown'),
+            upload_date=info.get('upload_date', ''),
+            view_count=info.get('view_count', 0),
+            description=(info.get('description', '') or '')[:500],
+            thumbnail=info.get('thumbnail', ''),
+            webpage_url=info.get('webpage_url', url),
+            platform='youtube',
+            available_subtitles=list(info.get('subtitles', {}).keys()),
+            automatic_captions=list(info.get('automatic_captions', {}).keys())
+        )
+    
+    async def _fetch_metadata(self, url: str, captions_only: bool = False) -> Tuple[Dict, Dict]:
+        """获取YouTube元数据：只需字幕时优先走timedtext快速路径，失败再用yt-dlp完整提取"""
+        video_id = self._extract_video_id(url)
+        if captions_only and video_id and app_config.YOUTUBE_TIMEDTEXT_FAST_PATH:
+            try:
+                info = await self._fetch_caption_info(video_id)
+                self.logger.info(f"Resolved caption tracks via timedtext fast path: {video_id}")
+                return info, {'partial': True}
+            except Exception as e:
+                self.logger.info(f"Timedtext fast path unavailable for {video_id}, falling back to yt-dlp: {str(e)}")
+        
+        return await self._extract_info(url), {}
+    
+    async def _fetch_caption_info(self, video_id: str) -> Dict:
+        """请求观看页，从ytInitialPlayerResponse构建与yt-dlp结构一致的字幕信息（不含formats）"""
+        headers = {
+            'User-Agent': random.choice(USER_AGENTS),
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Cookie': 'CONSENT=YES+1',  # 跳过欧盟同意页
+        }
+        params = {'v': video_id, 'hl': 'en', 'has_verified': '1'}
+        
+        async with self._proxied(YOUTUBE_WATCH_URL, http_only=True) as proxy, self._http_session() as session:
+            async with session.get(YOUTUBE_WATCH_URL, params=params, headers=headers, proxy=proxy) as response:
+                if response.status != 200:
+                    raise Exception(f"HTTP {response.status}: Failed to load watch page")
+                html = await response.text()
+        
+        player_response = self._parse_player_response(html)
+        return self._build_caption_info(video_id, player_response)
+    
+    def _parse_player_response(self, html: str) -> Dict:
+        """从观看页HTML中解析ytInitialPlayerResponse"""
+        match = PLAYER_RESPONSE_RE.search(html)
+        if not match:
+            raise Exception("页面中未找到ytInitialPlayerResponse")
+        
+        player_response, _ = json.JSONDecoder().raw_decode(html, match.end())
+        if not isinstance(player_response, dict):
+            raise Exception("ytInitialPlayerResponse为空")
+        
+        status = player_response.get('playabilityStatus', {}).get('status')
+        if status != 'OK':
+            raise Exception(f"视频不可播放: {status}")
+        
+        return player_response
+    
+    def _build_caption_info(self, video_id: str, player_response: Dict) -> Dict:
+        """将播放器响应转换为yt-dlp风格的信息字典"""
+        details = player_response.get('videoDetails', {})
+        microformat = player_response.get('microformat', {}).get('playerMicroformatRenderer', {})
+        renderer = player_response.get('captions', {}).get('playerCaptionsTracklistRenderer', {})
+        caption_tracks = renderer.get('captionTracks', [])
+        
+        subtitles = {}
+        automatic_captions = {}
+        for track in caption_tracks:
+            base_url = track.get('baseUrl')
+            lang = track.get('languageCode')
+            if not base_url or not lang:
+                continue
             
-            with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                info = await asyncio.get_event_loop().run_in_executor(
-                    None, ydl.extract_info, url, False
-                )
-                
-                video_info = VideoInfo(
-                    id=info.get('id', ''),
-                    title=info.get('title', 'Unknown'),
-                    duration=info.get('duration', 0),
-                    uploader=info.get('uploader', 'Unknown'),
-                    upload_date=info.get('upload_date', ''),
-                    view_count=info.get('view_count', 0),
-                    description=(info.get('description', '') or '')[:500],
-                    thumbnail=info.get('thumbnail', ''),
-                    webpage_url=info.get('webpage_url', url),
-                    platform='youtube',
-                    available_subtitles=list(info.get('subtitles', {}).keys()),
-                    automatic_captions=list(info.get('automatic_captions', {}).keys()),
-                    formats_info=self._extract_formats_info(info)
-                )
-                
-                self.logger.info(f"Extracted info for: {video_info.title}")
-                return video_info
-                
-        except Exception as e:
-            self.logger.error(f"Failed to extract video info: {str(e)}")
-            raise Exception(f"YouTube视频信息提取失败: {str(e)}")
+            target = automatic_captions if track.get('kind') == 'asr' else subtitles
+            target.setdefault(lang, self._timedtext_formats(base_url, self._get_text(track.get('name'))))
+        
+        # 与yt-dlp一致：机器翻译字幕作为自动字幕提供
+        translatable = next((t for t in caption_tracks if t.get('isTranslatable') and t.get('baseUrl')), None)
+        if translatable:
+            for language in renderer.get('translationLanguages', []):
+                code = language.get('languageCode')
+                if code and code not in subtitles and code not in automatic_captions:
+                    automatic_captions[code] = self._timedtext_formats(
+                        translatable['baseUrl'], self._get_text(language.get('languageName')), tlang=code
+                    )
+        
+        thumbnails = details.get('thumbnail', {}).get('thumbnails', [])
+        upload_date = (microformat.get('uploadDate') or microformat.get('publishDate') or '')[:10]
+        
+        return {
+            'id': video_id,
+            'title': details.get('title', 'Unknown'),
+            'duration': int(details.get('lengthSeconds') or 0),
+            'uploader': details.get('author', 'Unknown'),
+            'upload_date': upload_date.replace('-', ''),
+            'view_count': int(details.get('viewCount') or 0),
+            'description': details.get('shortDescription', ''),
+            'thumbnail': thumbnails[-1].get('url', '') if thumbnails else '',
+            'webpage_url': f"{YOUTUBE_WATCH_URL}?v={video_id}",
+            'extractor': 'youtube',
+            'extractor_key': 'Youtube',
+            'is_live': bool(details.get('isLive')),
+            'subtitles': subtitles,
+            'automatic_captions': automatic_captions,
+            'formats': [],
+        }
     
-    async def extract_subtitles(self, url: str, languages: List[str] = None) -> List[SubtitleTrack]:
+    def _timedtext_formats(self, base_url: str, name: str, tlang: Optional[str] = None) -> List[Dict]:
+        """为字幕轨道生成各格式的timedtext URL"""
+        parsed = urlparse(base_url)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        if tlang:
+            query['tlang'] = tlang
+        
+        formats = []
+        for ext in TIMEDTEXT_FORMATS:
+            query['fmt'] = ext
+            formats.append({
+                'ext': ext,
+                'url': urlunparse(parsed._replace(query=urlencode(query))),
+                'name': name,
+            })
+        return formats
+    
+    def _get_text(self, obj: Optional[Dict]) -> str:
+        """读取YouTube文本对象（simpleText或runs）"""
+        if not obj:
+            return ''
+        if 'simpleText' in obj:
+            return obj['simpleText']
+        return ''.join(run.get('text', '') for run in obj.get('runs', []))
+    
+    async def extract_subtitles(self, url: str, languages: List[str] = None,
+                                context: Optional[ExtractionContext] = None) -> List[SubtitleTrack]:
         """提取YouTube字幕"""
         try:
             if languages is None:
@@ -81,42 +200,18 @@ class YouTubeSubtitleExtractor(BaseSubtitleExtractor):
             
             self.logger.info(f"Extracting subtitles for languages: {languages}")
             
-            # 获取字幕信息
-            with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                info = await asyncio.get_event_loop().run_in_executor(
-                    None, ydl.extract_info, url, False
-                )
+            # 获取字幕信息（优先复用已有的提取上下文）
+            if context is None:
+                context = await self.extract_context(url, captions_only=True)
+            context = await self._ensure_fresh_captions(context)
             
-            subtitle_tracks = []
+            subtitle_tracks = await self._collect_subtitle_tracks(context.info, languages)
             
-            # 1. 提取手动字幕（优先级最高）
-            manual_subtitles = info.get('subtitles', {})
-            for lang in languages:
-                if lang in manual_subtitles:
-                    tracks = await self._extract_manual_subtitles(manual_subtitles[lang], lang)
-                    subtitle_tracks.extend(tracks)
-            
-            # 2. 提取自动生成字幕
-            auto_captions = info.get('automatic_captions', {})
-            for lang in languages:
-                # 优先使用精确匹配
-                if lang in auto_captions:
-                    tracks = await self._extract_auto_captions(auto_captions[lang], lang)
-                    subtitle_tracks.extend(tracks)
-                # 尝试语言变体
-                elif lang.split('-')[0] in auto_captions:
-                    base_lang = lang.split('-')[0]
-                    tracks = await self._extract_auto_captions(auto_captions[base_lang], base_lang)
-                    subtitle_tracks.extend(tracks)
-            
-            # 3. 如果没有找到字幕，尝试英语作为后备
-            if not subtitle_tracks and 'en' not in languages:
-                if 'en' in manual_subtitles:
-                    tracks = await self._extract_manual_subtitles(manual_subtitles['en'], 'en')
-                    subtitle_tracks.extend(tracks)
-                elif 'en' in auto_captions:
-                    tracks = await self._extract_auto_captions(auto_captions['en'], 'en')
-                    subtitle_tracks.extend(tracks)
+            # 缓存中的字幕URL可能已失效、或快速路径的timedtext请求失败，用yt-dlp完整提取后再试
+            retry = context.from_cache or context.extra.get('partial')
+            if not subtitle_tracks and retry and self._has_listed_captions(context.info, languages):
+                context = await self.refresh_context(context)
+                subtitle_tracks = await self._collect_subtitle_tracks(context.info, languages)
             
             self.logger.info(f"Found {len(subtitle_tracks)} subtitle tracks")
             return subtitle_tracks
@@ -125,12 +220,47 @@ class YouTubeSubtitleExtractor(BaseSubtitleExtractor):
             self.logger.error(f"Failed to extract subtitles: {str(e)}")
             raise Exception(f"YouTube字幕提取失败: {str(e)}")
     
+    async def _collect_subtitle_tracks(self, info: Dict, languages: List[str]) -> List[SubtitleTrack]:
+        """按手动字幕优先、自动字幕其次的规则收集字幕轨道（各轨道并发下载，结果保持该顺序）"""
+        jobs = []
+        
+        # 1. 提取手动字幕（优先级最高）
+        manual_subtitles = info.get('subtitles', {})
+        for lang in languages:
+            if lang in manual_subtitles:
+                jobs.append(partial(self._extract_manual_subtitles, manual_subtitles[lang], lang))
+        
+        # 2. 提取自动生成字幕
+        auto_captions = info.get('automatic_captions', {})
+        for lang in languages:
+            # 优先使用精确匹配
+            if lang in auto_captions:
+                jobs.append(partial(self._extract_auto_captions, auto_captions[lang], lang))
+            # 尝试语言变体
+            elif lang.split('-')[0] in auto_captions:
+                base_lang = lang.split('-')[0]
+                jobs.append(partial(self._extract_auto_captions, auto_captions[base_lang], base_lang))
+        
+        results = await self._gather_limited(jobs)
+        subtitle_tracks = [track for tracks in results for track in tracks]
+        
+        # 3. 如果没有找到字幕，尝试英语作为后备
+        if not subtitle_tracks and 'en' not in languages:
+            if 'en' in manual_subtitles:
+                tracks = await self._extract_manual_subtitles(manual_subtitles['en'], 'en')
+                subtitle_tracks.extend(tracks)
+            elif 'en' in auto_captions:
+                tracks = await self._extract_auto_captions(auto_captions['en'], 'en')
+                subtitle_tracks.extend(tracks)
+        
+        return subtitle_tracks
+    
     async def _extract_manual_subtitles(self, subtitle_formats: List[Dict], language: str) -> List[SubtitleTrack]:
         """提取手动字幕"""
         tracks = []
         
         # 按格式优先级排序
-        format_priority = ['vtt', 'srv3', 'srv2', 'srv1', 'ttml']
+        format_priority = ['vtt', 'srv3', 'srv2', 'srv1', 'ttml', 'json3']
         sorted_formats = sorted(
             subtitle_formats, 
             key=lambda x: format_priority.index(x.get('ext', 'unknown')) 
@@ -184,7 +314,7 @@ class YouTubeSubtitleExtractor(BaseSubtitleExtractor):
         tracks = []
         
         # 按格式优先级排序
-        format_priority = ['vtt', 'srv3', 'srv2', 'srv1', 'ttml']
+        format_priority = ['vtt', 'srv3', 'srv2', 'srv1', 'ttml', 'json3']
         sorted_formats = sorted(
             caption_formats, 
             key=lambda x: format_priority.index(x.get('ext', 'unknown')) 
@@ -233,43 +363,6 @@ class YouTubeSubtitleExtractor(BaseSubtitleExtractor):
         
         return tracks
     
-    def _extract_formats_info(self, info: Dict) -> Dict:
-        """提取格式信息"""
-        formats_info = {
-            'available_formats': [],
-            'best_video': None,
-            'best_audio': None,
-        }
-        
-        formats = info.get('formats', [])
-        
-        for f in formats:
-            format_info = {
-                'format_id': f.get('format_id'),
-                'ext': f.get('ext'),
-                'resolution': f.get('resolution'),
-                'fps': f.get('fps'),
-                'vcodec': f.get('vcodec'),
-                'acodec': f.get('acodec'),
-                'filesize': f.get('filesize'),
-                'url': f.get('url', '').split('?')[0]  # 移除查询参数
-            }
-            formats_info['available_formats'].append(format_info)
-        
-        # 找出最佳视频和音频格式
-        video_formats = [f for f in formats if f.get('vcodec') != 'none']
-        audio_formats = [f for f in formats if f.get('acodec') != 'none' and f.get('vcodec') == 'none']
-        
-        if video_formats:
-            best_video = max(video_formats, key=lambda x: (x.get('height', 0), x.get('fps', 0)))
-            formats_info['best_video'] = best_video.get('format_id')
-        
-        if audio_formats:
-            best_audio = max(audio_formats, key=lambda x: x.get('abr', 0))
-            formats_info['best_audio'] = best_audio.get('format_id')
-        
-        return formats_info
-    
     async def get_live_captions(self, url: str, language: str = 'en') -> List[SubtitleSegment]:
         """获取直播字幕（如果支持）"""
         try:
@@ -293,62 +386,119 @@ class YouTubeSubtitleExtractor(BaseSubtitleExtractor):
             self.logger.error(f"Failed to get live captions: {str(e)}")
             return []
     
-    def _extract_video_id(self, url: str) -> Optional[str]:
-        """从URL提取视频ID"""
-        patterns = [
-            r'(?:youtube\.com\/watch\?v=|youtu\.be\/)([^&\n?#]+)',
-            r'youtube\.com\/embed\/([^&\n?#]+)',
-            r'youtube\.com\/v\/([^&\n?#]+)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
+    async def follow_live_captions(self, url: str, language: str = 'en',
+                                   writers: Optional[List[LiveCaptionWriter]] = None,
+                                   **kwargs) -> LiveCaptionFollower:
+        """创建直播字幕跟随器（可异步迭代新字幕，并追加写入SRT/VTT文件）"""
+        video_id = self._extract_video_id(url)
+        if not video_id:
+            raise Exception(f"无法识别YouTube视频ID: {url}")
+        
+        # 观看页的字幕地址带签名和过期时间，跟随器在过期或返回403/410时重新获取
+        caption_url = await self._resolve_live_caption_url(url, video_id, language)
+        return LiveCaptionFollower(
+            self, caption_url, writers,
+            refresh_url=partial(self._resolve_live_caption_url, url, video_id, language),
+            **kwargs
+        )
+    
+    async def _resolve_live_caption_url(self, url: str, video_id: str, language: str) -> str:
+        """获取直播字幕地址：优先使用观看页列出的字幕轨道地址（带签名），否则使用直播timedtext接口"""
+        caption_url = None
+        try:
+            context = await self.extract_context(url, use_cache=False, captions_only=True)
+            for captions in (context.info.get('subtitles', {}), context.info.get('automatic_captions', {})):
+                formats = captions.get(language) or []
+                caption_url = next((f.get('url') for f in formats if f.get('ext') == 'vtt' and f.get('url')), None)
+                if caption_url:
+                    break
+        except Exception as e:
+            self.logger.info(f"Caption track list unavailable, using live timedtext endpoint: {str(e)}")
         
+        return caption_url or f"https://www.youtube.com/api/timedtext?v={video_id}&lang={language}&fmt=vtt&live=1"
+    
+    def _extract_video_id(self, url: str) -> Optional[str]:
+        """从URL提取视频ID（支持watch、youtu.be、shorts、embed、live等写法）"""
+        canonical = canonicalize_url(url)
+        if canonical and canonical.platform == 'youtube':
+            return canonical.video_id
         return None
     
     async def search_subtitles_by_query(self, query: str, language: str = 'en', max_results: int = 10) -> List[Dict]:
         """根据查询搜索带字幕的视频"""
         try:
-            # 使用yt-dlp搜索功能
-            search_opts = self.ydl_opts.copy()
-            search_opts.update({
-                'quiet': True,
-                'extract_flat': True,
-            })
-            
-            with yt_dlp.YoutubeDL(search_opts) as ydl:
-                search_results = await asyncio.get_event_loop().run_in_executor(
-                    None, ydl.extract_info, f"ytsearch{max_results}:{query}", False
-                )
-            
-            results = []
-            for entry in search_results.get('entries', []):
-                # 检查是否有字幕
-                video_url = entry.get('url') or f"https://www.youtube.com/watch?v={entry.get('id')}"
-                
-                try:
-                    video_info = await self.extract_video_info(video_url)
-                    if video_info.available_subtitles or video_info.automatic_captions:
-                        results.append({
-                            'title': entry.get('title'),
-                            'url': video_url,
-                            'duration': entry.get('duration'),
-                            'view_count': entry.get('view_count'),
-                            'upload_date': entry.get('upload_date'),
-                            'available_subtitles': video_info.available_subtitles,
-                            'automatic_captions': video_info.automatic_captions,
-                        })
-                except:
-                    continue
-            
-            return results
-            
+            return [result async for result in self.iter_search_subtitles(query, language, max_results)]
         except Exception as e:
             self.logger.error(f"Failed to search subtitles: {str(e)}")
             return []
     
+    async def iter_search_subtitles(self, query: str, language: str = 'en', max_results: int = 10,
+                                    max_candidates: Optional[int] = None,
+                                    concurrency: Optional[int] = None) -> AsyncIterator[Dict]:
+        """并发探测搜索结果的字幕，按完成顺序逐个产出带字幕的视频，找到max_results个后停止"""
+        max_candidates = max_candidates or max_results * app_config.SEARCH_CANDIDATE_FACTOR
+        concurrency = concurrency or app_config.SEARCH_PROBE_CONCURRENCY
+        
+        # 使用yt-dlp搜索功能（只列出条目，不提取详情），与其他yt-dlp调用一样经过限流、熔断、重试和代理评分
+        async def search():
+            async with circuit_breakers.guard(YOUTUBE_WATCH_URL):
+                return await self._extract_info(
+                    f"ytsearch{max_candidates}:{query}",
+                    {'quiet': True, 'extract_flat': True},
+                    route_url=YOUTUBE_WATCH_URL
+                )
+        
+        search_results = await self.retry_with_backoff(search, stage='search')
+        entries = [entry for entry in search_results.get('entries') or [] if entry]
+        if not entries:
+            return
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = [asyncio.ensure_future(self._probe_search_entry(entry, semaphore)) for entry in entries]
+        found = 0
+        
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if result is None:
+                    continue
+                
+                found += 1
+                yield result
+                if found >= max_results:
+                    self.logger.info(f"Found {found} videos with subtitles, stopping remaining probes")
+                    break
+        finally:
+            # 提前停止或调用方不再迭代时取消尚未完成的探测
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def _probe_search_entry(self, entry: Dict, semaphore: asyncio.Semaphore) -> Optional[Dict]:
+        """检查单个搜索结果是否有字幕（只需字幕列表，可走快速路径）"""
+        video_url = entry.get('url') or f"https://www.youtube.com/watch?v={entry.get('id')}"
+        
+        async with semaphore:
+            try:
+                context = await self.extract_context(video_url, captions_only=True)
+            except Exception as e:
+                self.logger.debug(f"Search probe failed for {video_url}: {str(e)}")
+                return None
+        
+        video_info = context.video_info
+        if not (video_info.available_subtitles or video_info.automatic_captions):
+            return None
+        
+        return {
+            'title': entry.get('title') or video_info.title,
+            'url': video_url,
+            'duration': entry.get('duration'),
+            'view_count': entry.get('view_count'),
+            'upload_date': entry.get('upload_date'),
+            'available_subtitles': video_info.available_subtitles,
+            'automatic_captions': video_info.automatic_captions,
+        }
+    
     def get_supported_languages(self) -> Dict[str, str]:
         """获取YouTube支持的字幕语言"""
         # YouTube支持大多数常见语言
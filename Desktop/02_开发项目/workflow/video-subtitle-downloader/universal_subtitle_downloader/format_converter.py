@@ -1,21 +1,52 @@
 """
 智能字幕格式转换器
-支持所有主流字幕格式之间的相互转换
+支持所有主流字幕格式之间的相互转换；文本类格式支持边读边写的流式转换（iter_convert/convert_stream）
 """
 
-import re
+import io
 import json
 import csv
 import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
 from dataclasses import asdict
 import logging
 from .extractors.base_extractor import SubtitleSegment, SubtitleTrack
 from .config import subtitle_config, MIME_TYPES
+from .subtitle_parser import scan_subtitles
+from .subtitle_stream import iter_segments
+from .segment_table import as_table
+from .timestamp_format import iter_timed, format_srt_time, format_vtt_time, format_ass_time
 
 logger = logging.getLogger(__name__)
 
+TTML_TEMPLATE = '''<?xml version="1.0" encoding="UTF-8"?>
+<tt xmlns="http://www.w3.org/ns/ttml"
+    xmlns:tts="http://www.w3.org/ns/ttml#styling"
+    xmlns:ttm="http://www.w3.org/ns/ttml#metadata"
+    xml:lang="{language}">
+  <head>
+    <metadata>
+      <ttm:title>{title}</ttm:title>
+    </metadata>
+    <styling>
+      <style xml:id="defaultStyle"
+             tts:fontFamily="Arial"
+             tts:fontSize="16px"
+             tts:textAlign="center"
+             tts:color="white"/>
+    </styling>
+  </head>
+  <body>
+    <div>
+{paragraphs}
+    </div>
+  </body>
+</tt>'''
+
+# 流式输出时模板在段落处拆开
+TTML_HEAD, TTML_TAIL = TTML_TEMPLATE.split('{paragraphs}')
+
 class SubtitleFormatConverter:
     """字幕格式转换器"""
     
@@ -26,60 +57,70 @@ class SubtitleFormatConverter:
         self.converters = {
             'srt': {
                 'generator': self._generate_srt,
+                'streamer': self._iter_srt,
                 'parser': self._parse_srt,
                 'mime_type': MIME_TYPES['srt'],
                 'description': 'SubRip字幕格式'
             },
             'vtt': {
                 'generator': self._generate_vtt,
+                'streamer': self._iter_vtt,
                 'parser': self._parse_vtt,
                 'mime_type': MIME_TYPES['vtt'],
                 'description': 'WebVTT字幕格式'
             },
             'ass': {
                 'generator': self._generate_ass,
+                'streamer': self._iter_ass,
                 'parser': self._parse_ass,
                 'mime_type': MIME_TYPES['ass'],
                 'description': 'Advanced SubStation Alpha'
             },
             'ssa': {
                 'generator': self._generate_ssa,
+                'streamer': self._iter_ssa,
                 'parser': self._parse_ssa,
                 'mime_type': MIME_TYPES['ssa'],
                 'description': 'SubStation Alpha'
             },
             'txt': {
                 'generator': self._generate_txt,
+                'streamer': self._iter_txt,
                 'parser': None,  # TXT通常不需要解析回字幕
                 'mime_type': MIME_TYPES['txt'],
                 'description': '纯文本格式'
             },
             'json': {
                 'generator': self._generate_json,
+                'streamer': None,  # 需要总数，只能整体生成
                 'parser': self._parse_json,
                 'mime_type': MIME_TYPES['json'],
                 'description': 'JSON格式（包含时间戳）'
             },
             'csv': {
                 'generator': self._generate_csv,
+                'streamer': self._iter_csv,
                 'parser': self._parse_csv,
                 'mime_type': MIME_TYPES['csv'],
                 'description': 'CSV表格格式'
             },
             'xml': {
                 'generator': self._generate_xml,
+                'streamer': None,  # 需要总数，只能整体生成
                 'parser': self._parse_xml,
                 'mime_type': MIME_TYPES['xml'],
                 'description': 'XML格式'
             },
             'ttml': {
                 'generator': self._generate_ttml,
+                'streamer': self._iter_ttml,
                 'parser': self._parse_ttml,
                 'mime_type': MIME_TYPES['ttml'],
                 'description': 'Timed Text Markup Language'
             },
             'dfxp': {
                 'generator': self._generate_dfxp,
+                'streamer': self._iter_ttml,
                 'parser': self._parse_dfxp,
                 'mime_type': MIME_TYPES['dfxp'],
                 'description': 'Distribution Format Exchange Profile'
@@ -114,7 +155,48 @@ class SubtitleFormatConverter:
         generator = converter['generator']
         
         # 创建临时轨道对象
-        temp_track = SubtitleTrack(
+        temp_track = self._temp_track(segments, target_format, **kwargs)
+        
+        try:
+            content = generator(segments, temp_track)
+            self.logger.info(f"Converted {len(segments)} segments to {target_format}")
+            return content
+        except Exception as e:
+            self.logger.error(f"Failed to convert to {target_format}: {str(e)}")
+            raise
+    
+    def iter_convert(self, segments: Iterable[SubtitleSegment], target_format: str, **kwargs) -> Iterator[str]:
+        """流式转换：逐个消费字幕片段并产出输出文本块，拼接结果与convert_segments相同
+        
+        json/xml需要片段总数，会先收集全部片段再整体生成
+        """
+        if target_format not in self.converters:
+            raise ValueError(f"Unsupported target format: {target_format}")
+        
+        streamer = self.converters[target_format]['streamer']
+        if streamer is None:
+            yield self.convert_segments(list(segments), target_format, **kwargs)
+            return
+        
+        yield from streamer(segments, self._temp_track([], target_format, **kwargs))
+    
+    def convert_stream(self, source: Any, source_format: str, target_format: str, output: TextIO, **kwargs) -> int:
+        """边解析边转换边写入（source见subtitle_stream.iter_segments），返回写入的片段数"""
+        count = 0
+        
+        def counted():
+            nonlocal count
+            for segment in iter_segments(source, source_format):
+                count += 1
+                yield segment
+        
+        for chunk in self.iter_convert(counted(), target_format, **kwargs):
+            output.write(chunk)
+        self.logger.info(f"Converted {count} segments from {source_format} to {target_format} (streaming)")
+        return count
+    
+    def _temp_track(self, segments: List[SubtitleSegment], target_format: str, **kwargs) -> SubtitleTrack:
+        return SubtitleTrack(
             language=kwargs.get('language', 'unknown'),
             language_name=kwargs.get('language_name', 'Unknown'),
             is_auto_generated=kwargs.get('is_auto_generated', False),
@@ -124,14 +206,6 @@ class SubtitleFormatConverter:
             quality=kwargs.get('quality', 'unknown'),
             source=kwargs.get('source', 'converted')
         )
-        
-        try:
-            content = generator(segments, temp_track)
-            self.logger.info(f"Converted {len(segments)} segments to {target_format}")
-            return content
-        except Exception as e:
-            self.logger.error(f"Failed to convert to {target_format}: {str(e)}")
-            raise
     
     def parse_subtitle_file(self, content: str, source_format: str) -> List[SubtitleSegment]:
         """解析字幕文件内容"""
@@ -152,110 +226,47 @@ class SubtitleFormatConverter:
             self.logger.error(f"Failed to parse {source_format}: {str(e)}")
             raise
     
+    def _parse_with(self, content: str, source_format: str) -> List[SubtitleSegment]:
+        """使用subtitle_parser中的扫描函数解析"""
+        return [SubtitleSegment(start, end, text) for start, end, text in scan_subtitles(content, source_format)]
+    
     # SRT格式处理
     def _generate_srt(self, segments: List[SubtitleSegment], track: SubtitleTrack) -> str:
         """生成SRT格式字幕"""
-        srt_content = []
-        
-        for i, segment in enumerate(segments, 1):
-            start_time = self._seconds_to_srt_time(segment.start_time)
-            end_time = self._seconds_to_srt_time(segment.end_time)
-            
-            srt_content.append(f"{i}")
-            srt_content.append(f"{start_time} --> {end_time}")
-            srt_content.append(segment.text)
-            srt_content.append("")  # 空行分隔
-        
-        return '\n'.join(srt_content)
+        return ''.join(self._iter_srt(segments, track))
+    
+    def _iter_srt(self, segments: Iterable[SubtitleSegment], track: SubtitleTrack) -> Iterator[str]:
+        separator = ''
+        for i, (segment, start_time, end_time) in enumerate(iter_timed(segments, 'srt'), 1):
+            yield f"{separator}{i}\n{start_time} --> {end_time}\n{segment.text}\n"
+            separator = '\n'  # 空行分隔
     
     def _parse_srt(self, content: str) -> List[SubtitleSegment]:
         """解析SRT格式字幕"""
-        segments = []
-        blocks = re.split(r'\n\s*\n', content.strip())
-        
-        for block in blocks:
-            lines = block.strip().split('\n')
-            if len(lines) >= 3:
-                # 跳过序号行
-                time_line = lines[1]
-                text_lines = lines[2:]
-                
-                time_match = re.match(r'(\d+:[\d:,]+)\s+-->\s+(\d+:[\d:,]+)', time_line)
-                if time_match:
-                    start_time = self._srt_time_to_seconds(time_match.group(1))
-                    end_time = self._srt_time_to_seconds(time_match.group(2))
-                    text = '\n'.join(text_lines)
-                    
-                    segments.append(SubtitleSegment(
-                        start_time=start_time,
-                        end_time=end_time,
-                        text=text
-                    ))
-        
-        return segments
+        return self._parse_with(content, 'srt')
     
     # VTT格式处理
     def _generate_vtt(self, segments: List[SubtitleSegment], track: SubtitleTrack) -> str:
         """生成VTT格式字幕"""
-        vtt_content = ["WEBVTT"]
-        
+        return ''.join(self._iter_vtt(segments, track))
+    
+    def _iter_vtt(self, segments: Iterable[SubtitleSegment], track: SubtitleTrack) -> Iterator[str]:
         # 添加元数据
-        if track.language:
-            vtt_content.append(f"Language: {track.language}")
-        
-        vtt_content.append("")  # 空行
-        
-        for segment in segments:
-            start_time = self._seconds_to_vtt_time(segment.start_time)
-            end_time = self._seconds_to_vtt_time(segment.end_time)
-            
-            vtt_content.append(f"{start_time} --> {end_time}")
-            vtt_content.append(segment.text)
-            vtt_content.append("")  # 空行分隔
+        yield f"WEBVTT\nLanguage: {track.language}\n" if track.language else "WEBVTT\n"
         
-        return '\n'.join(vtt_content)
+        for segment, start_time, end_time in iter_timed(segments, 'vtt'):
+            yield f"\n{start_time} --> {end_time}\n{segment.text}\n"  # 空行分隔
     
     def _parse_vtt(self, content: str) -> List[SubtitleSegment]:
         """解析VTT格式字幕"""
-        segments = []
-        lines = content.split('\n')
-        
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            
-            # 查找时间戳行
-            if '-->' in line:
-                time_match = re.match(r'(\d+:[\d:.]+)\s+-->\s+(\d+:[\d:.]+)', line)
-                if time_match:
-                    start_time = self._vtt_time_to_seconds(time_match.group(1))
-                    end_time = self._vtt_time_to_seconds(time_match.group(2))
-                    
-                    # 获取字幕文本
-                    i += 1
-                    text_lines = []
-                    while i < len(lines) and lines[i].strip():
-                        text_line = lines[i].strip()
-                        # 移除VTT标签
-                        text_line = re.sub(r'<[^>]+>', '', text_line)
-                        if text_line:
-                            text_lines.append(text_line)
-                        i += 1
-                    
-                    if text_lines:
-                        text = '\n'.join(text_lines)
-                        segments.append(SubtitleSegment(
-                            start_time=start_time,
-                            end_time=end_time,
-                            text=text
-                        ))
-            i += 1
-        
-        return segments
+        return self._parse_with(content, 'vtt')
     
     # ASS格式处理
     def _generate_ass(self, segments: List[SubtitleSegment], track: SubtitleTrack) -> str:
         """生成ASS格式字幕"""
+        return ''.join(self._iter_ass(segments, track))
+    
+    def _iter_ass(self, segments: Iterable[SubtitleSegment], track: SubtitleTrack) -> Iterator[str]:
         ass_content = [
             "[Script Info]",
             f"Title: {track.language_name} Subtitles",
@@ -268,55 +279,23 @@ class SubtitleFormatConverter:
             "[Events]",
             "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text"
         ]
+        yield '\n'.join(ass_content)
         
-        for segment in segments:
-            start_time = self._seconds_to_ass_time(segment.start_time)
-            end_time = self._seconds_to_ass_time(segment.end_time)
+        for segment, start_time, end_time in iter_timed(segments, 'ass'):
             text = segment.text.replace('\n', '\\N')  # ASS换行符
             
-            ass_content.append(f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{text}")
-        
-        return '\n'.join(ass_content)
+            yield f"\nDialogue: 0,{start_time},{end_time},Default,,0,0,0,,{text}"
     
     def _parse_ass(self, content: str) -> List[SubtitleSegment]:
         """解析ASS格式字幕"""
-        segments = []
-        lines = content.split('\n')
-        
-        # 查找事件部分
-        in_events = False
-        for line in lines:
-            line = line.strip()
-            
-            if line.startswith('[Events]'):
-                in_events = True
-                continue
-            elif line.startswith('[') and in_events:
-                break
-            
-            if in_events and line.startswith('Dialogue:'):
-                parts = line.split(',', 9)
-                if len(parts) >= 10:
-                    start_time = self._ass_time_to_seconds(parts[1])
-                    end_time = self._ass_time_to_seconds(parts[2])
-                    text = parts[9]
-                    
-                    # 清理ASS标签
-                    text = re.sub(r'\{[^}]*\}', '', text)
-                    text = text.replace('\\N', '\n')
-                    
-                    if text.strip():
-                        segments.append(SubtitleSegment(
-                            start_time=start_time,
-                            end_time=end_time,
-                            text=text.strip()
-                        ))
-        
-        return segments
+        return self._parse_with(content, 'ass')
     
     # SSA格式处理（与ASS类似但更简单）
     def _generate_ssa(self, segments: List[SubtitleSegment], track: SubtitleTrack) -> str:
         """生成SSA格式字幕"""
+        return ''.join(self._iter_ssa(segments, track))
+    
+    def _iter_ssa(self, segments: Iterable[SubtitleSegment], track: SubtitleTrack) -> Iterator[str]:
         ssa_content = [
             "[Script Info]",
             f"Title: {track.language_name} Subtitles",
@@ -329,15 +308,12 @@ class SubtitleFormatConverter:
             "[Events]",
             "Format: Marked, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text"
         ]
+        yield '\n'.join(ssa_content)
         
-        for segment in segments:
-            start_time = self._seconds_to_ass_time(segment.start_time)
-            end_time = self._seconds_to_ass_time(segment.end_time)
+        for segment, start_time, end_time in iter_timed(segments, 'ass'):
             text = segment.text.replace('\n', '\\n')
             
-            ssa_content.append(f"Dialogue: Marked=0,{start_time},{end_time},Default,,0,0,0,,{text}")
-        
-        return '\n'.join(ssa_content)
+            yield f"\nDialogue: Marked=0,{start_time},{end_time},Default,,0,0,0,,{text}"
     
     def _parse_ssa(self, content: str) -> List[SubtitleSegment]:
         """解析SSA格式字幕（与ASS解析类似）"""
@@ -346,14 +322,15 @@ class SubtitleFormatConverter:
     # TXT格式处理
     def _generate_txt(self, segments: List[SubtitleSegment], track: SubtitleTrack) -> str:
         """生成纯文本格式"""
-        txt_lines = []
-        
+        return ''.join(self._iter_txt(segments, track))
+    
+    def _iter_txt(self, segments: Iterable[SubtitleSegment], track: SubtitleTrack) -> Iterator[str]:
+        separator = ''
         for segment in segments:
             # 格式：[时间] 文本
             timestamp = f"[{self._seconds_to_readable_time(segment.start_time)}]"
-            txt_lines.append(f"{timestamp} {segment.text}")
-        
-        return '\n'.join(txt_lines)
+            yield f"{separator}{timestamp} {segment.text}"
+            separator = '\n'
     
     # JSON格式处理
     def _generate_json(self, segments: List[SubtitleSegment], track: SubtitleTrack) -> str:
@@ -403,16 +380,24 @@ class SubtitleFormatConverter:
     # CSV格式处理
     def _generate_csv(self, segments: List[SubtitleSegment], track: SubtitleTrack) -> str:
         """生成CSV格式字幕"""
-        import io
-        
+        return ''.join(self._iter_csv(segments, track))
+    
+    def _iter_csv(self, segments: Iterable[SubtitleSegment], track: SubtitleTrack) -> Iterator[str]:
         output = io.StringIO()
         writer = csv.writer(output)
         
+        def flush() -> str:
+            chunk = output.getvalue()
+            output.seek(0)
+            output.truncate()
+            return chunk
+        
         # 写入表头
         writer.writerow([
             "Index", "Start Time", "End Time", "Duration", "Text", 
             "Confidence", "Language"
         ])
+        yield flush()
         
         # 写入数据
         for i, segment in enumerate(segments, 1):
@@ -425,13 +410,10 @@ class SubtitleFormatConverter:
                 segment.confidence,
                 segment.language or track.language
             ])
-        
-        return output.getvalue()
+            yield flush()
     
     def _parse_csv(self, content: str) -> List[SubtitleSegment]:
         """解析CSV格式字幕"""
-        import io
-        
         input_stream = io.StringIO(content)
         reader = csv.reader(input_stream)
         
@@ -499,71 +481,26 @@ class SubtitleFormatConverter:
     # TTML格式处理
     def _generate_ttml(self, segments: List[SubtitleSegment], track: SubtitleTrack) -> str:
         """生成TTML格式字幕"""
-        ttml_template = '''<?xml version="1.0" encoding="UTF-8"?>
-<tt xmlns="http://www.w3.org/ns/ttml"
-    xmlns:tts="http://www.w3.org/ns/ttml#styling"
-    xmlns:ttm="http://www.w3.org/ns/ttml#metadata"
-    xml:lang="{language}">
-  <head>
-    <metadata>
-      <ttm:title>{title}</ttm:title>
-    </metadata>
-    <styling>
-      <style xml:id="defaultStyle"
-             tts:fontFamily="Arial"
-             tts:fontSize="16px"
-             tts:textAlign="center"
-             tts:color="white"/>
-    </styling>
-  </head>
-  <body>
-    <div>
-{paragraphs}
-    </div>
-  </body>
-</tt>'''
+        return ''.join(self._iter_ttml(segments, track))
+    
+    def _iter_ttml(self, segments: Iterable[SubtitleSegment], track: SubtitleTrack) -> Iterator[str]:
+        yield TTML_HEAD.format(language=track.language or 'en', title=f"{track.language_name} Subtitles")
         
-        paragraphs = []
+        separator = ''
         for segment in segments:
             begin_time = self._seconds_to_ttml_time(segment.start_time)
             end_time = self._seconds_to_ttml_time(segment.end_time)
             text = segment.text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
             
-            paragraphs.append(f'      <p begin="{begin_time}" end="{end_time}" style="defaultStyle">{text}</p>')
+            yield f'{separator}      <p begin="{begin_time}" end="{end_time}" style="defaultStyle">{text}</p>'
+            separator = '\n'
         
-        return ttml_template.format(
-            language=track.language or 'en',
-            title=f"{track.language_name} Subtitles",
-            paragraphs='\n'.join(paragraphs)
-        )
+        yield TTML_TAIL
     
     def _parse_ttml(self, content: str) -> List[SubtitleSegment]:
         """解析TTML格式字幕"""
         try:
-            root = ET.fromstring(content)
-            segments = []
-            
-            # 查找所有p标签（段落）
-            namespaces = {'ttml': 'http://www.w3.org/ns/ttml'}
-            
-            for p in root.findall('.//ttml:p', namespaces) or root.findall('.//p'):
-                begin = p.get('begin', '0s')
-                end = p.get('end', '0s')
-                
-                start_time = self._ttml_time_to_seconds(begin)
-                end_time = self._ttml_time_to_seconds(end)
-                
-                # 获取文本内容
-                text = ''.join(p.itertext()).strip()
-                
-                if text:
-                    segments.append(SubtitleSegment(
-                        start_time=start_time,
-                        end_time=end_time,
-                        text=text
-                    ))
-            
-            return segments
+            return self._parse_with(content, 'ttml')
         except Exception as e:
             self.logger.error(f"Error parsing TTML: {str(e)}")
             return []
@@ -579,77 +516,21 @@ class SubtitleFormatConverter:
     
     # 时间格式转换工具方法
     def _seconds_to_srt_time(self, seconds: float) -> str:
-        """秒数转SRT时间格式 HH:MM:SS,mmm"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        millis = int((seconds - int(seconds)) * 1000)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
-    
-    def _srt_time_to_seconds(self, time_str: str) -> float:
-        """SRT时间格式转秒数"""
-        time_str = time_str.replace(',', '.')
-        parts = time_str.split(':')
-        if len(parts) == 3:
-            hours = int(parts[0])
-            minutes = int(parts[1])
-            seconds = float(parts[2])
-            return hours * 3600 + minutes * 60 + seconds
-        return 0.0
+        """秒数转SRT时间格式 HH:MM:SS,mmm（整列格式化见timestamp_format）"""
+        return format_srt_time(seconds)
     
     def _seconds_to_vtt_time(self, seconds: float) -> str:
         """秒数转VTT时间格式 HH:MM:SS.mmm"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        millis = int((seconds - int(seconds)) * 1000)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
-    
-    def _vtt_time_to_seconds(self, time_str: str) -> float:
-        """VTT时间格式转秒数"""
-        parts = time_str.split(':')
-        if len(parts) == 3:
-            hours = int(parts[0])
-            minutes = int(parts[1])
-            seconds = float(parts[2])
-            return hours * 3600 + minutes * 60 + seconds
-        return 0.0
+        return format_vtt_time(seconds)
     
     def _seconds_to_ass_time(self, seconds: float) -> str:
         """秒数转ASS时间格式 H:MM:SS.cc"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        centisecs = int((seconds - int(seconds)) * 100)
-        return f"{hours}:{minutes:02d}:{secs:02d}.{centisecs:02d}"
-    
-    def _ass_time_to_seconds(self, time_str: str) -> float:
-        """ASS时间格式转秒数"""
-        parts = time_str.split(':')
-        if len(parts) == 3:
-            hours = int(parts[0])
-            minutes = int(parts[1])
-            sec_parts = parts[2].split('.')
-            seconds = int(sec_parts[0])
-            centisecs = int(sec_parts[1]) if len(sec_parts) > 1 else 0
-            return hours * 3600 + minutes * 60 + seconds + centisecs / 100
-        return 0.0
+        return format_ass_time(seconds)
     
     def _seconds_to_ttml_time(self, seconds: float) -> str:
         """秒数转TTML时间格式"""
         return f"{seconds:.3f}s"
     
-    def _ttml_time_to_seconds(self, time_str: str) -> float:
-        """TTML时间格式转秒数"""
-        if time_str.endswith('s'):
-            return float(time_str[:-1])
-        elif time_str.endswith('ms'):
-            return float(time_str[:-2]) / 1000
-        # 处理HH:MM:SS格式
-        elif ':' in time_str:
-            return self._vtt_time_to_seconds(time_str)
-        return 0.0
-    
     def _seconds_to_readable_time(self, seconds: float) -> str:
         """秒数转可读时间格式"""
         hours = int(seconds // 3600)
@@ -690,24 +571,5 @@ class SubtitleFormatConverter:
         }
     
     def validate_segments(self, segments: List[SubtitleSegment]) -> List[str]:
-        """验证字幕段落的有效性"""
-        issues = []
-        
-        for i, segment in enumerate(segments):
-            # 检查时间顺序
-            if segment.start_time >= segment.end_time:
-                issues.append(f"Segment {i+1}: Start time >= End time")
-            
-            # 检查时间重叠
-            if i > 0 and segment.start_time < segments[i-1].end_time:
-                issues.append(f"Segment {i+1}: Overlaps with previous segment")
-            
-            # 检查空文本
-            if not segment.text.strip():
-                issues.append(f"Segment {i+1}: Empty text")
-            
-            # 检查置信度
-            if segment.confidence < 0 or segment.confidence > 1:
-                issues.append(f"Segment {i+1}: Invalid confidence value")
-        
-        return issues
\ No newline at end of file
+        """验证字幕段落的有效性（时间顺序、时间重叠、空文本、置信度，按列整体检查）"""
+        return as_table(segments).find_issues()
\ No newline at end of file
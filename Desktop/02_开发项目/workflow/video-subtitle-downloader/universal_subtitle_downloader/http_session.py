@@ -0,0 +1,29 @@
+"""
+共享HTTP会话
+创建带连接池（按主机限流、长连接、DNS缓存）的aiohttp会话，由下载器持有并注入各提取器
+"""
+
+import aiohttp
+
+from .config import app_config
+from .rate_limiter import rate_limiter
+
+def create_http_session(**kwargs) -> aiohttp.ClientSession:
+    """创建连接池化的HTTP会话（需在事件循环中调用，kwargs透传给ClientSession）"""
+    # 所有请求经过全局按主机限流器
+    trace_configs = list(kwargs.pop('trace_configs', None) or [])
+    if rate_limiter.enabled:
+        trace_configs.append(rate_limiter.trace_config())
+    
+    connector = aiohttp.TCPConnector(
+        limit=app_config.HTTP_POOL_LIMIT,
+        limit_per_host=app_config.HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=app_config.HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=app_config.HTTP_DNS_CACHE_TTL,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=app_config.REQUEST_TIMEOUT),
+        trace_configs=trace_configs,
+        **kwargs
+    )
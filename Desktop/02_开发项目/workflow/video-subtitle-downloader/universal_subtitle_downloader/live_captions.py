@@ -0,0 +1,269 @@
+"""
+直播字幕跟随
+按自适应间隔轮询直播字幕文档，只解析新增部分，去除滚动字幕中的重复行，
+并将新字幕追加写入SRT/VTT文件或通过异步迭代器逐条产出（内存和CPU占用不随直播时长增长）
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+from .config import app_config
+from .executors import run_in_executor
+from .metadata_cache import caption_url_expired
+from .rate_limiter import status_from_error
+from .format_converter import SubtitleFormatConverter
+from .extractors.base_extractor import SubtitleSegment
+
+logger = logging.getLogger(__name__)
+
+# 用于判断文档是否只在末尾追加的锚点长度（字符）
+ANCHOR_LENGTH = 64
+
+# 签名字幕地址失效时平台返回的状态码
+EXPIRED_URL_STATUSES = (403, 410)
+
+class LiveCaptionWriter:
+    """字幕追加写入器基类（每条字幕写入后立即刷新到磁盘）"""
+    
+    format_type = "srt"
+    
+    def __init__(self, file_path: str):
+        self.file_path = Path(file_path)
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self._converter = SubtitleFormatConverter()
+        self._file = open(self.file_path, 'w', encoding='utf-8')
+        self.count = 0
+        self._write_header()
+    
+    def _write_header(self):
+        pass
+    
+    def _format_cue(self, segment: SubtitleSegment) -> str:
+        raise NotImplementedError
+    
+    def write(self, segment: SubtitleSegment):
+        """追加一条字幕"""
+        self.count += 1
+        self._file.write(self._format_cue(segment))
+        self._file.flush()
+    
+    def close(self):
+        """关闭文件"""
+        if not self._file.closed:
+            self._file.close()
+
+class SrtCaptionWriter(LiveCaptionWriter):
+    """SRT格式追加写入器"""
+    
+    format_type = "srt"
+    
+    def _format_cue(self, segment: SubtitleSegment) -> str:
+        start_time = self._converter._seconds_to_srt_time(segment.start_time)
+        end_time = self._converter._seconds_to_srt_time(segment.end_time)
+        return f"{self.count}\n{start_time} --> {end_time}\n{segment.text}\n\n"
+
+class VttCaptionWriter(LiveCaptionWriter):
+    """VTT格式追加写入器"""
+    
+    format_type = "vtt"
+    
+    def _write_header(self):
+        self._file.write("WEBVTT\n\n")
+        self._file.flush()
+    
+    def _format_cue(self, segment: SubtitleSegment) -> str:
+        start_time = self._converter._seconds_to_vtt_time(segment.start_time)
+        end_time = self._converter._seconds_to_vtt_time(segment.end_time)
+        return f"{start_time} --> {end_time}\n{segment.text}\n\n"
+
+def create_caption_writer(file_path: str, format_type: Optional[str] = None) -> LiveCaptionWriter:
+    """按格式（默认取文件扩展名）创建追加写入器"""
+    format_type = (format_type or Path(file_path).suffix.lstrip('.') or 'srt').lower()
+    if format_type == 'srt':
+        return SrtCaptionWriter(file_path)
+    if format_type == 'vtt':
+        return VttCaptionWriter(file_path)
+    raise ValueError(f"直播字幕只支持SRT/VTT格式: {format_type}")
+
+class LiveCaptionFollower:
+    """直播字幕跟随器
+    
+    字幕地址带签名和过期时间时传入refresh_url（返回新地址的协程函数）：地址即将过期或请求返回403/410时重新获取，
+    否则长时间直播中地址过期后每次轮询都会失败
+    
+    用法:
+        follower = await extractor.follow_live_captions(url, writers=[SrtCaptionWriter("live.srt")])
+        async for segment in follower:
+            ...
+    """
+    
+    def __init__(self, extractor, caption_url: str, writers: Optional[List[LiveCaptionWriter]] = None,
+                 min_interval: float = None, max_interval: float = None, idle_timeout: float = None,
+                 refresh_url: Optional[Callable[[], Awaitable[Optional[str]]]] = None):
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.extractor = extractor
+        self.caption_url = caption_url
+        self.refresh_url = refresh_url
+        self._refreshed_at = float('-inf')
+        self.writers = list(writers or [])
+        self.min_interval = min_interval or app_config.LIVE_CAPTION_MIN_INTERVAL
+        self.max_interval = max_interval or app_config.LIVE_CAPTION_MAX_INTERVAL
+        self.idle_timeout = idle_timeout or app_config.LIVE_CAPTION_IDLE_TIMEOUT
+        self.interval = self.min_interval
+        
+        # 增量解析状态：已处理到的位置及其前面一段文本（判断文档是否仅在末尾追加）
+        self._offset = 0
+        self._anchor = ''
+        self._last_end = 0.0
+        self._recent_lines = deque(maxlen=app_config.LIVE_CAPTION_DEDUPE_WINDOW)
+        self._stopped = asyncio.Event()
+        
+        # 统计信息
+        self.stats = {
+            'polls': 0,
+            'errors': 0,
+            'segments': 0,
+            'duplicates': 0,
+            'resyncs': 0,
+            'url_refreshes': 0,
+        }
+    
+    def stop(self):
+        """停止跟随（当前轮询结束后退出迭代）"""
+        self._stopped.set()
+    
+    def __aiter__(self) -> AsyncIterator[SubtitleSegment]:
+        return self.follow()
+    
+    async def follow(self) -> AsyncIterator[SubtitleSegment]:
+        """持续轮询并逐条产出新字幕，直播结束（长时间无新内容）或调用stop()后停止"""
+        idle_time = 0.0
+        content = ''
+        
+        try:
+            while not self._stopped.is_set():
+                self.stats['polls'] += 1
+                if caption_url_expired(self.caption_url):
+                    await self._refresh_caption_url()
+                
+                refreshed = False
+                try:
+                    content = await self.extractor.download_subtitle_content(self.caption_url, 'vtt') or ''
+                    new_segments = self._consume(content)
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    self.logger.warning(f"Live caption poll failed: {str(e)}")
+                    new_segments = []
+                    if status_from_error(e) in EXPIRED_URL_STATUSES:
+                        refreshed = await self._refresh_caption_url()
+                
+                for segment in new_segments:
+                    await self._emit(segment)
+                    yield segment
+                
+                # 有新字幕时加快轮询，没有时逐步放慢
+                if new_segments:
+                    idle_time = 0.0
+                    self.interval = max(self.min_interval, self.interval / 2)
+                elif refreshed:
+                    # 地址失效不代表直播结束，换新地址后尽快重试，不计入空闲时间
+                    self.interval = self.min_interval
+                else:
+                    idle_time += self.interval
+                    if idle_time >= self.idle_timeout:
+                        self.logger.info(f"No new live captions for {idle_time:.0f}s, stopping")
+                        break
+                    self.interval = min(self.max_interval, self.interval * 1.5)
+                
+                try:
+                    await asyncio.wait_for(self._stopped.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+            
+            # 结束时处理最后一条尚未以空行结束的字幕
+            for segment in self._consume(content, final=True):
+                await self._emit(segment)
+                yield segment
+        finally:
+            for writer in self.writers:
+                writer.close()
+    
+    async def _refresh_caption_url(self) -> bool:
+        """重新获取字幕地址，成功换用新地址时返回True（两次获取至少间隔max_interval，避免每次轮询都访问观看页）"""
+        now = time.monotonic()
+        if self.refresh_url is None or now - self._refreshed_at < self.max_interval:
+            return False
+        self._refreshed_at = now
+        try:
+            caption_url = await self.refresh_url()
+        except Exception as e:
+            self.logger.warning(f"Failed to refresh live caption URL: {str(e)}")
+            return False
+        if not caption_url or caption_url == self.caption_url:
+            return False
+        
+        self.caption_url = caption_url
+        self.stats['url_refreshes'] += 1
+        self.logger.info("Live caption URL refreshed")
+        return True
+    
+    async def run(self) -> int:
+        """只写入文件、不逐条处理时使用，返回写入的字幕数"""
+        async for _ in self.follow():
+            pass
+        return self.stats['segments']
+    
+    def _consume(self, content: str, final: bool = False) -> List[SubtitleSegment]:
+        """解析文档中上次之后新增的完整字幕块"""
+        if not content:
+            return []
+        
+        # 文档只在末尾追加时从上次的位置继续，否则（滚动窗口、重新生成）整体重新解析
+        start = self._offset
+        if start > len(content) or content[max(0, start - ANCHOR_LENGTH):start] != self._anchor:
+            self.stats['resyncs'] += int(start > 0)
+            start = 0
+        
+        # 最后一个块可能还在增长，只解析到最后一个空行为止
+        if final:
+            end = len(content)
+        else:
+            boundary = content.rfind('\n\n', start)
+            if boundary < 0:
+                return []
+            end = boundary + 2
+        if end <= start:
+            return []
+        
+        self._offset = end
+        self._anchor = content[max(0, end - ANCHOR_LENGTH):end]
+        
+        segments = self.extractor.parse_subtitle_content(content[start:end], 'vtt')
+        return [segment for segment in segments if self._is_new(segment)]
+    
+    def _is_new(self, segment: SubtitleSegment) -> bool:
+        """过滤已输出的字幕：早于已处理时间的块，以及滚动字幕中重复的上一行"""
+        if segment.end_time <= self._last_end and segment.start_time < self._last_end:
+            self.stats['duplicates'] += 1
+            return False
+        
+        lines = [line for line in segment.text.split('\n') if line.strip()]
+        new_lines = [line for line in lines if line not in self._recent_lines]
+        if not new_lines:
+            self.stats['duplicates'] += 1
+            return False
+        
+        self._recent_lines.extend(new_lines)
+        segment.text = '\n'.join(new_lines)
+        self._last_end = max(self._last_end, segment.end_time)
+        return True
+    
+    async def _emit(self, segment: SubtitleSegment):
+        """写入所有写入器"""
+        self.stats['segments'] += 1
+        for writer in self.writers:
+            await run_in_executor('file_io', writer.write, segment)
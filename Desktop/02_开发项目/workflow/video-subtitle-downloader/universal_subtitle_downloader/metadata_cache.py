@@ -0,0 +1,172 @@
+"""
+视频元数据缓存
+按(平台, 视频ID)在磁盘上缓存精简后的yt-dlp信息，避免重复提取
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Any
+from urllib.parse import urlparse, parse_qs
+
+from .config import app_config
+from .executors import run_in_executor
+
+logger = logging.getLogger(__name__)
+
+# 提取视频信息和字幕所需的yt-dlp顶层字段
+CACHED_INFO_KEYS = (
+    'id', 'title', 'duration', 'uploader', 'upload_date', 'view_count',
+    'thumbnail', 'webpage_url', 'extractor', 'extractor_key', 'is_live',
+)
+
+# 格式信息中保留的字段（足够重建formats_info）
+CACHED_FORMAT_KEYS = (
+    'format_id', 'ext', 'resolution', 'fps', 'vcodec', 'acodec',
+    'filesize', 'quality', 'height', 'abr',
+)
+
+# 字幕格式条目中保留的字段
+CACHED_SUBTITLE_KEYS = ('ext', 'url', 'name')
+
+# 搜索等列表结果（extract_flat）的条目中保留的字段
+CACHED_ENTRY_KEYS = ('id', 'url', 'title', 'duration', 'view_count', 'upload_date')
+
+def trim_info(info: Dict) -> Dict:
+    """精简yt-dlp信息字典，只保留视频信息和字幕提取所需的字段"""
+    trimmed = {key: info.get(key) for key in CACHED_INFO_KEYS if key in info}
+    trimmed['description'] = (info.get('description') or '')[:500]
+    
+    for key in ('subtitles', 'automatic_captions'):
+        trimmed[key] = {
+            lang: [
+                {k: fmt.get(k) for k in CACHED_SUBTITLE_KEYS if k in fmt}
+                for fmt in formats
+            ]
+            for lang, formats in (info.get(key) or {}).items()
+        }
+    
+    trimmed['formats'] = []
+    for f in info.get('formats') or []:
+        entry = {k: f.get(k) for k in CACHED_FORMAT_KEYS if k in f}
+        entry['url'] = (f.get('url') or '').split('?')[0]  # 移除签名参数
+        trimmed['formats'].append(entry)
+    
+    if info.get('entries') is not None:
+        trimmed['entries'] = [
+            {k: entry.get(k) for k in CACHED_ENTRY_KEYS if k in entry}
+            for entry in info['entries'] if entry
+        ]
+    
+    return trimmed
+
+def caption_url_expired(url: str, margin: float = None) -> bool:
+    """检查单个字幕URL是否已过期或即将过期（带expire参数的签名URL，没有该参数时视为不过期）"""
+    if margin is None:
+        margin = app_config.CAPTION_URL_EXPIRY_MARGIN
+    
+    expire = parse_qs(urlparse(url or '').query).get('expire')
+    return bool(expire and expire[0].isdigit() and int(expire[0]) <= time.time() + margin)
+
+def caption_urls_expired(info: Dict, margin: float = None) -> bool:
+    """检查字幕URL是否已过期（如YouTube带expire参数的签名timedtext URL）"""
+    for key in ('subtitles', 'automatic_captions'):
+        for formats in (info.get(key) or {}).values():
+            for fmt in formats:
+                if caption_url_expired(fmt.get('url'), margin):
+                    return True
+    return False
+
+class MetadataCache:
+    """基于TTL的磁盘元数据缓存"""
+    
+    def __init__(self, cache_dir: Path = None, ttl_config: Dict[str, float] = None):
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.cache_dir = Path(cache_dir) if cache_dir else app_config.CACHE_DIR / "metadata"
+        self.ttl_config = ttl_config or app_config.METADATA_CACHE_TTL
+        
+        # 统计信息
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'writes': 0,
+        }
+    
+    def get_ttl(self, platform: str) -> float:
+        """获取平台的缓存新鲜度"""
+        return self.ttl_config.get(platform, self.ttl_config.get('default', 0))
+    
+    def _get_path(self, platform: str, video_id: str) -> Path:
+        """缓存文件路径"""
+        digest = hashlib.sha1(f"{platform}:{video_id}".encode('utf-8')).hexdigest()
+        return self.cache_dir / platform / f"{digest}.json"
+    
+    def _read_entry(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _write_entry(self, path: Path, entry: Dict[str, Any]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 同一进程内可能并发写入同一条目，临时文件名每次调用唯一
+        temp_path = path.with_suffix(f".{os.getpid()}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+            raise
+    
+    async def get(self, platform: str, video_id: str) -> Optional[Dict[str, Any]]:
+        """读取缓存条目，过期或不存在时返回None（文件读取在file_io线程池中执行）"""
+        entry = await run_in_executor('file_io', self._read_entry, self._get_path(platform, video_id))
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+        
+        age = time.time() - entry.get('cached_at', 0)
+        if age > self.get_ttl(platform):
+            self.stats['expired'] += 1
+            return None
+        
+        self.stats['hits'] += 1
+        return entry
+    
+    async def set(self, platform: str, video_id: str, info: Dict, extra: Dict = None):
+        """写入缓存条目（在file_io线程池中先写临时文件再替换，避免读到半写入的文件）"""
+        path = self._get_path(platform, video_id)
+        entry = {
+            'platform': platform,
+            'video_id': video_id,
+            'cached_at': time.time(),
+            'info': info,
+            'extra': extra or {},
+        }
+        
+        try:
+            await run_in_executor('file_io', self._write_entry, path, entry)
+            self.stats['writes'] += 1
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.warning(f"Failed to write metadata cache for {platform}/{video_id}: {str(e)}")
+    
+    def invalidate(self, platform: str, video_id: str):
+        """删除缓存条目"""
+        try:
+            self._get_path(platform, video_id).unlink()
+        except OSError:
+            pass
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取缓存统计信息"""
+        return self.stats.copy()
@@ -0,0 +1,112 @@
+"""
+平台路由
+由subtitle_config.PLATFORM_CONFIGS生成域名后缀索引，一次解析即可将URL映射到平台名称
+"""
+
+import logging
+import threading
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+from .config import subtitle_config
+
+logger = logging.getLogger(__name__)
+
+# 主机名到平台的缓存上限（常见平台的主机名数量很少）
+HOST_CACHE_SIZE = 4096
+
+def extract_host(url: str) -> str:
+    """快速提取URL中的主机名（小写，不含端口和用户信息），无法识别时返回空字符串"""
+    scheme_end = url.find('://')
+    if scheme_end <= 0:
+        return ''
+    
+    start = scheme_end + 3
+    end = len(url)
+    for separator in '/?#':
+        index = url.find(separator, start)
+        if 0 <= index < end:
+            end = index
+    netloc = url[start:end]
+    
+    # IPv6等少见写法交给标准库处理
+    if '[' in netloc:
+        try:
+            return (urlsplit(url.strip()).hostname or '').lower()
+        except ValueError:
+            return ''
+    
+    netloc = netloc.rpartition('@')[2]
+    return netloc.partition(':')[0].strip().lower().rstrip('.')
+
+class PlatformRouter:
+    """按域名后缀将URL路由到平台（子域名自动匹配，如m.youtube.com → youtube）"""
+    
+    def __init__(self, platform_configs: Dict[str, Dict] = None):
+        self._lock = threading.Lock()
+        self._domains: Dict[str, str] = {}
+        self._host_cache: Dict[str, Optional[str]] = {}
+        self.fallback_platform: Optional[str] = None
+        
+        for platform, config in (platform_configs or subtitle_config.PLATFORM_CONFIGS).items():
+            self.register(platform, config.get('domains', []))
+    
+    @property
+    def platforms(self) -> set:
+        """已登记域名的平台"""
+        return set(self._domains.values())
+    
+    def register(self, platform: str, domains: Iterable[str]):
+        """登记平台的域名（'*'表示通用后备平台），后登记的覆盖先登记的"""
+        with self._lock:
+            for domain in domains:
+                domain = domain.strip().lower().lstrip('.')
+                if domain == '*':
+                    self.fallback_platform = platform
+                elif domain:
+                    self._domains[domain] = platform
+            self._host_cache = {}
+    
+    def resolve_host(self, host: str) -> Optional[str]:
+        """按主机名查找平台：从完整主机名开始逐级去掉最左侧标签查索引"""
+        platform = self._host_cache.get(host)
+        if platform is not None or host in self._host_cache:
+            return platform
+        
+        platform = None
+        suffix = host
+        while suffix:
+            platform = self._domains.get(suffix)
+            if platform is not None:
+                break
+            dot = suffix.find('.')
+            if dot < 0:
+                break
+            suffix = suffix[dot + 1:]
+        
+        if len(self._host_cache) >= HOST_CACHE_SIZE:
+            self._host_cache = {}
+        self._host_cache[host] = platform
+        return platform
+    
+    def resolve(self, url: str) -> Optional[str]:
+        """返回URL所属平台；未登记的域名返回通用后备平台，不是有效URL时返回None"""
+        host = extract_host(url)
+        if not host:
+            return None
+        return self.resolve_host(host) or self.fallback_platform
+    
+    def match(self, url: str) -> Optional[str]:
+        """返回URL所属的已登记平台（不使用通用后备平台）"""
+        host = extract_host(url)
+        return self.resolve_host(host) if host else None
+    
+    def route_key(self, url: str) -> Optional[str]:
+        """按平台分组的键：已登记平台返回平台名（多个域名共用），其他返回主机名"""
+        host = extract_host(url)
+        if not host:
+            return None
+        return self.resolve_host(host) or host
+
+# 全局平台路由
+platform_router = PlatformRouter()
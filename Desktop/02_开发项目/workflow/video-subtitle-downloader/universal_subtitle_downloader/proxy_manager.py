@@ -0,0 +1,300 @@
+"""
+代理池
+按平台为每个代理统计成功率和延迟（指数滑动平均），请求时选择当前得分最高的代理；
+连续失败的代理被隔离一段时间（连接失败隔离整个代理，被平台拦截只对该平台隔离），
+后台定期异步检测代理并恢复已隔离的代理。兼容原有的get_current_proxy()接口
+"""
+
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from .config import app_config
+from .platform_router import platform_router
+from .rate_limiter import status_from_error
+from .circuit_breaker import is_platform_failure
+from .retry_policy import classify_error, GEO
+
+logger = logging.getLogger(__name__)
+
+# 不区分平台的统计（连接层面的健康状况、检测结果）
+ANY_PLATFORM = '*'
+
+# 被平台拦截的状态码（只隔离该平台）
+BLOCKED_STATUSES = (403, 429)
+
+# aiohttp只支持HTTP代理，SOCKS代理只用于yt-dlp
+HTTP_PROXY_SCHEMES = ('http', 'https')
+
+class ProxyHealth:
+    """代理在某个平台上的健康统计"""
+    
+    def __init__(self):
+        self.success_rate = 1.0       # 成功率（滑动平均，新代理乐观假设可用）
+        self.latency: Optional[float] = None  # 延迟（滑动平均，秒）
+        self.samples = 0
+        self.consecutive_failures = 0
+        self.quarantined_until = 0.0
+        self.quarantine_count = 0
+    
+    def record(self, success: bool, latency: Optional[float] = None):
+        alpha = app_config.PROXY_SCORE_ALPHA
+        self.samples += 1
+        self.success_rate += alpha * (float(success) - self.success_rate)
+        if success:
+            self.consecutive_failures = 0
+            if latency is not None:
+                self.latency = latency if self.latency is None else self.latency + alpha * (latency - self.latency)
+        else:
+            self.consecutive_failures += 1
+    
+    def is_quarantined(self, now: float) -> bool:
+        return now < self.quarantined_until
+    
+    def quarantine(self, now: float) -> float:
+        """隔离代理，重复隔离时时间加倍"""
+        duration = min(
+            app_config.PROXY_QUARANTINE_SECONDS * (2 ** self.quarantine_count),
+            app_config.PROXY_MAX_QUARANTINE_SECONDS,
+        )
+        self.quarantine_count += 1
+        self.quarantined_until = now + duration
+        return duration
+    
+    def release(self):
+        """解除隔离（检测恢复后）"""
+        self.quarantined_until = 0.0
+        self.quarantine_count = 0
+        self.consecutive_failures = 0
+    
+    def to_dict(self, now: float) -> Dict:
+        return {
+            'success_rate': round(self.success_rate, 3),
+            'latency': round(self.latency, 3) if self.latency is not None else None,
+            'samples': self.samples,
+            'quarantined': self.is_quarantined(now),
+            'quarantine_remaining': round(max(0.0, self.quarantined_until - now), 1),
+        }
+
+class ProxyManager:
+    """按健康得分选择代理的代理池
+    
+    用法:
+        proxy_manager = ProxyManager(["http://proxy1:8080", "socks5://proxy2:1080"])
+        downloader = UniversalSubtitleDownloader(proxy_manager=proxy_manager)
+        async with downloader:
+            proxy_manager.start_health_checks()
+    """
+    
+    def __init__(self, proxies: Optional[List[str]] = None, check_url: str = None):
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.check_url = check_url or app_config.PROXY_CHECK_URL
+        self._health: Dict[str, Dict[str, ProxyHealth]] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._check_task: Optional[asyncio.Task] = None
+        
+        for proxy in proxies or []:
+            self.add_proxy(proxy)
+    
+    @property
+    def proxies(self) -> List[str]:
+        return list(self._health)
+    
+    def add_proxy(self, proxy_url: str) -> bool:
+        """添加代理服务器"""
+        parsed = urlparse(proxy_url)
+        if not parsed.scheme or not parsed.netloc:
+            self.logger.error(f"Invalid proxy URL: {proxy_url}")
+            return False
+        if proxy_url not in self._health:
+            self._health[proxy_url] = {ANY_PLATFORM: ProxyHealth()}
+            self._in_flight[proxy_url] = 0
+            self.logger.info(f"Added proxy: {proxy_url}")
+        return True
+    
+    def remove_proxy(self, proxy_url: str):
+        """移除代理服务器"""
+        self._health.pop(proxy_url, None)
+        self._in_flight.pop(proxy_url, None)
+    
+    def _get_health(self, proxy: str, platform: str) -> ProxyHealth:
+        platforms = self._health[proxy]
+        health = platforms.get(platform)
+        if health is None:
+            health = platforms[platform] = ProxyHealth()
+        return health
+    
+    def _score(self, proxy: str, platform: str) -> float:
+        """得分 = 成功率 / 延迟，按在途请求数分摊；平台统计不足时参考整体统计"""
+        overall = self._health[proxy][ANY_PLATFORM]
+        health = self._health[proxy].get(platform)
+        if health is None or health.samples < app_config.PROXY_MIN_SAMPLES:
+            health = overall
+        
+        success_rate = min(health.success_rate, overall.success_rate)
+        latency = health.latency if health.latency is not None else overall.latency
+        latency = max(latency if latency is not None else app_config.PROXY_DEFAULT_LATENCY, 0.05)
+        return success_rate / latency / (1 + self._in_flight.get(proxy, 0))
+    
+    def select_proxy(self, url: Optional[str] = None, http_only: bool = False) -> Optional[str]:
+        """为URL选择得分最高且未被隔离的代理（http_only=True时只选aiohttp可用的HTTP代理）
+        
+        全部代理被隔离时返回None（直连）
+        """
+        platform = (platform_router.route_key(url) if url else None) or ANY_PLATFORM
+        now = time.monotonic()
+        
+        best, best_score = None, -1.0
+        for proxy, platforms in self._health.items():
+            if http_only and urlparse(proxy).scheme not in HTTP_PROXY_SCHEMES:
+                continue
+            if platforms[ANY_PLATFORM].is_quarantined(now):
+                continue
+            health = platforms.get(platform)
+            if health is not None and health.is_quarantined(now):
+                continue
+            
+            score = self._score(proxy, platform)
+            if score > best_score:
+                best, best_score = proxy, score
+        
+        if best is None and self._health:
+            self.logger.warning(f"No healthy proxy for {platform}, connecting directly")
+        return best
+    
+    def get_current_proxy(self) -> Optional[str]:
+        """当前整体得分最高的代理（兼容旧接口）"""
+        return self.select_proxy()
+    
+    def record(self, proxy: str, url: Optional[str], success: bool, latency: Optional[float] = None,
+               blocked: bool = False):
+        """记录一次经过代理的请求结果
+        
+        blocked为True表示平台拒绝了该代理（403/429），只影响该平台；否则计入代理整体
+        """
+        if proxy not in self._health:
+            return
+        
+        now = time.monotonic()
+        platform = (platform_router.route_key(url) if url else None) or ANY_PLATFORM
+        health = self._get_health(proxy, platform)
+        health.record(success, latency)
+        if not blocked:
+            overall = self._get_health(proxy, ANY_PLATFORM)
+            if overall is not health:
+                overall.record(success, latency)
+            health = overall
+        
+        if not success and health.consecutive_failures >= app_config.PROXY_QUARANTINE_FAILURES:
+            duration = health.quarantine(now)
+            health.consecutive_failures = 0
+            scope = platform if blocked else 'all platforms'
+            self.logger.warning(f"Quarantined proxy {proxy} for {scope} ({duration:.0f}s)")
+    
+    def quarantine(self, proxy: str, url: Optional[str]):
+        """立即对URL所属平台隔离代理（地区限制由出口位置决定，重试时应换用其他代理）"""
+        if proxy not in self._health:
+            return
+        platform = (platform_router.route_key(url) if url else None) or ANY_PLATFORM
+        duration = self._get_health(proxy, platform).quarantine(time.monotonic())
+        self.logger.warning(f"Quarantined proxy {proxy} for {platform} ({duration:.0f}s, geo-restricted)")
+    
+    @asynccontextmanager
+    async def track(self, proxy: str, url: Optional[str] = None):
+        """记录一次请求的结果和延迟（与具体请求方式无关，aiohttp和yt-dlp都可使用）"""
+        self._in_flight[proxy] = self._in_flight.get(proxy, 0) + 1
+        started_at = time.monotonic()
+        try:
+            yield proxy
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            status = status_from_error(e)
+            if classify_error(e) == GEO:
+                self.quarantine(proxy, url)
+            elif status in BLOCKED_STATUSES:
+                self.record(proxy, url, False, blocked=True)
+            elif is_platform_failure(e):
+                self.record(proxy, url, False)
+            elif status is not None:
+                # 404等视频本身的错误说明代理工作正常；其他与网络无关的异常不计入
+                self.record(proxy, url, True, time.monotonic() - started_at)
+            raise
+        else:
+            self.record(proxy, url, True, time.monotonic() - started_at)
+        finally:
+            if proxy in self._in_flight:
+                self._in_flight[proxy] = max(0, self._in_flight[proxy] - 1)
+    
+    async def check_proxy(self, proxy: str, session: Optional[aiohttp.ClientSession] = None) -> bool:
+        """通过代理请求检测地址，结果计入代理整体统计；检测成功的隔离代理立即恢复"""
+        if urlparse(proxy).scheme not in HTTP_PROXY_SCHEMES:
+            return True  # SOCKS代理无法用aiohttp检测，只根据实际请求结果评分
+        
+        timeout = aiohttp.ClientTimeout(total=app_config.PROXY_TIMEOUT)
+        started_at = time.monotonic()
+        try:
+            if session is None:
+                async with aiohttp.ClientSession(timeout=timeout) as temp_session:
+                    return await self.check_proxy(proxy, temp_session)
+            async with session.get(self.check_url, proxy=proxy, timeout=timeout) as response:
+                await response.read()
+                success = response.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            success = False
+        
+        if proxy in self._health:
+            overall = self._health[proxy][ANY_PLATFORM]
+            if success and overall.is_quarantined(time.monotonic()):
+                overall.release()
+                self.logger.info(f"Proxy {proxy} recovered")
+            self.record(proxy, None, success, time.monotonic() - started_at if success else None)
+        return success
+    
+    async def check_all(self) -> Dict[str, bool]:
+        """并发检测所有代理"""
+        proxies = self.proxies
+        timeout = aiohttp.ClientTimeout(total=app_config.PROXY_TIMEOUT)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            results = await asyncio.gather(*[self.check_proxy(proxy, session) for proxy in proxies])
+        return dict(zip(proxies, results))
+    
+    def start_health_checks(self, interval: float = None) -> asyncio.Task:
+        """启动后台定期检测（需在事件循环中调用）"""
+        if self._check_task is None or self._check_task.done():
+            self._check_task = asyncio.ensure_future(self._health_check_loop(interval or app_config.PROXY_CHECK_INTERVAL))
+        return self._check_task
+    
+    async def stop_health_checks(self):
+        """停止后台检测"""
+        if self._check_task is not None:
+            self._check_task.cancel()
+            try:
+                await self._check_task
+            except asyncio.CancelledError:
+                pass
+            self._check_task = None
+    
+    async def _health_check_loop(self, interval: float):
+        while True:
+            try:
+                await self.check_all()
+            except Exception as e:
+                self.logger.warning(f"Proxy health check failed: {str(e)}")
+            await asyncio.sleep(interval)
+    
+    def get_stats(self) -> Dict[str, Dict]:
+        """获取各代理按平台的健康统计"""
+        now = time.monotonic()
+        return {
+            proxy: {
+                'in_flight': self._in_flight.get(proxy, 0),
+                'platforms': {platform: health.to_dict(now) for platform, health in platforms.items()},
+            }
+            for proxy, platforms in self._health.items()
+        }
@@ -0,0 +1,311 @@
+"""
+按主机自适应限流
+每个主机（已登记平台的所有域名共用一个）使用令牌桶限制请求速率，并用AIMD（加性增、乘性减）调整并发上限：
+请求成功且延迟正常时缓慢提高速率和并发，遇到429/5xx或延迟明显升高时减半，使吞吐收敛到平台能承受的最大值。
+HTTP会话通过TraceConfig自动接入，yt-dlp提取通过limit()上下文接入（提取耗时包含多次请求和页面解析，
+不作为响应延迟参与拥塞判断，只按结果的状态码调整；提取只消耗令牌、不占用并发名额，
+避免几个慢提取占满名额而饿死同一主机的字幕请求）
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import aiohttp
+
+from .config import app_config
+from .error_patterns import status_from_message
+from .platform_router import platform_router
+
+logger = logging.getLogger(__name__)
+
+# 延迟基线（观测到的最低延迟）向当前延迟缓慢回升的系数，避免一次偶然的快速响应永久拉低基线
+BASELINE_DECAY = 0.01
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After头（秒数或HTTP日期），返回需要等待的秒数"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+def status_from_error(error: BaseException) -> Optional[int]:
+    """从异常中取出HTTP状态码"""
+    status = getattr(error, 'status', None)
+    if isinstance(status, int):
+        return status
+    return status_from_message(str(error))
+
+def is_congestion_status(status: Optional[int]) -> bool:
+    """429和5xx视为平台过载信号"""
+    return status is not None and (status == 429 or 500 <= status < 600)
+
+class HostLimiter:
+    """单个主机的令牌桶 + AIMD并发控制"""
+    
+    def __init__(self, key: str, rate: float, max_rate: float, concurrency: int, max_concurrency: int):
+        self.key = key
+        self.rate = float(rate)
+        self.min_rate = min(app_config.RATE_LIMIT_MIN_RATE, self.rate)
+        self.max_rate = float(max_rate)
+        self.concurrency = float(concurrency)
+        self.max_concurrency = float(max_concurrency)
+        
+        # 令牌桶：容量等于当前并发上限，允许短时突发
+        self.tokens = self.concurrency
+        self._refilled_at = time.monotonic()
+        self._blocked_until = 0.0
+        
+        self.in_flight = 0
+        self._waiters: deque = deque()
+        self._last_decrease = 0.0
+        self._latency_baseline: Optional[float] = None
+        
+        # 统计信息
+        self.stats = {
+            'requests': 0,
+            'throttled': 0,
+            'server_errors': 0,
+            'slow_responses': 0,
+            'increases': 0,
+            'decreases': 0,
+            'total_wait': 0.0,
+        }
+    
+    @property
+    def concurrency_limit(self) -> int:
+        return max(1, int(self.concurrency))
+    
+    def _refill(self, now: float):
+        capacity = max(1.0, self.concurrency)
+        self.tokens = min(capacity, self.tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+    
+    async def acquire(self, slot: bool = True):
+        """等待并发名额和令牌（slot=False时只等待令牌，调用方无需release）"""
+        started_at = time.monotonic()
+        
+        if slot:
+            await self._acquire_slot()
+        try:
+            await self._take_token()
+        except BaseException:
+            if slot:
+                self.release()
+            raise
+        
+        self.stats['requests'] += 1
+        self.stats['total_wait'] += time.monotonic() - started_at
+    
+    async def _acquire_slot(self):
+        """等待并发名额"""
+        while self.in_flight >= self.concurrency_limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif waiter.done() and not waiter.cancelled():
+                    self._wake()  # 已被唤醒但放弃名额，转给下一个等待者
+                raise
+        self.in_flight += 1
+    
+    async def _take_token(self):
+        """等待令牌（Retry-After要求的暂停期间不发放）"""
+        while True:
+            now = time.monotonic()
+            self._refill(now)
+            delay = self._blocked_until - now
+            if delay <= 0:
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            await asyncio.sleep(delay)
+    
+    def release(self):
+        """归还并发名额"""
+        self.in_flight = max(0, self.in_flight - 1)
+        self._wake()
+    
+    def _wake(self):
+        """唤醒等待者直到并发上限（AIMD增大上限后可能一次唤醒多个）"""
+        free = self.concurrency_limit - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+    
+    def record(self, status: Optional[int], latency: Optional[float] = None, retry_after: Optional[float] = None):
+        """根据请求结果调整速率和并发（status为None表示非HTTP错误的失败，不作调整）"""
+        if status == 429:
+            self.stats['throttled'] += 1
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+            self._decrease()
+        elif is_congestion_status(status):
+            self.stats['server_errors'] += 1
+            self._decrease()
+        elif status is not None and status < 400:
+            if latency is not None and self._is_slow(latency):
+                self.stats['slow_responses'] += 1
+                self._decrease()
+            else:
+                self._increase()
+    
+    def _is_slow(self, latency: float) -> bool:
+        """延迟超过基线的若干倍视为排队拥塞"""
+        baseline = self._latency_baseline
+        if baseline is None or latency < baseline:
+            self._latency_baseline = latency
+            return False
+        self._latency_baseline = baseline + (latency - baseline) * BASELINE_DECAY
+        return latency > max(baseline * app_config.RATE_LIMIT_LATENCY_FACTOR, app_config.RATE_LIMIT_MIN_SLOW_LATENCY)
+    
+    def _increase(self):
+        """加性增：每个成功请求增加1/当前值，约每一轮并发增加1"""
+        self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+        self.rate = min(self.max_rate, self.rate + app_config.RATE_LIMIT_RATE_STEP / self.rate)
+        self.stats['increases'] += 1
+        self._wake()
+    
+    def _decrease(self):
+        """乘性减：冷却期内只减一次（同一批在途请求的失败属于同一次过载）"""
+        now = time.monotonic()
+        if now - self._last_decrease < app_config.RATE_LIMIT_DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        factor = app_config.RATE_LIMIT_DECREASE_FACTOR
+        self.concurrency = max(1.0, self.concurrency * factor)
+        self.rate = max(self.min_rate, self.rate * factor)
+        self.tokens = min(self.tokens, self.concurrency)
+        self.stats['decreases'] += 1
+        logger.info(f"Rate limit for {self.key} reduced to {self.rate:.2f} req/s, concurrency {self.concurrency_limit}")
+    
+    def get_stats(self) -> Dict:
+        """获取限流统计信息"""
+        stats = self.stats.copy()
+        stats.update({
+            'rate': round(self.rate, 3),
+            'concurrency': self.concurrency_limit,
+            'in_flight': self.in_flight,
+            'waiting': len(self._waiters),
+        })
+        return stats
+
+class RateLimiter:
+    """所有提取器和HTTP会话共享的按主机限流器"""
+    
+    def __init__(self, limits: Dict[str, Dict] = None, enabled: bool = None):
+        self.limits = limits or app_config.RATE_LIMITS
+        self.enabled = app_config.RATE_LIMIT_ENABLED if enabled is None else enabled
+        self._limiters: Dict[str, HostLimiter] = {}
+    
+    def get_limiter(self, url: str) -> Optional[HostLimiter]:
+        """获取URL对应的限流器"""
+        if not self.enabled:
+            return None
+        key = platform_router.route_key(url)
+        if key is None:
+            return None
+        
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            config = self.limits.get(key, self.limits['default'])
+            limiter = self._limiters[key] = HostLimiter(
+                key,
+                rate=config['rate'],
+                max_rate=config['max_rate'],
+                concurrency=config['concurrency'],
+                max_concurrency=config['max_concurrency'],
+            )
+        return limiter
+    
+    async def _acquire(self, limiter: HostLimiter, slot: bool = True):
+        """等待名额，最长RATE_LIMIT_MAX_WAIT秒
+        
+        排队过长的请求以asyncio.TimeoutError失败（与请求超时一样按暂时性错误重试）而不是无限堆积
+        """
+        try:
+            await asyncio.wait_for(limiter.acquire(slot), app_config.RATE_LIMIT_MAX_WAIT)
+        except asyncio.TimeoutError:
+            raise asyncio.TimeoutError(f"等待限流名额超时: {limiter.key}") from None
+    
+    @asynccontextmanager
+    async def limit(self, url: str):
+        """限流执行一次请求（用于yt-dlp等不经过HTTP会话的请求），按异常中的HTTP状态码调整
+        
+        只消耗令牌、不占用并发名额：一次提取可能持续数十秒，占用名额会阻塞同一主机的字幕请求；
+        整个提取的耗时与HTTP请求的首字节延迟不可比，也不计入延迟基线
+        """
+        limiter = self.get_limiter(url)
+        if limiter is None:
+            yield
+            return
+        
+        await self._acquire(limiter, slot=False)
+        try:
+            yield
+        except Exception as e:
+            limiter.record(status_from_error(e))
+            raise
+        else:
+            limiter.record(200)
+    
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """aiohttp跟踪配置：请求开始前等待名额，收到响应头（或失败）后归还并记录结果
+        
+        aiohttp的超时不覆盖这段等待，因此由_acquire单独限制最长等待时间
+        """
+        trace_config = aiohttp.TraceConfig()
+        
+        async def on_request_start(session, context, params):
+            context.limiter = self.get_limiter(str(params.url))
+            if context.limiter is not None:
+                await self._acquire(context.limiter)
+                context.started_at = time.monotonic()
+        
+        async def on_request_end(session, context, params):
+            limiter = getattr(context, 'limiter', None)
+            if limiter is None or not hasattr(context, 'started_at'):
+                return
+            response = params.response
+            limiter.record(
+                response.status,
+                time.monotonic() - context.started_at,
+                parse_retry_after(response.headers.get('Retry-After')),
+            )
+            limiter.release()
+            context.limiter = None
+        
+        async def on_request_exception(session, context, params):
+            limiter = getattr(context, 'limiter', None)
+            if limiter is None or not hasattr(context, 'started_at'):
+                return
+            limiter.record(status_from_error(params.exception))
+            limiter.release()
+            context.limiter = None
+        
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        return trace_config
+    
+    def get_stats(self) -> Dict[str, Dict]:
+        """获取各主机的限流统计信息"""
+        return {key: limiter.get_stats() for key, limiter in self._limiters.items()}
+
+# 全局限流器
+rate_limiter = RateLimiter()
@@ -0,0 +1,174 @@
+"""
+重试策略
+按错误类型决定是否重试：网络抖动、超时和5xx用带随机抖动的指数退避重试，被限流(429)时按Retry-After或更长的退避重试，
+视频不存在、私有、不支持等永久错误立即失败，地区限制只在可以换代理时重试。
+批量任务共享一个重试预算（通过ContextVar传给批内创建的所有任务），大面积故障时避免重试放大请求量；
+重试次数按阶段（元数据提取、字幕下载等）统计
+"""
+
+import random
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from yt_dlp.utils import DownloadError, ExtractorError, GeoRestrictedError, UnsupportedError
+
+from .config import app_config
+from .error_patterns import TRANSIENT, RATE_LIMIT, PERMANENT, GEO, ERROR_CATEGORIES, classify_message
+from .rate_limiter import status_from_error, parse_retry_after
+from .circuit_breaker import CircuitOpenError, is_platform_failure
+
+logger = logging.getLogger(__name__)
+
+def _root_error(error: BaseException) -> BaseException:
+    """取出yt-dlp DownloadError包装的原始异常"""
+    if isinstance(error, DownloadError) and error.exc_info and error.exc_info[1] is not None:
+        return error.exc_info[1]
+    return error
+
+def classify_error(error: BaseException) -> str:
+    """判断异常属于哪类错误"""
+    if isinstance(error, CircuitOpenError):
+        return PERMANENT  # 熔断器已暂停该平台，立即重试只会再次被拒绝
+    
+    error = _root_error(error)
+    if isinstance(error, GeoRestrictedError):
+        return GEO
+    if isinstance(error, UnsupportedError):
+        return PERMANENT
+    
+    category = classify_message(str(error), status_from_error(error))
+    if category is not None:
+        return category
+    if is_platform_failure(error):
+        return TRANSIENT
+    if isinstance(error, ExtractorError):
+        # yt-dlp标记为expected的是面向用户的确定性错误（需要登录、已删除等）
+        return PERMANENT if error.expected else TRANSIENT
+    if isinstance(error, (ValueError, TypeError, KeyError, AttributeError)):
+        return PERMANENT  # 解析或程序错误，重试不会改变结果
+    return TRANSIENT
+
+class RetryBudget:
+    """一批任务共享的重试次数预算"""
+    
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self.denied = 0
+    
+    def try_spend(self) -> bool:
+        """占用一次重试，预算用完时返回False"""
+        if self.used >= self.limit:
+            self.denied += 1
+            return False
+        self.used += 1
+        return True
+    
+    def to_dict(self) -> Dict:
+        return {'limit': self.limit, 'used': self.used, 'denied': self.denied}
+
+_current_budget: ContextVar[Optional[RetryBudget]] = ContextVar('retry_budget', default=None)
+
+@contextmanager
+def retry_budget(limit: int):
+    """范围内（包括其中创建的任务）的所有重试共享limit次预算"""
+    budget = RetryBudget(limit)
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+
+def batch_retry_limit(request_count: int) -> int:
+    """按批量请求数计算重试预算"""
+    return max(app_config.RETRY_BUDGET_MIN, int(request_count * app_config.RETRY_BUDGET_RATIO))
+
+class RetryEngine:
+    """按错误类型重试异步调用，并按阶段统计"""
+    
+    def __init__(self):
+        self.stats: Dict[str, Dict] = {}
+    
+    def _stage_stats(self, stage: str) -> Dict:
+        stats = self.stats.get(stage)
+        if stats is None:
+            stats = self.stats[stage] = {
+                'calls': 0,
+                'retries': 0,
+                'failures': 0,
+                'budget_exhausted': 0,
+                'errors': dict.fromkeys(ERROR_CATEGORIES, 0),
+            }
+        return stats
+    
+    def backoff_delay(self, category: str, attempt: int, error: Optional[BaseException] = None) -> Optional[float]:
+        """第attempt次失败后的等待时间，返回None表示不值得再等
+        
+        普通错误使用full jitter（0到上限间均匀随机），限流使用上限的一半到上限，避免同一批请求同时重试
+        """
+        if category == GEO:
+            return 0.0  # 换代理立即重试
+        if category == RATE_LIMIT:
+            cap = min(app_config.RETRY_MAX_DELAY, app_config.RETRY_RATE_LIMIT_DELAY * (2 ** (attempt - 1)))
+            headers = getattr(error, 'headers', None)
+            retry_after = parse_retry_after(headers.get('Retry-After')) if headers else None
+            if retry_after is not None and retry_after > app_config.RETRY_MAX_DELAY:
+                return None
+            return max(retry_after or 0.0, random.uniform(cap / 2, cap))
+        cap = min(app_config.RETRY_MAX_DELAY, app_config.RETRY_DELAY * (2 ** (attempt - 1)))
+        return random.uniform(0, cap)
+    
+    async def run(self, func, *args, stage: str = 'default', max_retries: int = None,
+                  can_switch_proxy: bool = False, **kwargs):
+        """执行func，可重试的错误退避后重试，最多尝试max_retries次
+        
+        can_switch_proxy为True时地区限制错误也会重试（由代理池换用其他代理）
+        """
+        if max_retries is None:
+            max_retries = app_config.MAX_RETRIES
+        stats = self._stage_stats(stage)
+        stats['calls'] += 1
+        
+        attempt = 0
+        geo_retries = 0
+        while True:
+            attempt += 1
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                category = classify_error(e)
+                stats['errors'][category] += 1
+                logger.warning(f"{stage} attempt {attempt} failed ({category}): {str(e)}")
+                
+                delay = None
+                if attempt < max_retries and category != PERMANENT:
+                    if category != GEO:
+                        delay = self.backoff_delay(category, attempt, e)
+                    elif can_switch_proxy and geo_retries < app_config.RETRY_GEO_ATTEMPTS:
+                        geo_retries += 1
+                        delay = self.backoff_delay(category, attempt, e)
+                
+                if delay is not None:
+                    budget = _current_budget.get()
+                    if budget is not None and not budget.try_spend():
+                        stats['budget_exhausted'] += 1
+                        logger.warning(f"Retry budget exhausted ({budget.limit}), not retrying {stage}")
+                        delay = None
+                
+                if delay is None:
+                    stats['failures'] += 1
+                    raise
+                
+                stats['retries'] += 1
+                logger.info(f"Retrying {stage} in {delay:.1f} seconds...")
+                await asyncio.sleep(delay)
+    
+    def get_stats(self) -> Dict[str, Dict]:
+        """获取各阶段的重试统计"""
+        return {stage: {**stats, 'errors': stats['errors'].copy()} for stage, stats in self.stats.items()}
+
+# 全局重试引擎
+retry_engine = RetryEngine()
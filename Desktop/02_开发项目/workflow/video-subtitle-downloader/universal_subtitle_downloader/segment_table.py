@@ -0,0 +1,214 @@
+"""
+列式字幕片段表
+SegmentTable按列保存字幕片段：开始/结束时间为float64数组，置信度为float32数组，文本为字符串列表，
+语言保存为uint16编号加语言代码表（相同语言只存一份）。除文本外每个片段约23字节，
+而SubtitleSegment对象连同其中的浮点数对象约需120字节；时间相关的操作（校验、合并、平移）可以整列计算。
+
+SegmentTable可以代替List[SubtitleSegment]放在SubtitleTrack.segments中：支持len()、迭代（逐个产出SubtitleSegment）、
+下标和切片（切片共享底层数组，不复制）
+"""
+
+from itertools import compress
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .extractors.base_extractor import SubtitleSegment
+from .timestamp_format import TimestampColumns
+
+Cue = Tuple[float, float, str]
+
+class SegmentTable:
+    """列式字幕片段表"""
+    
+    def __init__(self, start, end, texts: List[str], confidence=None, language_codes=None,
+                 languages: Optional[List[str]] = None):
+        # dtype相同的数组直接引用，不复制
+        self.start = np.asarray(start, dtype=np.float64)
+        self.end = np.asarray(end, dtype=np.float64)
+        self.texts = texts if isinstance(texts, list) else list(texts)
+        count = len(self.texts)
+        self.confidence = np.ones(count, dtype=np.float32) if confidence is None else np.asarray(confidence, dtype=np.float32)
+        self.language_codes = np.zeros(count, dtype=np.uint16) if language_codes is None else np.asarray(language_codes, dtype=np.uint16)
+        self.languages = languages if languages is not None else ['']
+        self._timestamps: Optional[Tuple[TimestampColumns, TimestampColumns]] = None
+        
+        if not (len(self.start) == len(self.end) == len(self.confidence) == len(self.language_codes) == count):
+            raise ValueError("字幕片段表各列长度不一致")
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+    
+    def __bool__(self) -> bool:
+        return bool(self.texts)
+    
+    def _confidence_values(self, confidence) -> List[float]:
+        # float32约有7位有效数字，转回Python浮点数时舍入到7位小数，避免0.9变成0.8999999761581421
+        return np.round(np.asarray(confidence, dtype=np.float64), 7).tolist()
+    
+    def __iter__(self):
+        languages = self.languages
+        for start, end, text, confidence, code in zip(self.start.tolist(), self.end.tolist(), self.texts,
+                                                      self._confidence_values(self.confidence),
+                                                      self.language_codes.tolist()):
+            yield SubtitleSegment(start, end, text, confidence, languages[code])
+    
+    def __getitem__(self, index) -> Union[SubtitleSegment, 'SegmentTable']:
+        if isinstance(index, slice):
+            # 数组切片是视图，文本列表只复制引用
+            return SegmentTable(self.start[index], self.end[index], self.texts[index], self.confidence[index],
+                                self.language_codes[index], self.languages)
+        if isinstance(index, (int, np.integer)):
+            return SubtitleSegment(float(self.start[index]), float(self.end[index]), self.texts[index],
+                                   self._confidence_values(self.confidence[index]),
+                                   self.languages[self.language_codes[index]])
+        return self.take(index)
+    
+    def __repr__(self) -> str:
+        return f"SegmentTable({len(self)} segments, languages={self.languages})"
+    
+    def take(self, indices) -> 'SegmentTable':
+        """按下标数组或布尔掩码取出子表"""
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        texts = self.texts
+        return SegmentTable(self.start[indices], self.end[indices], [texts[i] for i in indices.tolist()],
+                            self.confidence[indices], self.language_codes[indices], self.languages)
+    
+    def to_segments(self) -> List[SubtitleSegment]:
+        """转换为List[SubtitleSegment]"""
+        return list(self)
+    
+    def durations(self) -> np.ndarray:
+        """各片段持续时间（秒）"""
+        return self.end - self.start
+    
+    def timestamps(self) -> Tuple[TimestampColumns, TimestampColumns]:
+        """开始/结束时间的整数分解及渲染好的时间戳（缓存；表创建后时间列视为只读）"""
+        if self._timestamps is None:
+            self._timestamps = (TimestampColumns(self.start), TimestampColumns(self.end))
+        return self._timestamps
+    
+    def language_of(self, index: int) -> str:
+        return self.languages[self.language_codes[index]]
+    
+    def shifted(self, offset: float) -> 'SegmentTable':
+        """整体平移时间（文本和语言列共享）"""
+        return SegmentTable(self.start + offset, self.end + offset, self.texts, self.confidence,
+                            self.language_codes, self.languages)
+    
+    def with_texts(self, texts: List[str], language: Optional[str] = None,
+                   confidence_scale: float = 1.0) -> 'SegmentTable':
+        """替换文本列（如翻译结果），时间列共享不复制；指定language时所有片段改为该语言"""
+        if len(texts) != len(self):
+            raise ValueError("文本数量与字幕片段数不一致")
+        confidence = self.confidence if confidence_scale == 1.0 else self.confidence * np.float32(confidence_scale)
+        if language is None:
+            return SegmentTable(self.start, self.end, texts, confidence, self.language_codes, self.languages)
+        return SegmentTable(self.start, self.end, texts, confidence, np.zeros(len(texts), dtype=np.uint16), [language])
+    
+    def find_issues(self) -> List[str]:
+        """校验片段（规则和提示与SubtitleFormatConverter.validate_segments相同），只对有问题的片段生成提示"""
+        inverted = self.start >= self.end
+        overlapping = np.zeros(len(self), dtype=bool)
+        overlapping[1:] = self.start[1:] < self.end[:-1]
+        # 等价于not text.strip()，map在C层面逐个调用
+        empty = (np.fromiter(map(str.isspace, self.texts), dtype=bool, count=len(self)) |
+                 (np.fromiter(map(len, self.texts), dtype=np.int64, count=len(self)) == 0))
+        bad_confidence = (self.confidence < 0) | (self.confidence > 1)
+        
+        messages = ("Start time >= End time", "Overlaps with previous segment", "Empty text", "Invalid confidence value")
+        flags = np.stack((inverted, overlapping, empty, bad_confidence))
+        flagged = np.flatnonzero(flags.any(axis=0))
+        
+        issues = []
+        for i, row in zip(flagged.tolist(), flags[:, flagged].T.tolist()):
+            for flag, message in zip(row, messages):
+                if flag:
+                    issues.append(f"Segment {i + 1}: {message}")
+        return issues
+    
+    def merge_short(self, min_duration: float, max_length: int, max_gap: float = 1.0) -> 'SegmentTable':
+        """合并短片段（规则与AISubtitleGenerator._merge_short_segments相同）
+        
+        当前片段（含已合并部分）时长小于min_duration、与下一片段间隔小于max_gap且合并后文本长度小于max_length时合并。
+        合并只能从本身就短且与下一片段间隔小的片段开始，这些起点整列算出，只从起点向后逐个判断
+        """
+        count = len(self)
+        if count <= 1:
+            return self
+        
+        close = self.start[1:] - self.end[:-1] < max_gap
+        candidates = np.flatnonzero(close & (self.end[:-1] - self.start[:-1] < min_duration)).tolist()
+        if not candidates:
+            return self
+        
+        starts, ends = self.start, self.end
+        texts = self.texts
+        confidences = self.confidence
+        keep = np.ones(count, dtype=bool)
+        merged_texts, merged_confidences = {}, {}
+        position = -1
+        for first in candidates:
+            if first <= position:
+                continue  # 已并入前一组
+            first_start = float(starts[first])
+            text, confidence = texts[first], float(confidences[first])
+            position = first
+            while (position + 1 < count and close[position] and float(ends[position]) - first_start < min_duration and
+                   len(text) + len(texts[position + 1]) < max_length):
+                position += 1
+                text = f"{text} {texts[position]}"
+                confidence = (confidence + float(confidences[position])) / 2
+                keep[position] = False
+            if position > first:
+                merged_texts[first] = text
+                merged_confidences[first] = confidence
+        
+        if not merged_texts:
+            return self
+        firsts = np.flatnonzero(keep)
+        lasts = np.append(firsts[1:] - 1, count - 1)
+        groups = np.searchsorted(firsts, list(merged_texts)).tolist()
+        new_texts = list(compress(texts, keep.tolist()))
+        for group, text in zip(groups, merged_texts.values()):
+            new_texts[group] = text
+        new_confidences = self.confidence[firsts]
+        new_confidences[groups] = list(merged_confidences.values())
+        return SegmentTable(self.start[firsts], self.end[lasts], new_texts, new_confidences,
+                            self.language_codes[firsts], self.languages)
+
+def table_from_segments(segments: Iterable[SubtitleSegment]) -> SegmentTable:
+    """由SubtitleSegment序列创建片段表（文本对象共享，语言代码去重）"""
+    segments = segments if isinstance(segments, Sequence) else list(segments)
+    languages: List[str] = ['']
+    codes = {'': 0}
+    language_codes = []
+    for segment in segments:
+        code = codes.get(segment.language)
+        if code is None:
+            code = codes[segment.language] = len(languages)
+            languages.append(segment.language)
+        language_codes.append(code)
+    
+    return SegmentTable(
+        np.fromiter((segment.start_time for segment in segments), dtype=np.float64, count=len(segments)),
+        np.fromiter((segment.end_time for segment in segments), dtype=np.float64, count=len(segments)),
+        [segment.text for segment in segments],
+        np.fromiter((segment.confidence for segment in segments), dtype=np.float32, count=len(segments)),
+        np.array(language_codes, dtype=np.uint16),
+        languages,
+    )
+
+def table_from_cues(cues: Iterable[Cue], language: str = '') -> SegmentTable:
+    """由subtitle_parser扫描出的(开始, 结束, 文本)元组直接创建片段表，不经过SubtitleSegment对象"""
+    cues = list(cues)
+    if not cues:
+        return SegmentTable([], [], [], languages=[language])
+    starts, ends, texts = zip(*cues)
+    return SegmentTable(starts, ends, list(texts), languages=[language])
+
+def as_table(segments: Union[SegmentTable, Iterable[SubtitleSegment]]) -> SegmentTable:
+    """片段表原样返回，片段列表转换为片段表"""
+    return segments if isinstance(segments, SegmentTable) else table_from_segments(segments)
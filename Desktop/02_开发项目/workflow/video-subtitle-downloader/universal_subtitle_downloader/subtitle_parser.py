@@ -0,0 +1,354 @@
+"""
+字幕解析
+提取器和格式转换器共用的解析函数。文本格式（VTT/SRT/ASS）使用模块级预编译的正则，
+在整篇内容上单遍扫描出每个字幕块（时间行及其后的文本行），不再按行切分整篇文档；
+XML/JSON格式（TTML、YouTube srv/json3）使用标准库解析。
+扫描函数生成(开始秒, 结束秒, 文本)元组，由调用方构造字幕片段。
+open_scanner()返回增量扫描器，可分块喂入内容（流式解析见subtitle_stream）
+"""
+
+import re
+import json
+import xml.etree.ElementTree as ET
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# (开始时间秒, 结束时间秒, 文本)
+Cue = Tuple[float, float, str]
+
+# [HH:]MM:SS[.mmm]，SRT的毫秒分隔符为逗号
+_TIMESTAMP = r'(?:(\d+):)?(\d+):(\d+(?:[.,]\d+)?)'
+
+TIMESTAMP_RE = re.compile(_TIMESTAMP)
+
+# VTT/SRT字幕块：行首的时间行（其后可有VTT设置），以及紧随其后直到空行的文本行
+CUE_RE = re.compile(
+    r'^[ \t]*' + _TIMESTAMP + r'[ \t]+-->[ \t]+' + _TIMESTAMP + r'[^\n]*\n?'
+    r'((?:[^\S\n]*\S[^\n]*(?:\n|\Z))*)',
+    re.M,
+)
+
+# VTT/HTML标签
+TAG_RE = re.compile(r'<[^>]+>')
+WHITESPACE_RE = re.compile(r'\s+')
+
+# ASS/SSA：节标题与Dialogue行（Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text），
+# 时间为H:MM:SS.cc，秒和厘秒分别捕获
+_ASS_TIME = r'(\d+):(\d+):(\d+)(?:\.(\d+))?'
+ASS_SECTION_RE = re.compile(r'^[ \t]*\[[^\]\n]*\]', re.M)
+ASS_DIALOGUE_RE = re.compile(
+    r'^[ \t]*Dialogue:[^,\n]*,[ \t]*' + _ASS_TIME + r'[ \t]*,[ \t]*' + _ASS_TIME + r'[ \t]*,'
+    r'(?:[^,\n]*,){6}([^\n]*)',
+    re.M,
+)
+ASS_TAG_RE = re.compile(r'\{[^}]*\}')
+
+# TTML时间：偏移时间（5s、100ms、1.5h）与复合时间（1h2m3.5s）
+TTML_NAMESPACE = '{http://www.w3.org/ns/ttml}'
+TTML_OFFSET_RE = re.compile(r'(\d+(?:\.\d+)?)(h|ms|m|s)')
+TTML_COMPOUND_RE = re.compile(r'(?:(\d+(?:\.\d+)?)h)?(?:(\d+(?:\.\d+)?)m)?(?:(\d+(?:\.\d+)?)s)?')
+TTML_UNITS = {'h': 3600.0, 'm': 60.0, 's': 1.0, 'ms': 0.001}
+
+def _normalize(content: str) -> str:
+    """去掉BOM并统一换行符"""
+    if content.startswith('\ufeff'):
+        content = content[1:]
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    return content
+
+def _to_seconds(hours: Optional[str], minutes: str, seconds: str) -> float:
+    if ',' in seconds:
+        seconds = seconds.replace(',', '.')
+    return (int(hours) * 3600 if hours else 0) + int(minutes) * 60 + float(seconds)
+
+def _ass_to_seconds(hours: str, minutes: str, seconds: str, centisecs: Optional[str]) -> float:
+    # 整数秒加厘秒/100（与float("10.79")不同，不会得到10.790000000000001之类的值）
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds) + (int(centisecs) / 100 if centisecs else 0)
+
+def parse_timestamp(time_str: str) -> float:
+    """解析HH:MM:SS.mmm、MM:SS.mmm、HH:MM:SS,mmm或纯秒数，无法解析时返回0"""
+    time_str = time_str.strip()
+    match = TIMESTAMP_RE.fullmatch(time_str)
+    if match:
+        return _to_seconds(*match.groups())
+    try:
+        return float(time_str)
+    except ValueError:
+        return 0.0
+
+def parse_ttml_time(time_str: str) -> float:
+    """解析TTML时间（偏移时间、复合时间或时钟时间），无法解析时返回0"""
+    if time_str[-1:] == 's' and time_str[-2:-1].isdigit():
+        try:
+            return float(time_str[:-1])  # 最常见的"12.345s"
+        except ValueError:
+            pass
+    time_str = time_str.strip()
+    match = TTML_OFFSET_RE.fullmatch(time_str)
+    if match:
+        return float(match.group(1)) * TTML_UNITS[match.group(2)]
+    if ':' in time_str:
+        return parse_timestamp(time_str)
+    match = TTML_COMPOUND_RE.fullmatch(time_str)
+    if match and time_str:
+        hours, minutes, seconds = (float(value) if value else 0.0 for value in match.groups())
+        return hours * 3600 + minutes * 60 + seconds
+    return parse_timestamp(time_str)
+
+def scan_vtt(content: str) -> Iterator[Cue]:
+    """扫描VTT字幕块（去掉标签和空行，没有文本的块跳过）"""
+    for match in CUE_RE.finditer(_normalize(content)):
+        h1, m1, s1, h2, m2, s2, text = match.groups()
+        if '<' in text:
+            text = TAG_RE.sub('', text)
+        text = text.strip()
+        if '\n' in text:
+            lines = [line.strip() for line in text.split('\n')]
+            text = '\n'.join([line for line in lines if line])
+        if text:
+            yield _to_seconds(h1, m1, s1), _to_seconds(h2, m2, s2), text
+
+def scan_srt(content: str) -> Iterator[Cue]:
+    """扫描SRT字幕块（序号行可省略，文本原样保留，只去掉末尾的换行和空白）"""
+    for match in CUE_RE.finditer(_normalize(content)):
+        h1, m1, s1, h2, m2, s2, text = match.groups()
+        text = text.rstrip()
+        if text:
+            yield _to_seconds(h1, m1, s1), _to_seconds(h2, m2, s2), text
+
+def scan_ass(content: str) -> Iterator[Cue]:
+    """扫描ASS/SSA的[Events]节中的Dialogue行（去掉样式标签，\\N和\\n转为换行）"""
+    content = _normalize(content)
+    start = content.find('[Events]')
+    if start < 0:
+        return
+    start = content.find('\n', start) + 1 or len(content)
+    next_section = ASS_SECTION_RE.search(content, start)
+    end = next_section.start() if next_section else len(content)
+    yield from _scan_ass_dialogues(content, start, end)
+
+def _scan_ass_dialogues(content: str, start: int, end: int) -> Iterator[Cue]:
+    for match in ASS_DIALOGUE_RE.finditer(content, start, end):
+        h1, m1, s1, c1, h2, m2, s2, c2, text = match.groups()
+        if '{' in text:
+            text = ASS_TAG_RE.sub('', text)
+        if '\\' in text:
+            text = text.replace('\\N', '\n').replace('\\n', '\n')
+        text = text.strip()
+        if text:
+            yield _ass_to_seconds(h1, m1, s1, c1), _ass_to_seconds(h2, m2, s2, c2), text
+
+def scan_ttml(content: str) -> Iterator[Cue]:
+    """扫描TTML/DFXP的<p>段落（带命名空间或不带）"""
+    root = ET.fromstring(content)
+    tag = TTML_NAMESPACE + 'p' if root.find('.//' + TTML_NAMESPACE + 'p') is not None else 'p'
+    for p in root.iter(tag):
+        cue = _ttml_cue(p)
+        if cue:
+            yield cue
+
+def _ttml_cue(p: ET.Element) -> Optional[Cue]:
+    text = ''.join(p.itertext()).strip()
+    if text:
+        return parse_ttml_time(p.get('begin', '0s')), parse_ttml_time(p.get('end', '0s')), text
+    return None
+
+def scan_youtube_srv(content: str) -> Iterator[Cue]:
+    """扫描YouTube srv1（<text start dur>，秒）和srv3（<p t d>，毫秒，文本可能拆分在<s>中）"""
+    root = ET.fromstring(content)
+    for element in root.iter('text'):
+        cue = _srv1_cue(element)
+        if cue:
+            yield cue
+    
+    for p in root.iter('p'):
+        cue = _srv3_cue(p)
+        if cue:
+            yield cue
+
+def _srv1_cue(element: ET.Element) -> Optional[Cue]:
+    start = float(element.get('start', 0))
+    text = element.text or ''
+    if '<' in text:
+        text = TAG_RE.sub('', text)
+    text = text.replace('&amp;', '&').replace('&lt;', '<').replace('&gt;', '>').strip()
+    if text:
+        return start, start + float(element.get('dur', 0)), text
+    return None
+
+def _srv3_cue(p: ET.Element) -> Optional[Cue]:
+    start = int(p.get('t', 0)) / 1000
+    text = ''.join(p.itertext()).strip()
+    if text:
+        return start, start + int(p.get('d', 0)) / 1000, text
+    return None
+
+def scan_youtube_json3(content: str) -> Iterator[Cue]:
+    """扫描YouTube json3的events"""
+    for event in json.loads(content).get('events', []):
+        segs = event.get('segs')
+        if not segs:
+            continue
+        start = event.get('tStartMs', 0) / 1000
+        text = ''.join(seg.get('utf8', '') for seg in segs).strip()
+        if text:
+            yield start, start + event.get('dDurationMs', 0) / 1000, text
+
+SCANNERS: Dict[str, Callable[[str], Iterator[Cue]]] = {
+    'vtt': scan_vtt,
+    'srt': scan_srt,
+    'ass': scan_ass,
+    'ssa': scan_ass,
+    'ttml': scan_ttml,
+    'dfxp': scan_ttml,
+    'srv1': scan_youtube_srv,
+    'srv2': scan_youtube_srv,
+    'srv3': scan_youtube_srv,
+    'json3': scan_youtube_json3,
+}
+
+def can_parse(format_type: str) -> bool:
+    return format_type.lower() in SCANNERS
+
+def scan_subtitles(content: str, format_type: str) -> Iterator[Cue]:
+    """按格式扫描字幕内容"""
+    scanner = SCANNERS.get(format_type.lower())
+    if scanner is None:
+        raise ValueError(f"不支持解析的字幕格式: {format_type}")
+    return scanner(content)
+
+class IncrementalScanner:
+    """增量扫描器：feed()喂入一段文本，返回其中已完整的字幕块；close()处理剩余内容"""
+    
+    def feed(self, text: str) -> List[Cue]:
+        raise NotImplementedError
+    
+    def close(self) -> List[Cue]:
+        raise NotImplementedError
+
+class BlockScanner(IncrementalScanner):
+    """文本格式（VTT/SRT）：缓冲到最后一个空行，之前的字幕块都已完整，交给整篇扫描函数"""
+    
+    def __init__(self, scanner: Callable[[str], Iterator[Cue]], boundary: str = '\n\n'):
+        self.scanner = scanner
+        self.boundary = boundary
+        self._buffer = ''
+        self._started = False
+    
+    def _append(self, text: str):
+        if not self._started and text:
+            self._started = True
+            if text.startswith('\ufeff'):
+                text = text[1:]
+        # 统一换行符（跨块的\r\n：末尾的\r留到下一块再处理）
+        text = self._buffer + text
+        if '\r' in text:
+            pending = text.endswith('\r')
+            text = text[:-1] if pending else text
+            text = text.replace('\r\n', '\n').replace('\r', '\n') + ('\r' if pending else '')
+        self._buffer = text
+    
+    def feed(self, text: str) -> List[Cue]:
+        self._append(text)
+        end = self._buffer.rfind(self.boundary)
+        if end < 0:
+            return []
+        end += len(self.boundary)
+        complete, self._buffer = self._buffer[:end], self._buffer[end:]
+        return list(self.scanner(complete))
+    
+    def close(self) -> List[Cue]:
+        remaining, self._buffer = self._buffer, ''
+        return list(self.scanner(remaining)) if remaining else []
+
+class AssScanner(BlockScanner):
+    """ASS/SSA：按完整行处理，记录是否处于[Events]节"""
+    
+    def __init__(self):
+        super().__init__(self._scan_lines, boundary='\n')
+        self._in_events = False
+        self._done = False
+    
+    def _scan_lines(self, content: str) -> Iterator[Cue]:
+        if self._done:
+            return
+        start = 0
+        if not self._in_events:
+            start = content.find('[Events]')
+            if start < 0:
+                return
+            self._in_events = True
+            start = content.find('\n', start) + 1 or len(content)
+        next_section = ASS_SECTION_RE.search(content, start)
+        if next_section:
+            self._done = True
+        yield from _scan_ass_dialogues(content, start, next_section.start() if next_section else len(content))
+
+class XmlScanner(IncrementalScanner):
+    """XML格式（TTML/srv）：XMLPullParser逐个取出已结束的段落元素，处理后从树中删除以保持内存恒定"""
+    
+    def __init__(self, handlers: Dict[str, Callable[[ET.Element], Optional[Cue]]]):
+        self.handlers = handlers
+        self._parser = ET.XMLPullParser(events=('start', 'end'))
+        self._stack: List[ET.Element] = []
+    
+    def _drain(self) -> List[Cue]:
+        cues = []
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                self._stack.append(element)
+                continue
+            self._stack.pop()
+            handler = self.handlers.get(element.tag)
+            if handler is None:
+                continue
+            cue = handler(element)
+            if cue:
+                cues.append(cue)
+            # 段落已处理，从父元素中移除（段落总是父元素当前的最后一个子元素）
+            if self._stack and len(self._stack[-1]) and self._stack[-1][-1] is element:
+                del self._stack[-1][-1]
+        return cues
+    
+    def feed(self, text: str) -> List[Cue]:
+        self._parser.feed(text)
+        return self._drain()
+    
+    def close(self) -> List[Cue]:
+        self._parser.close()
+        return self._drain()
+
+class WholeDocumentScanner(IncrementalScanner):
+    """无法增量解析的格式（json3）：缓冲整篇内容，close()时一次解析"""
+    
+    def __init__(self, scanner: Callable[[str], Iterator[Cue]]):
+        self.scanner = scanner
+        self._chunks: List[str] = []
+    
+    def feed(self, text: str) -> List[Cue]:
+        self._chunks.append(text)
+        return []
+    
+    def close(self) -> List[Cue]:
+        content, self._chunks = ''.join(self._chunks), []
+        return list(self.scanner(content))
+
+INCREMENTAL_SCANNERS: Dict[str, Callable[[], IncrementalScanner]] = {
+    'vtt': lambda: BlockScanner(scan_vtt),
+    'srt': lambda: BlockScanner(scan_srt),
+    'ass': AssScanner,
+    'ssa': AssScanner,
+    'ttml': lambda: XmlScanner({TTML_NAMESPACE + 'p': _ttml_cue, 'p': _ttml_cue}),
+    'dfxp': lambda: XmlScanner({TTML_NAMESPACE + 'p': _ttml_cue, 'p': _ttml_cue}),
+    'srv1': lambda: XmlScanner({'text': _srv1_cue, 'p': _srv3_cue}),
+    'srv2': lambda: XmlScanner({'text': _srv1_cue, 'p': _srv3_cue}),
+    'srv3': lambda: XmlScanner({'text': _srv1_cue, 'p': _srv3_cue}),
+    'json3': lambda: WholeDocumentScanner(scan_youtube_json3),
+}
+
+def open_scanner(format_type: str) -> IncrementalScanner:
+    """创建指定格式的增量扫描器"""
+    factory = INCREMENTAL_SCANNERS.get(format_type.lower())
+    if factory is None:
+        raise ValueError(f"不支持解析的字幕格式: {format_type}")
+    return factory()
@@ -0,0 +1,118 @@
+"""
+流式字幕解析
+iter_segments()从文本流、字节块迭代器或aiohttp响应中逐块读取字幕，解析出完整的字幕块就立即产出，
+内存占用与文件大小无关，下载尚未完成时即可开始转换和写入。
+同步来源用for遍历，aiohttp响应和异步迭代器用async for遍历
+"""
+
+import codecs
+import logging
+from typing import Any, AsyncIterator, Iterator, Optional
+
+import aiohttp
+
+from .config import app_config
+from .subtitle_parser import open_scanner
+from .extractors.base_extractor import SubtitleSegment
+
+logger = logging.getLogger(__name__)
+
+class SegmentIterator:
+    """字幕片段迭代器，同时支持for和async for"""
+    
+    def __init__(self, source: Any, format_type: str, encoding: Optional[str] = None,
+                 chunk_size: int = None):
+        self.source = source
+        self.format_type = format_type
+        self.encoding = encoding
+        self.chunk_size = chunk_size or app_config.CHUNK_SIZE
+        open_scanner(format_type)  # 尽早检查格式是否支持
+    
+    def _decoder(self, encoding: Optional[str] = None):
+        # utf-8-sig去掉开头的BOM，其余编码原样解码（多字节字符跨块时由增量解码器拼接）
+        encoding = self.encoding or encoding or 'utf-8'
+        if codecs.lookup(encoding).name == 'utf-8':
+            encoding = 'utf-8-sig'
+        return codecs.getincrementaldecoder(encoding)(errors='replace')
+    
+    def _text_chunks(self) -> Iterator[str]:
+        source = self.source
+        if isinstance(source, str):
+            for start in range(0, len(source), self.chunk_size):
+                yield source[start:start + self.chunk_size]
+            return
+        if isinstance(source, (bytes, bytearray)):
+            source = [bytes(source[start:start + self.chunk_size]) for start in range(0, len(source), self.chunk_size)]
+        elif hasattr(source, 'read'):
+            source = iter(lambda: self.source.read(self.chunk_size), self.source.read(0))
+        
+        decoder = None
+        for chunk in source:
+            if isinstance(chunk, str):
+                yield chunk
+                continue
+            if decoder is None:
+                decoder = self._decoder()
+            yield decoder.decode(chunk)
+        if decoder is not None:
+            yield decoder.decode(b'', final=True)
+    
+    def __iter__(self) -> Iterator[SubtitleSegment]:
+        if isinstance(self.source, aiohttp.ClientResponse) or hasattr(self.source, '__aiter__'):
+            raise TypeError("异步来源（aiohttp响应、异步迭代器）需要使用async for遍历")
+        
+        scanner = open_scanner(self.format_type)
+        for chunk in self._text_chunks():
+            for start, end, text in scanner.feed(chunk):
+                yield SubtitleSegment(start, end, text)
+        for start, end, text in scanner.close():
+            yield SubtitleSegment(start, end, text)
+    
+    async def _async_text_chunks(self) -> AsyncIterator[str]:
+        source = self.source
+        encoding = None
+        if isinstance(source, aiohttp.ClientResponse):
+            encoding = source.charset
+            source = source.content.iter_chunked(self.chunk_size)
+        
+        decoder = None
+        async for chunk in source:
+            if isinstance(chunk, str):
+                yield chunk
+                continue
+            if decoder is None:
+                decoder = self._decoder(encoding)
+            yield decoder.decode(chunk)
+        if decoder is not None:
+            yield decoder.decode(b'', final=True)
+    
+    async def __aiter__(self) -> AsyncIterator[SubtitleSegment]:
+        if not (isinstance(self.source, aiohttp.ClientResponse) or hasattr(self.source, '__aiter__')):
+            for segment in self:
+                yield segment
+            return
+        
+        scanner = open_scanner(self.format_type)
+        async for chunk in self._async_text_chunks():
+            for start, end, text in scanner.feed(chunk):
+                yield SubtitleSegment(start, end, text)
+        for start, end, text in scanner.close():
+            yield SubtitleSegment(start, end, text)
+
+def iter_segments(source: Any, format_type: str, encoding: Optional[str] = None,
+                  chunk_size: int = None) -> SegmentIterator:
+    """逐块解析字幕，边读边产出SubtitleSegment
+    
+    source可以是str、bytes、文件对象（文本或二进制）、str/bytes块的迭代器，
+    也可以是aiohttp响应或异步迭代器（需要async for）。json3等无法增量解析的格式会在读完后一次产出
+    
+    用法:
+        with open('lecture.vtt', 'rb') as f:
+            for segment in iter_segments(f, 'vtt'):
+                ...
+        
+        async with session.get(url) as response:
+            async for segment in iter_segments(response, 'vtt'):
+                ...
+    """
+    return SegmentIterator(source, format_type, encoding, chunk_size)
@@ -0,0 +1,142 @@
+"""
+批量时间戳格式化
+把一组时间（秒）一次转换为整数毫秒（ASS另算百分秒），再用NumPy按位拼出整列SRT/VTT/ASS时间戳字符串，
+结果与逐个格式化（format_*_time）逐字节相同。SegmentTable缓存其时间列的转换结果，同一轨道生成多种格式时只计算一次；
+普通片段列表和流式输入按批处理
+"""
+
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from .config import app_config
+
+# ---- 逐个格式化（原SubtitleFormatConverter._seconds_to_*_time的公式，批量结果以此为准） ----
+
+def format_srt_time(seconds: float) -> str:
+    """秒数转SRT时间格式 HH:MM:SS,mmm"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    millis = int((seconds - int(seconds)) * 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+def format_vtt_time(seconds: float) -> str:
+    """秒数转VTT时间格式 HH:MM:SS.mmm"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    millis = int((seconds - int(seconds)) * 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
+
+def format_ass_time(seconds: float) -> str:
+    """秒数转ASS时间格式 H:MM:SS.cc"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    centisecs = int((seconds - int(seconds)) * 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centisecs:02d}"
+
+SCALAR_FORMATTERS: Dict[str, Callable[[float], str]] = {
+    'srt': format_srt_time,
+    'vtt': format_vtt_time,
+    'ass': format_ass_time,
+}
+
+# 小时字段的最小宽度（SRT/VTT补零到两位，ASS不补零）
+HOUR_MIN_DIGITS = {'srt': 2, 'vtt': 2, 'ass': 1}
+
+def _render_fixed(count: int, parts: Sequence[Union[str, Tuple[np.ndarray, int]]]) -> List[str]:
+    """按定宽字段拼出字符串列：parts中的字符串原样填入，(整数数组, 宽度)按十进制补零填入"""
+    width = sum(len(part) if isinstance(part, str) else part[1] for part in parts)
+    chars = np.empty((count, width), dtype=np.uint8)
+    column = 0
+    for part in parts:
+        if isinstance(part, str):
+            chars[:, column:column + len(part)] = np.frombuffer(part.encode('ascii'), dtype=np.uint8)
+            column += len(part)
+            continue
+        values, digits = part
+        for offset in range(digits - 1, -1, -1):
+            chars[:, column + offset] = values % 10 + 48
+            values = values // 10
+        column += digits
+    return chars.view(f'S{width}').ravel().astype(f'U{width}').tolist()
+
+class TimestampColumns:
+    """一列时间（秒）的整数分解，按格式渲染时间戳字符串并缓存"""
+    
+    def __init__(self, seconds):
+        self.seconds = np.asarray(seconds, dtype=np.float64)
+        # 负数、非有限值和超出int64毫秒范围的值与原公式的取整方式不同（或会抛出异常），这些行逐个格式化
+        self.exact = np.isfinite(self.seconds) & (self.seconds >= 0) & (self.seconds < 1e12)
+        safe = np.where(self.exact, self.seconds, 0.0)
+        whole = np.trunc(safe)
+        fraction = safe - whole
+        # 整数毫秒（SRT/VTT共用）；ASS的百分秒按原公式由小数部分单独截断，不一定等于毫秒//10
+        self.milliseconds = whole.astype(np.int64) * 1000 + np.trunc(fraction * 1000).astype(np.int64)
+        self.centiseconds = np.trunc(fraction * 100).astype(np.int64)
+        self._rendered: Dict[str, List[str]] = {}
+    
+    def __len__(self) -> int:
+        return len(self.seconds)
+    
+    def render(self, style: str) -> List[str]:
+        """渲染整列时间戳（style为srt、vtt或ass）"""
+        rendered = self._rendered.get(style)
+        if rendered is None:
+            rendered = self._rendered[style] = self._render(style)
+        return rendered
+    
+    def _render(self, style: str) -> List[str]:
+        if style not in SCALAR_FORMATTERS:
+            raise ValueError(f"不支持的时间戳格式: {style}")
+        
+        total_seconds = self.milliseconds // 1000
+        hours = total_seconds // 3600
+        minutes = total_seconds // 60 % 60
+        secs = total_seconds % 60
+        fraction = self.centiseconds if style == 'ass' else self.milliseconds % 1000
+        
+        # 小时位数不固定，按位数分组，每组定宽渲染
+        hour_digits = np.full(len(self), HOUR_MIN_DIGITS[style], dtype=np.int64)
+        for digits in range(HOUR_MIN_DIGITS[style], 12):
+            hour_digits[hours >= 10 ** digits] = digits + 1
+        groups = np.unique(hour_digits).tolist()
+        
+        rendered = np.empty(len(self), dtype=object)
+        for digits in groups:
+            rows = slice(None) if len(groups) == 1 else np.flatnonzero(hour_digits == digits)
+            if style == 'ass':
+                parts = [(hours[rows], digits), ':', (minutes[rows], 2), ':', (secs[rows], 2), '.', (fraction[rows], 2)]
+            else:
+                separator = ',' if style == 'srt' else '.'
+                parts = [(hours[rows], digits), ':', (minutes[rows], 2), ':', (secs[rows], 2), separator, (fraction[rows], 3)]
+            rendered[rows] = _render_fixed(len(hours[rows]), parts)
+        rendered = rendered.tolist()
+        
+        formatter = SCALAR_FORMATTERS[style]
+        for i in np.flatnonzero(~self.exact).tolist():
+            rendered[i] = formatter(float(self.seconds[i]))
+        return rendered
+
+def iter_timed(segments: Iterable, style: str) -> Iterator[Tuple[object, str, str]]:
+    """逐个产出(片段, 开始时间戳, 结束时间戳)
+    
+    SegmentTable使用其缓存的时间列（同一表生成多种格式时只转换一次），其他输入每TIMESTAMP_BATCH_SIZE个片段批量格式化
+    """
+    timestamps = getattr(segments, 'timestamps', None)
+    if timestamps is not None:
+        starts, ends = timestamps()
+        yield from zip(segments, starts.render(style), ends.render(style))
+        return
+    
+    iterator = iter(segments)
+    while True:
+        batch = list(islice(iterator, app_config.TIMESTAMP_BATCH_SIZE))
+        if not batch:
+            return
+        starts = TimestampColumns(np.fromiter((segment.start_time for segment in batch), dtype=np.float64, count=len(batch)))
+        ends = TimestampColumns(np.fromiter((segment.end_time for segment in batch), dtype=np.float64, count=len(batch)))
+        yield from zip(batch, starts.render(style), ends.render(style))
@@ -8,18 +8,29 @@ import asyncio
 import logging
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any, Union
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from urllib.parse import urlparse
-import aiohttp
 from datetime import datetime
 
 from .config import subtitle_config, app_config, env_config
-from .extractors.base_extractor import SubtitleSegment, SubtitleTrack, VideoInfo
+from .extractors.base_extractor import SubtitleSegment, SubtitleTrack, VideoInfo, ExtractionContext
 from .extractors.youtube_extractor import YouTubeSubtitleExtractor
 from .extractors.bilibili_extractor import BilibiliSubtitleExtractor
 from .extractors.generic_extractor import GenericSubtitleExtractor
 from .ai_generator import AISubtitleGenerator, TranscriptionResult
 from .format_converter import SubtitleFormatConverter
+from .segment_table import as_table
+from .metadata_cache import MetadataCache
+from .url_canonicalizer import canonicalize_url, ShortLinkResolver
+from .executors import run_in_executor, get_executor_stats
+from .extraction_pool import ProcessExtractionPool
+from .ydl_pool import ydl_pool
+from .http_session import create_http_session
+from .platform_router import platform_router
+from .url_index import url_index
+from .rate_limiter import rate_limiter
+from .circuit_breaker import circuit_breakers
+from .retry_policy import retry_engine, retry_budget, batch_retry_limit
 from ..backend.task_manager import TaskManager
 from ..backend.enhanced_downloader import EnhancedDownloader
 
@@ -39,6 +50,8 @@ class DownloadRequest:
     quality_filter: str = "best"
     enable_translation: bool = False
     translation_target: str = "zh-CN"
+    bypass_cache: bool = False  # 跳过元数据缓存，强制重新提取
+    pages: Optional[str] = None  # 多P视频的分P选择："all"、"3"、"1-3,5"（仅B站）
 
 @dataclass
 class DownloadResult:
@@ -64,16 +77,27 @@ class UniversalSubtitleDownloader:
         self.format_converter = SubtitleFormatConverter()
         self.task_manager = TaskManager()
         self.enhanced_downloader = EnhancedDownloader()
+        self.metadata_cache = MetadataCache() if app_config.METADATA_CACHE_ENABLED else None
+        self.extraction_pool = ProcessExtractionPool() if app_config.EXTRACTION_BACKEND == "process" else None
         
         # 初始化平台提取器
+        extractor_kwargs = {
+            'metadata_cache': self.metadata_cache,
+            'extraction_pool': self.extraction_pool,
+        }
         self.extractors = {
-            'youtube': YouTubeSubtitleExtractor(proxy_manager),
-            'bilibili': BilibiliSubtitleExtractor(proxy_manager),
-            'generic': GenericSubtitleExtractor(proxy_manager),  # 通用提取器作为后备
+            'youtube': YouTubeSubtitleExtractor(proxy_manager, **extractor_kwargs),
+            'bilibili': BilibiliSubtitleExtractor(proxy_manager, **extractor_kwargs),
+            'generic': GenericSubtitleExtractor(proxy_manager, **extractor_kwargs),  # 通用提取器作为后备
         }
         
         # 会话管理
         self.session = None
+        self._url_index_warmup: Optional[asyncio.Future] = None
+        
+        # 请求合并：同一视频/语言集合的并发请求共享一次提取
+        self.short_link_resolver = ShortLinkResolver()
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
         
         # 统计信息
         self.stats = {
@@ -81,18 +105,41 @@ class UniversalSubtitleDownloader:
             'successful_downloads': 0,
             'ai_generated_count': 0,
             'failed_requests': 0,
+            'coalesced_requests': 0,
             'total_processing_time': 0.0
         }
     
     async def __aenter__(self):
         """异步上下文管理器入口"""
-        self.session = aiohttp.ClientSession()
+        # 共享连接池会话，注入所有提取器以复用连接
+        self.session = create_http_session()
+        for extractor in self.extractors.values():
+            extractor.session = self.session
+        
+        # 后台预热yt-dlp URL索引，首次验证URL时无需等待读取或构建索引
+        if not url_index.loaded:
+            self._url_index_warmup = asyncio.ensure_future(self._warm_up_url_index())
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """异步上下文管理器出口"""
         if self.session:
             await self.session.close()
+            for extractor in self.extractors.values():
+                extractor.session = None
+            self.session = None
+        if self.extraction_pool:
+            self.extraction_pool.close()
+        if self._url_index_warmup is not None:
+            self._url_index_warmup.cancel()
+            self._url_index_warmup = None
+    
+    async def _warm_up_url_index(self):
+        """在线程池中加载yt-dlp URL索引（失败时只记录，验证URL时会再次加载）"""
+        try:
+            await run_in_executor('extraction', url_index.ensure_loaded)
+        except Exception as e:
+            self.logger.warning(f"URL index warm-up failed: {str(e)}")
     
     async def download_subtitles(self, request: DownloadRequest) -> DownloadResult:
         """主要的字幕下载方法"""
@@ -103,21 +150,25 @@ class UniversalSubtitleDownloader:
             self.logger.info(f"Starting subtitle download for: {request.url}")
             
             # 1. 识别平台并获取适当的提取器
-            extractor = self._get_extractor(request.url)
+            url = await self.short_link_resolver.resolve(request.url, self.session)
+            extractor = self._get_extractor(url)
             if not extractor:
                 raise Exception(f"Unsupported platform for URL: {request.url}")
             
-            # 2. 提取视频信息
-            self.logger.info("Extracting video information...")
-            video_info = await extractor.extract_video_info(request.url)
-            
-            # 3. 设置默认语言和格式
+            # 2. 设置默认语言和格式
             languages = request.languages or ['zh-CN', 'en']
             formats = request.formats or ['srt', 'vtt']
             
-            # 4. 尝试提取现有字幕
-            self.logger.info(f"Attempting to extract existing subtitles for languages: {languages}")
-            subtitle_tracks = await extractor.extract_subtitles(request.url, languages)
+            # 3. 提取视频信息和现有字幕（同一视频/语言集合的并发请求共享一次提取）
+            self.logger.info(f"Extracting video information and subtitles for languages: {languages}")
+            flight_key = (self._canonical_key(url), tuple(sorted(set(languages))), request.bypass_cache, request.pages)
+            context, shared_tracks = await self._single_flight(
+                flight_key, lambda: self._extract_video_and_subtitles(
+                    extractor, url, languages, request.bypass_cache, request.pages
+                )
+            )
+            video_info = context.video_info
+            subtitle_tracks = list(shared_tracks)  # 共享轨道对象，列表各自独立
             
             ai_generated = False
             
@@ -127,7 +178,7 @@ class UniversalSubtitleDownloader:
                 
                 try:
                     # 下载音频用于AI转录
-                    audio_file = await self._download_audio_for_ai(request.url, video_info)
+                    audio_file = await self._download_audio_for_ai(extractor, context)
                     
                     if audio_file:
                         # 使用AI生成字幕
@@ -179,7 +230,9 @@ class UniversalSubtitleDownloader:
                                 url=track.url,
                                 segments=translated_segments,
                                 quality=track.quality,
-                                source=f"translated_from_{track.language}"
+                                source=f"translated_from_{track.language}",
+                                page=track.page,
+                                page_title=track.page_title
                             )
                             translated_tracks.append(translated_track)
                             
@@ -199,6 +252,9 @@ class UniversalSubtitleDownloader:
                 output_dir.mkdir(parents=True, exist_ok=True)
                 
                 for track in subtitle_tracks:
+                    if len(formats) > 1 and track.segments:
+                        # 转为列式片段表，时间戳在各格式间只格式化一次
+                        track = replace(track, segments=as_table(track.segments))
                     for format_type in formats:
                         try:
                             # 转换格式
@@ -215,8 +271,7 @@ class UniversalSubtitleDownloader:
                             
                             # 保存文件
                             file_path = output_dir / filename
-                            with open(file_path, 'w', encoding='utf-8') as f:
-                                f.write(content)
+                            await run_in_executor('file_io', self._write_file, file_path, content)
                             
                             downloaded_files.append(str(file_path))
                             self.logger.info(f"Saved subtitle: {filename}")
@@ -272,45 +327,85 @@ class UniversalSubtitleDownloader:
                 total_segments=0
             )
     
+    async def _extract_video_and_subtitles(self, extractor, url: str, languages: List[str],
+                                           bypass_cache: bool = False,
+                                           pages: Optional[str] = None) -> Tuple[ExtractionContext, List[SubtitleTrack]]:
+        """提取视频信息和现有字幕（元数据只提取一次）"""
+        context = await extractor.extract_context(url, use_cache=not bypass_cache, captions_only=True)
+        
+        if pages and isinstance(extractor, BilibiliSubtitleExtractor):
+            subtitle_tracks = await extractor.extract_page_subtitles(url, languages, pages, context=context)
+        else:
+            if pages:
+                self.logger.warning(f"Page selection is only supported for Bilibili, ignoring: {pages}")
+            subtitle_tracks = await extractor.extract_subtitles(url, languages, context=context)
+        return context, subtitle_tracks
+    
+    def _canonical_key(self, url: str) -> str:
+        """请求合并用的视频键，无法规范化时使用原URL"""
+        canonical = canonicalize_url(url)
+        return canonical.key if canonical else url.strip()
+    
+    def _single_flight(self, key: Tuple, factory) -> asyncio.Future:
+        """同一键的并发调用只执行一次factory，其他调用方等待共享结果"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._on_flight_done(key, t))
+        else:
+            self.stats['coalesced_requests'] += 1
+            self.logger.info(f"Joining in-flight extraction for {key[0]}")
+        
+        # shield: 单个调用方被取消时不影响其他等待者
+        return asyncio.shield(task)
+    
+    def _on_flight_done(self, key: Tuple, task: asyncio.Future):
+        """共享提取完成后移出在途表"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # 标记异常已读取，避免无人等待时告警
+    
     def _get_extractor(self, url: str):
-        """根据URL获取合适的提取器"""
-        # 按优先级检查专用提取器
-        priority_extractors = ['youtube', 'bilibili']
+        """根据URL获取合适的提取器（按域名后缀索引路由，只解析一次URL）"""
+        platform = platform_router.resolve(url)
+        if platform is None:
+            return None
         
-        for platform in priority_extractors:
-            if platform in self.extractors:
-                extractor = self.extractors[platform]
-                if extractor.can_handle(url):
-                    return extractor
+        extractor = self.extractors.get(platform)
+        if extractor is not None and platform != platform_router.fallback_platform:
+            return extractor
         
-        # 如果没有找到专用提取器，使用通用提取器
-        if 'generic' in self.extractors:
-            generic_extractor = self.extractors['generic']
-            if generic_extractor.can_handle(url):
-                return generic_extractor
+        # 直接加入extractors、未登记域名的自定义提取器仍按can_handle检查
+        routed_platforms = platform_router.platforms
+        for name, extractor in self.extractors.items():
+            if name != 'generic' and name not in routed_platforms and extractor.can_handle(url):
+                return extractor
         
-        return None
+        # 如果没有找到专用提取器，使用通用提取器
+        return self.extractors.get('generic')
+    
+    def register_extractor(self, platform: str, extractor, domains: Optional[List[str]] = None):
+        """注册平台提取器，domains为该平台的域名（子域名自动匹配）"""
+        if domains:
+            platform_router.register(platform, domains)
+        extractor.session = self.session
+        self.extractors[platform] = extractor
     
-    async def _download_audio_for_ai(self, url: str, video_info: VideoInfo) -> Optional[str]:
-        """下载音频文件用于AI转录"""
+    async def _download_audio_for_ai(self, extractor, context: ExtractionContext) -> Optional[str]:
+        """下载音频文件用于AI转录（复用已提取的上下文）"""
         try:
             # 创建临时目录
             temp_dir = app_config.CACHE_DIR / "audio"
             temp_dir.mkdir(exist_ok=True, parents=True)
             
             # 生成临时文件名
-            audio_filename = f"{video_info.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
+            audio_filename = f"{context.video_info.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
             audio_path = temp_dir / audio_filename
             
-            # 使用enhanced_downloader下载音频
-            download_result = await self.enhanced_downloader.download_audio_only(
-                url, str(audio_path)
-            )
-            
-            if download_result and os.path.exists(audio_path):
-                return str(audio_path)
-            
-            return None
+            # 由提取器基于已有信息下载音频，避免再次提取元数据
+            return await extractor.download_audio(context, str(audio_path))
             
         except Exception as e:
             self.logger.error(f"Failed to download audio for AI: {str(e)}")
@@ -333,16 +428,32 @@ class UniversalSubtitleDownloader:
                 uploader=self._sanitize_filename(video_info.uploader),
                 id=video_info.id,
                 quality=track.quality,
-                source=track.source
+                source=track.source,
+                page=track.page or 1,
+                page_title=self._sanitize_filename(track.page_title)
             )
             
+            # 多P轨道的模板未包含分P时自动追加，避免各分P文件互相覆盖
+            if track.page is not None and '{page' not in template:
+                filename = self._append_page_suffix(filename, track.page)
+            
             return filename
             
         except Exception as e:
             self.logger.warning(f"Failed to generate filename from template: {str(e)}")
             # 回退到简单格式
             safe_title = self._sanitize_filename(video_info.title)
-            return f"{safe_title}_{track.language}.{format_type}"
+            filename = f"{safe_title}_{track.language}.{format_type}"
+            if track.page is not None:
+                filename = self._append_page_suffix(filename, track.page)
+            return filename
+    
+    def _append_page_suffix(self, filename: str, page: int) -> str:
+        """在扩展名前追加分P后缀"""
+        stem, dot, ext = filename.rpartition('.')
+        if not dot:
+            return f"{filename}_p{page}"
+        return f"{stem}_p{page}.{ext}"
     
     def _sanitize_filename(self, filename: str) -> str:
         """清理文件名"""
@@ -372,9 +483,10 @@ class UniversalSubtitleDownloader:
             async with semaphore:
                 return await self.download_subtitles(request)
         
-        # 并发执行下载
-        tasks = [download_with_semaphore(req) for req in requests]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # 并发执行下载（整批共享重试预算，大面积故障时不会因重试成倍放大请求）
+        with retry_budget(batch_retry_limit(len(requests))) as budget:
+            tasks = [download_with_semaphore(req) for req in requests]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
         
         # 处理异常结果
         processed_results = []
@@ -392,16 +504,28 @@ class UniversalSubtitleDownloader:
                 processed_results.append(result)
         
         successful = sum(1 for r in processed_results if r.success)
-        self.logger.info(f"Batch download completed: {successful}/{len(requests)} successful")
+        self.logger.info(
+            f"Batch download completed: {successful}/{len(requests)} successful, "
+            f"{budget.used}/{budget.limit} retries used"
+        )
         
         return processed_results
     
-    async def get_video_info(self, url: str) -> Optional[VideoInfo]:
-        """获取视频信息"""
+    async def _get_context(self, url: str) -> Optional[ExtractionContext]:
+        """获取提取上下文（并发的同一视频请求共享一次提取）"""
+        url = await self.short_link_resolver.resolve(url, self.session)
+        extractor = self._get_extractor(url)
+        if not extractor:
+            return None
+        return await self._single_flight((self._canonical_key(url), None), lambda: extractor.extract_context(url))
+    
+    async def get_video_info(self, url: str, include_formats: bool = False) -> Optional[VideoInfo]:
+        """获取视频信息（格式信息较大，仅在include_formats为True时生成）"""
         try:
-            extractor = self._get_extractor(url)
-            if extractor:
-                return await extractor.extract_video_info(url)
+            context = await self._get_context(url)
+            if context:
+                extractor = self._get_extractor(context.url)
+                return await extractor.extract_video_info(context.url, context, include_formats=include_formats)
             return None
         except Exception as e:
             self.logger.error(f"Failed to get video info: {str(e)}")
@@ -410,11 +534,11 @@ class UniversalSubtitleDownloader:
     async def list_available_subtitles(self, url: str) -> Dict[str, Any]:
         """列出可用的字幕"""
         try:
-            extractor = self._get_extractor(url)
-            if not extractor:
+            context = await self._get_context(url)
+            if not context:
                 return {'error': 'Unsupported platform'}
             
-            video_info = await extractor.extract_video_info(url)
+            video_info = context.video_info
             
             return {
                 'video_info': video_info.to_dict(),
@@ -440,6 +564,11 @@ class UniversalSubtitleDownloader:
         """获取支持的格式"""
         return self.format_converter.get_supported_formats()
     
+    def _write_file(self, file_path: Path, content: str):
+        """写入字幕文件（在file_io线程池中执行）"""
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    
     def get_stats(self) -> Dict[str, Any]:
         """获取统计信息"""
         stats = self.stats.copy()
@@ -450,6 +579,22 @@ class UniversalSubtitleDownloader:
             stats['success_rate'] = 0.0
             stats['average_processing_time'] = 0.0
         
+        if self.metadata_cache:
+            stats['metadata_cache'] = self.metadata_cache.get_stats()
+        
+        if self.extraction_pool:
+            stats['extraction_pool'] = self.extraction_pool.get_stats()
+        
+        stats['ydl_pool'] = ydl_pool.get_stats()
+        stats['url_index'] = url_index.get_stats()
+        stats['rate_limits'] = rate_limiter.get_stats()
+        stats['circuit_breakers'] = circuit_breakers.get_stats()
+        stats['retries'] = retry_engine.get_stats()
+        if self.proxy_manager is not None and hasattr(self.proxy_manager, 'get_stats'):
+            stats['proxies'] = self.proxy_manager.get_stats()
+        stats['subtitle_format_scores'] = self.extractors['generic'].get_format_stats()
+        stats['executors'] = get_executor_stats()
+        
         return stats
     
     async def cleanup_cache(self, max_age_days: int = 7):
@@ -479,8 +624,11 @@ class UniversalSubtitleDownloader:
         except Exception as e:
             self.logger.error(f"Cache cleanup failed: {str(e)}")
     
-    async def validate_url(self, url: str) -> Dict[str, Any]:
-        """验证URL是否受支持"""
+    async def validate_url(self, url: str, deep: bool = False) -> Dict[str, Any]:
+        """验证URL是否受支持
+        
+        默认只查平台路由和yt-dlp URL索引，不访问网络；deep=True时实际提取视频信息验证
+        """
         try:
             extractor = self._get_extractor(url)
             if not extractor:
@@ -490,24 +638,51 @@ class UniversalSubtitleDownloader:
                     'supported_platforms': list(self.get_supported_platforms().keys())
                 }
             
-            # 尝试获取基本信息来验证URL
-            try:
-                video_info = await extractor.extract_video_info(url)
-                return {
-                    'valid': True,
-                    'platform': video_info.platform,
-                    'title': video_info.title,
-                    'duration': video_info.duration,
-                    'has_subtitles': bool(video_info.available_subtitles or video_info.automatic_captions)
-                }
-            except Exception as e:
+            if deep:
+                return await self._validate_url_online(url)
+            
+            # 进入上下文时已开始预热；未预热（或预热失败）时在线程池中加载（持久化后只需读取一次文件）
+            if not url_index.loaded:
+                await run_in_executor('extraction', url_index.ensure_loaded)
+            ydl_match = url_index.match(url)
+            
+            platform = next(name for name, registered in self.extractors.items() if registered is extractor)
+            dedicated = platform != 'generic'
+            if not (dedicated or ydl_match):
                 return {
                     'valid': False,
-                    'error': f'Failed to access video: {str(e)}'
+                    'platform': platform,
+                    'error': 'No extractor recognizes this URL (use deep=True to probe the page)'
                 }
+            
+            return {
+                'valid': True,
+                'platform': platform,
+                'extractor': ydl_match['ie_name'] if ydl_match else None,
+                'extractor_working': ydl_match['working'] if ydl_match else None,
+                'deep': False,
+            }
                 
         except Exception as e:
             return {
                 'valid': False,
                 'error': str(e)
-            }
\ No newline at end of file
+            }
+    
+    async def _validate_url_online(self, url: str) -> Dict[str, Any]:
+        """通过实际提取视频信息验证URL（需要网络）"""
+        try:
+            video_info = (await self._get_context(url)).video_info
+            return {
+                'valid': True,
+                'platform': video_info.platform,
+                'title': video_info.title,
+                'duration': video_info.duration,
+                'has_subtitles': bool(video_info.available_subtitles or video_info.automatic_captions),
+                'deep': True,
+            }
+        except Exception as e:
+            return {
+                'valid': False,
+                'error': f'Failed to access video: {str(e)}'
+            }
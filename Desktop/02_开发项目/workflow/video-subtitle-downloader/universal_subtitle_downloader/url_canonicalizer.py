@@ -0,0 +1,146 @@
+"""
+视频URL规范化
+将同一视频的不同URL写法（youtu.be、m.youtube.com、watch?v=、b23.tv短链等）归一为(平台, 视频ID)
+"""
+
+import re
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlparse, parse_qs
+import aiohttp
+
+from .http_session import create_http_session
+
+logger = logging.getLogger(__name__)
+
+# YouTube视频ID为11位
+YOUTUBE_ID_RE = re.compile(r'^[A-Za-z0-9_-]{11}$')
+YOUTUBE_PATH_RE = re.compile(r'^/(?:shorts|embed|v|live|e)/([A-Za-z0-9_-]{11})')
+YOUTUBE_HOSTS = ('youtube.com', 'youtube-nocookie.com')
+
+BILIBILI_BV_RE = re.compile(r'(BV[a-zA-Z0-9]{10})')
+BILIBILI_AV_RE = re.compile(r'(?:^|/)av(\d+)', re.IGNORECASE)
+BILIBILI_HOSTS = ('bilibili.com',)
+
+# 需要跟随跳转才能确定视频ID的短链域名
+SHORT_LINK_HOSTS = ('b23.tv',)
+
+@dataclass(frozen=True)
+class CanonicalVideo:
+    """规范化后的视频标识"""
+    platform: str
+    video_id: str
+    
+    @property
+    def key(self) -> str:
+        """用于去重和缓存的唯一键"""
+        return f"{self.platform}:{self.video_id}"
+    
+    @property
+    def url(self) -> str:
+        """规范URL"""
+        if self.platform == 'youtube':
+            return f"https://www.youtube.com/watch?v={self.video_id}"
+        if self.platform == 'bilibili':
+            video_id, _, page = self.video_id.partition('_p')
+            url = f"https://www.bilibili.com/video/{video_id}"
+            return f"{url}?p={page}" if page else url
+        return self.video_id
+
+def _host_matches(host: str, domains) -> bool:
+    """检查主机名是否为指定域名或其子域名"""
+    return any(host == domain or host.endswith('.' + domain) for domain in domains)
+
+def canonicalize_url(url: str) -> Optional[CanonicalVideo]:
+    """将视频URL规范化为(平台, 视频ID)，无法识别时返回None"""
+    try:
+        parsed = urlparse(url.strip())
+    except ValueError:
+        return None
+    
+    host = (parsed.hostname or '').lower()
+    path = parsed.path or '/'
+    
+    # YouTube
+    if host == 'youtu.be':
+        video_id = path.lstrip('/').split('/')[0]
+        if YOUTUBE_ID_RE.match(video_id):
+            return CanonicalVideo('youtube', video_id)
+        return None
+    
+    if _host_matches(host, YOUTUBE_HOSTS):
+        if path.rstrip('/') == '/watch':
+            video_id = parse_qs(parsed.query).get('v', [''])[0]
+            if YOUTUBE_ID_RE.match(video_id):
+                return CanonicalVideo('youtube', video_id)
+            return None
+        
+        match = YOUTUBE_PATH_RE.match(path)
+        if match:
+            return CanonicalVideo('youtube', match.group(1))
+        return None
+    
+    # 哔哩哔哩（b23.tv短链路径中直接带BV号时无需跳转）
+    if _host_matches(host, BILIBILI_HOSTS) or _host_matches(host, SHORT_LINK_HOSTS):
+        bv_match = BILIBILI_BV_RE.search(path)
+        if bv_match:
+            video_id = bv_match.group(1)
+        else:
+            av_match = BILIBILI_AV_RE.search(path)
+            if not av_match:
+                return None
+            video_id = f"av{av_match.group(1)}"
+        
+        # 多P视频按分P区分
+        page = parse_qs(parsed.query).get('p', ['1'])[0]
+        if page.isdigit() and int(page) > 1:
+            video_id = f"{video_id}_p{page}"
+        return CanonicalVideo('bilibili', video_id)
+    
+    return None
+
+def is_short_link(url: str) -> bool:
+    """是否为需要跟随跳转解析的短链"""
+    try:
+        host = (urlparse(url.strip()).hostname or '').lower()
+    except ValueError:
+        return False
+    return _host_matches(host, SHORT_LINK_HOSTS)
+
+class ShortLinkResolver:
+    """短链解析器（带结果缓存）"""
+    
+    def __init__(self, max_entries: int = 4096):
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.max_entries = max_entries
+        self._resolved: Dict[str, str] = {}
+    
+    async def resolve(self, url: str, session: aiohttp.ClientSession = None) -> str:
+        """跟随跳转得到最终URL，失败时返回原URL"""
+        if not is_short_link(url) or canonicalize_url(url):
+            return url
+        
+        if url in self._resolved:
+            return self._resolved[url]
+        
+        try:
+            if session is not None and not session.closed:
+                resolved = await self._follow(session, url)
+            else:
+                async with create_http_session() as temp_session:
+                    resolved = await self._follow(temp_session, url)
+        except Exception as e:
+            self.logger.warning(f"Failed to resolve short link {url}: {str(e)}")
+            return url
+        
+        if len(self._resolved) >= self.max_entries:
+            self._resolved.pop(next(iter(self._resolved)))
+        self._resolved[url] = resolved
+        self.logger.info(f"Resolved short link {url} -> {resolved}")
+        return resolved
+    
+    async def _follow(self, session: aiohttp.ClientSession, url: str) -> str:
+        """发起请求并返回跳转后的URL（不读取响应体）"""
+        async with session.get(url, allow_redirects=True, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            return str(response.url)
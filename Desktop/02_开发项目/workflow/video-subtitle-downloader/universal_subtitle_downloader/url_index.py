@@ -0,0 +1,433 @@
+"""
+yt-dlp URL索引
+预先分析yt-dlp所有提取器的_VALID_URL正则，按"匹配时URL中必然出现的单词"建立倒排索引，
+离线判断URL是否受支持及对应的提取器（每个URL只需尝试少量候选正则），索引可持久化到缓存目录
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+from .config import app_config
+
+logger = logging.getLogger(__name__)
+
+# 索引文件格式版本（分析规则变化时递增，使旧的持久化索引失效）
+INDEX_FORMAT_VERSION = 1
+
+# URL分词：小写后按非字母数字字符切分
+WORD_RE = re.compile(r'[a-z0-9]+')
+WORD_CHARS = frozenset('abcdefghijklmnopqrstuvwxyz0123456789')
+
+# 只确定开头的单词按前缀登记（键为前缀加*），如搜索提取器的"ytsearch10:"
+PREFIX_LENGTH = 3
+
+# URL匹配结果的缓存上限（同一URL常被反复校验）
+MATCH_CACHE_SIZE = 4096
+
+# 通用提取器匹配任意URL，不参与索引
+GENERIC_IE_KEY = 'Generic'
+
+_REPEAT_OPS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) + tuple(
+    op for op in (getattr(sre_constants, 'POSSESSIVE_REPEAT', None),) if op is not None
+)
+_ZERO_WIDTH_OPS = (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT)
+
+def _is_separator(code: int) -> bool:
+    """字面字符是否为分词边界（非字母数字）"""
+    return chr(code).lower() not in WORD_CHARS
+
+class _Shape:
+    """正则片段的形状：是否可为空、匹配内容首尾是否必为分隔符"""
+    
+    __slots__ = ('nullable', 'starts_sep', 'ends_sep')
+    
+    def __init__(self, nullable: bool, starts_sep: bool, ends_sep: bool):
+        self.nullable = nullable
+        self.starts_sep = starts_sep
+        self.ends_sep = ends_sep
+
+_UNKNOWN_SHAPE = _Shape(True, False, False)
+_EMPTY_SHAPE = _Shape(True, True, True)
+# 字符串开头/结尾本身就是分词边界
+_ANCHOR_SHAPE = _Shape(False, True, True)
+_ANCHORS = (sre_constants.AT_BEGINNING, sre_constants.AT_BEGINNING_STRING,
+            sre_constants.AT_END, sre_constants.AT_END_STRING)
+
+def _item_shape(op, av) -> _Shape:
+    """单个正则元素的形状"""
+    if op == sre_constants.LITERAL:
+        sep = _is_separator(av)
+        return _Shape(False, sep, sep)
+    if op == sre_constants.IN:
+        sep = all(item_op == sre_constants.LITERAL and _is_separator(item_av) for item_op, item_av in av)
+        return _Shape(False, sep, sep)
+    if op in (sre_constants.ANY, sre_constants.NOT_LITERAL):
+        return _Shape(False, False, False)
+    if op == sre_constants.AT and av in _ANCHORS:
+        return _ANCHOR_SHAPE
+    if op in _ZERO_WIDTH_OPS:
+        return _EMPTY_SHAPE
+    if op == sre_constants.SUBPATTERN:
+        return _seq_shape(av[-1])
+    if op == getattr(sre_constants, 'ATOMIC_GROUP', None):
+        return _seq_shape(av)
+    if op == sre_constants.BRANCH:
+        shapes = [_seq_shape(branch) for branch in av[1]]
+        return _Shape(
+            any(shape.nullable for shape in shapes),
+            all(shape.starts_sep for shape in shapes),
+            all(shape.ends_sep for shape in shapes),
+        )
+    if op in _REPEAT_OPS:
+        min_count, _, child = av
+        shape = _seq_shape(child)
+        return _Shape(min_count == 0 or shape.nullable, shape.starts_sep, shape.ends_sep)
+    return _UNKNOWN_SHAPE
+
+def _seq_shape(items) -> _Shape:
+    """元素序列的形状"""
+    shapes = [_item_shape(op, av) for op, av in items]
+    nullable = all(shape.nullable for shape in shapes)
+    
+    starts_sep = True
+    for shape in shapes:
+        if not shape.starts_sep:
+            starts_sep = False
+            break
+        if not shape.nullable:
+            break
+    
+    ends_sep = True
+    for shape in reversed(shapes):
+        if not shape.ends_sep:
+            ends_sep = False
+            break
+        if not shape.nullable:
+            break
+    
+    return _Shape(nullable, starts_sep, ends_sep)
+
+def _boundary_before(shapes: List[_Shape], index: int, left: bool) -> bool:
+    """序列第index个元素之前的字符是否必为分隔符（或字符串开头）"""
+    for shape in reversed(shapes[:index]):
+        if not shape.ends_sep:
+            return False
+        if not shape.nullable:
+            return True
+    return left
+
+def _boundary_after(shapes: List[_Shape], index: int, right: bool) -> bool:
+    """序列第index个元素之后的字符是否必为分隔符"""
+    for shape in shapes[index + 1:]:
+        if not shape.starts_sep:
+            return False
+        if not shape.nullable:
+            return True
+    return right
+
+def _pick_option(options: List[frozenset]) -> Optional[frozenset]:
+    """在多个必要条件中挑选候选最少、单词最长（优先完整单词）的一个"""
+    if not options:
+        return None
+    return min(options, key=lambda option: (len(option), -min(len(word.rstrip('*')) + 1 - word.endswith('*') for word in option)))
+
+def _required_words(items, left: bool, right: bool) -> List[frozenset]:
+    """分析正则序列，返回若干必要条件：每个条件是一组单词，匹配的URL分词后至少包含其中之一"""
+    shapes = [_item_shape(op, av) for op, av in items]
+    options = []
+    
+    # 连续字面字符组成的片段中，两侧都是分隔符的完整单词必然出现
+    run_start = None
+    for index, (op, av) in enumerate(list(items) + [(None, None)]):
+        if op == sre_constants.LITERAL:
+            if run_start is None:
+                run_start = index
+            continue
+        
+        if run_start is not None:
+            text = ''.join(chr(code).lower() for _, code in items[run_start:index])
+            bounded_left = _boundary_before(shapes, run_start, left)
+            bounded_right = _boundary_after(shapes, index - 1, right)
+            for match in WORD_RE.finditer(text):
+                if match.start() == 0 and not bounded_left:
+                    continue
+                word = match.group()
+                if match.end() == len(text) and not bounded_right:
+                    if len(word) >= PREFIX_LENGTH:
+                        options.append(frozenset((word[:PREFIX_LENGTH] + '*',)))
+                    continue
+                options.append(frozenset((word,)))
+            run_start = None
+        
+        if op is None:
+            break
+        
+        child_left = _boundary_before(shapes, index, left)
+        child_right = _boundary_after(shapes, index, right)
+        if op == sre_constants.SUBPATTERN:
+            options.extend(_required_words(av[-1], child_left, child_right))
+        elif op == getattr(sre_constants, 'ATOMIC_GROUP', None):
+            options.extend(_required_words(av, child_left, child_right))
+        elif op == sre_constants.BRANCH:
+            # 每个分支都要给出条件，合并后才是整个分支结构的必要条件
+            union = set()
+            for branch in av[1]:
+                option = _pick_option(_required_words(branch, child_left, child_right))
+                if option is None:
+                    union = None
+                    break
+                union |= option
+            if union:
+                options.append(frozenset(union))
+        elif op in _REPEAT_OPS:
+            min_count, max_count, child = av
+            if min_count >= 1:
+                # 重复多次时相邻两次之间的边界由子模式自身首尾决定
+                child_shape = _seq_shape(child)
+                if max_count != 1:
+                    child_left = child_left and child_shape.ends_sep
+                    child_right = child_right and child_shape.starts_sep
+                options.extend(_required_words(child, child_left, child_right))
+    
+    return options
+
+def analyze_pattern(pattern: str) -> List[frozenset]:
+    """分析单个_VALID_URL正则（yt-dlp使用re.match，即从URL开头匹配）"""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except (re.error, RecursionError, OverflowError):
+        return []
+    return _required_words(list(parsed), True, False)
+
+def _uses_custom_matching(ie_class) -> bool:
+    """提取器是否重写了suitable/_match_valid_url（匹配正则后还需调用类方法确认）"""
+    from yt_dlp.extractor.common import InfoExtractor
+    return (
+        getattr(ie_class.suitable, '__func__', None) is not InfoExtractor.suitable.__func__
+        or getattr(ie_class._match_valid_url, '__func__', None) is not InfoExtractor._match_valid_url.__func__
+    )
+
+def _ydl_version() -> str:
+    try:
+        from yt_dlp.version import __version__
+        return __version__
+    except ImportError:
+        return 'unknown'
+
+class ExtractorURLIndex:
+    """yt-dlp提取器URL索引
+    
+    用法:
+        match = url_index.match("https://www.youtube.com/watch?v=xxx")
+        # {'ie_key': 'Youtube', 'ie_name': 'youtube', 'working': True}
+    """
+    
+    def __init__(self, index_file: Path = None, persist: bool = None):
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.index_file = Path(index_file) if index_file else app_config.URL_INDEX_FILE
+        self.persist = app_config.URL_INDEX_PERSIST if persist is None else persist
+        self._lock = threading.Lock()
+        self._loaded = False
+        
+        # 提取器条目（保持yt-dlp的提取器顺序，先匹配者优先）
+        self._entries: List[Dict] = []
+        self._word_index: Dict[str, List[int]] = {}
+        self._unindexed: List[int] = []
+        self._compiled: Dict[int, Tuple] = {}
+        self._match_cache: Dict[str, Optional[Dict]] = {}
+        
+        # 统计信息
+        self.stats = {
+            'lookups': 0,
+            'cache_hits': 0,
+            'regex_checks': 0,
+            'indexed_patterns': 0,
+            'unindexed_patterns': 0,
+        }
+    
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+    
+    def ensure_loaded(self):
+        """加载索引：优先读取与当前yt-dlp版本一致的持久化文件，否则重新构建"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            
+            data = self._read_index_file() if self.persist else None
+            if data is None:
+                data = self._build()
+                if self.persist:
+                    self._write_index_file(data)
+            self._install(data)
+            self._loaded = True
+    
+    def _build(self) -> Dict:
+        """遍历yt-dlp提取器类，分析每个_VALID_URL"""
+        from yt_dlp.extractor import gen_extractor_classes
+        
+        entries = []
+        for ie_class in gen_extractor_classes():
+            ie_key = ie_class.ie_key()
+            valid_url = ie_class._VALID_URL
+            if ie_key == GENERIC_IE_KEY or valid_url is False:
+                continue
+            
+            patterns = [valid_url] if isinstance(valid_url, str) else list(valid_url)
+            entries.append({
+                'ie_key': ie_key,
+                'ie_name': ie_class.IE_NAME,
+                'working': bool(ie_class._WORKING),
+                'custom': _uses_custom_matching(ie_class),
+                'patterns': patterns,
+                'options': [[sorted(option) for option in analyze_pattern(pattern)] for pattern in patterns],
+            })
+        
+        self.logger.info(f"Built yt-dlp URL index with {len(entries)} extractors")
+        return {
+            'format': INDEX_FORMAT_VERSION,
+            'yt_dlp_version': _ydl_version(),
+            'entries': entries,
+        }
+    
+    def _install(self, data: Dict):
+        """由条目生成倒排索引：每个正则选取最少见的必要条件登记"""
+        entries = data['entries']
+        word_counts = Counter(
+            word
+            for entry in entries
+            for options in entry['options']
+            for option in options
+            for word in option
+        )
+        
+        word_index: Dict[str, List[int]] = {}
+        unindexed = []
+        indexed_count = unindexed_count = 0
+        for position, entry in enumerate(entries):
+            words = set()
+            for options in entry['options']:
+                if not options:
+                    words = None
+                    break
+                words.update(min(options, key=lambda option: sum(word_counts[word] for word in option)))
+            
+            if words is None:
+                unindexed.append(position)
+                unindexed_count += 1
+                continue
+            indexed_count += 1
+            for word in words:
+                word_index.setdefault(word, []).append(position)
+        
+        self._entries = entries
+        self._word_index = word_index
+        self._unindexed = unindexed
+        self._compiled = {}
+        self._match_cache = {}
+        self.stats['indexed_patterns'] = indexed_count
+        self.stats['unindexed_patterns'] = unindexed_count
+    
+    def _read_index_file(self) -> Optional[Dict]:
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if data.get('format') != INDEX_FORMAT_VERSION or data.get('yt_dlp_version') != _ydl_version():
+            return None
+        return data
+    
+    def _write_index_file(self, data: Dict):
+        """写入索引文件（先写临时文件再替换）"""
+        try:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.index_file.with_suffix(f".{os.getpid()}.tmp")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, self.index_file)
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.warning(f"Failed to write yt-dlp URL index: {str(e)}")
+    
+    def _candidates(self, url: str) -> List[int]:
+        """按URL中的单词及单词前缀取出候选提取器（保持yt-dlp顺序）"""
+        candidates = set(self._unindexed)
+        word_index = self._word_index
+        for word in set(WORD_RE.findall(url.lower())):
+            positions = word_index.get(word)
+            if positions:
+                candidates.update(positions)
+            if len(word) >= PREFIX_LENGTH:
+                positions = word_index.get(word[:PREFIX_LENGTH] + '*')
+                if positions:
+                    candidates.update(positions)
+        return sorted(candidates)
+    
+    def _matches(self, position: int, url: str) -> bool:
+        entry = self._entries[position]
+        regexes = self._compiled.get(position)
+        if regexes is None:
+            regexes = self._compiled[position] = tuple(re.compile(pattern) for pattern in entry['patterns'])
+        
+        self.stats['regex_checks'] += 1
+        if not any(regex.match(url) for regex in regexes):
+            return False
+        if entry['custom']:
+            # 重写了suitable的提取器（如YouTube区分视频和播放列表）交给其类方法确认
+            from yt_dlp.extractor import get_info_extractor
+            return get_info_extractor(entry['ie_key']).suitable(url)
+        return True
+    
+    def match(self, url: str) -> Optional[Dict]:
+        """返回处理该URL的yt-dlp提取器信息，没有专用提取器（只能由通用提取器尝试）时返回None"""
+        self.ensure_loaded()
+        self.stats['lookups'] += 1
+        if url in self._match_cache:
+            self.stats['cache_hits'] += 1
+            result = self._match_cache[url]
+            return dict(result) if result else None
+        
+        result = None
+        for position in self._candidates(url):
+            if self._matches(position, url):
+                entry = self._entries[position]
+                result = {
+                    'ie_key': entry['ie_key'],
+                    'ie_name': entry['ie_name'],
+                    'working': entry['working'],
+                }
+                break
+        
+        if len(self._match_cache) >= MATCH_CACHE_SIZE:
+            self._match_cache = {}
+        self._match_cache[url] = result
+        return dict(result) if result else None
+    
+    def supported_sites(self) -> List[str]:
+        """所有专用提取器的名称"""
+        self.ensure_loaded()
+        return sorted({entry['ie_name'] for entry in self._entries if entry['ie_name']})
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取索引统计信息"""
+        return self.stats.copy()
+
+# 全局URL索引
+url_index = ExtractorURLIndex()
@@ -0,0 +1,123 @@
+"""
+YoutubeDL实例池
+按配置（含代理）缓存已构建的YoutubeDL对象，避免每次调用都重新初始化提取器列表、Cookie和HTTP处理器
+"""
+
+import copy
+import json
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+import yt_dlp
+
+from .config import app_config
+
+logger = logging.getLogger(__name__)
+
+class YoutubeDLPool:
+    """YoutubeDL实例池（每个实例同一时间只被一个调用借出）"""
+    
+    def __init__(self, max_idle_per_key: int = None, max_keys: int = None):
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.max_idle_per_key = max_idle_per_key or app_config.YDL_POOL_MAX_IDLE
+        self.max_keys = max_keys or app_config.YDL_POOL_MAX_KEYS
+        self._idle: "OrderedDict[str, List[yt_dlp.YoutubeDL]]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        # 统计信息
+        self.stats = {
+            'created': 0,
+            'reused': 0,
+            'closed': 0,
+        }
+    
+    def _make_key(self, opts: Dict) -> str:
+        """由配置生成池键（代理包含在配置中）"""
+        return json.dumps(opts, sort_keys=True, default=repr)
+    
+    @contextmanager
+    def acquire(self, opts: Dict) -> Iterator[yt_dlp.YoutubeDL]:
+        """借出一个与配置匹配的YoutubeDL实例，用完自动归还"""
+        key = self._make_key(opts)
+        ydl = None
+        
+        with self._lock:
+            instances = self._idle.get(key)
+            if instances:
+                ydl = instances.pop()
+                self._idle.move_to_end(key)
+                self.stats['reused'] += 1
+        
+        if ydl is None:
+            # YoutubeDL会修改传入的配置，使用副本
+            ydl = yt_dlp.YoutubeDL(copy.deepcopy(opts))
+            with self._lock:
+                self.stats['created'] += 1
+        
+        try:
+            yield ydl
+        except Exception:
+            # 普通提取错误不影响实例复用
+            self._release(key, ydl)
+            raise
+        except BaseException:
+            # 被中断的实例状态不确定，不再复用
+            self._close(ydl)
+            raise
+        else:
+            self._release(key, ydl)
+    
+    def extract_info(self, opts: Dict, url: str) -> Dict:
+        """使用池中实例提取信息（不下载），供线程池调用"""
+        with self.acquire(opts) as ydl:
+            return ydl.extract_info(url, download=False)
+    
+    def _release(self, key: str, ydl: yt_dlp.YoutubeDL):
+        """归还实例，超出容量时关闭"""
+        evicted = []
+        with self._lock:
+            instances = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            if len(instances) < self.max_idle_per_key:
+                instances.append(ydl)
+                ydl = None
+            
+            # 配置种类过多时（如代理轮换）淘汰最久未使用的配置
+            while len(self._idle) > self.max_keys:
+                _, stale = self._idle.popitem(last=False)
+                evicted.extend(stale)
+        
+        if ydl is not None:
+            evicted.append(ydl)
+        for instance in evicted:
+            self._close(instance)
+    
+    def _close(self, ydl: yt_dlp.YoutubeDL):
+        """关闭实例（保存Cookie、关闭HTTP处理器）"""
+        try:
+            ydl.close()
+        except Exception as e:
+            self.logger.debug(f"Failed to close YoutubeDL instance: {str(e)}")
+        with self._lock:
+            self.stats['closed'] += 1
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取实例池统计信息"""
+        with self._lock:
+            stats = self.stats.copy()
+            stats['idle'] = sum(len(instances) for instances in self._idle.values())
+            stats['option_sets'] = len(self._idle)
+        return stats
+    
+    def clear(self):
+        """关闭所有空闲实例"""
+        with self._lock:
+            instances = [ydl for group in self._idle.values() for ydl in group]
+            self._idle.clear()
+        for ydl in instances:
+            self._close(ydl)
+
+# 全局实例池
+ydl_pool = YoutubeDLPool()